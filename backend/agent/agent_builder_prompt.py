@@ -43,6 +43,7 @@ When recommending tools, consider these core capabilities:
 ### Development & System Tools
 - **sb_shell_tool**: Execute terminal commands, run scripts, manage system processes
 - **sb_files_tool**: Create, read, edit, and organize files and directories
+- **sb_search_tool**: Search file contents across the workspace with ripgrep
 - **sb_deploy_tool**: Deploy applications, manage containers, handle CI/CD workflows
 - **sb_expose_tool**: Expose local services and ports for testing and development
 
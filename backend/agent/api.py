@@ -19,6 +19,8 @@ from utils.logger import logger
 from services.billing import check_billing_status, can_use_model
 from utils.config import config
 from sandbox.sandbox import create_sandbox, delete_sandbox, get_or_start_sandbox
+from sandbox.executor import sandbox_executor
+from sandbox.pool import get_sandbox_pool
 from services.llm import make_llm_api_call
 from run_agent_background import run_agent_background, _cleanup_redis_response_list, update_agent_run_status
 from utils.constants import MODEL_NAME_ALIASES
@@ -892,8 +894,14 @@ async def initiate_agent_with_files(
 
         # 2. Create Sandbox
         try:
-            from sandbox.hybrid_sandbox import create_sandbox
-            sandbox_result = create_sandbox(password=str(uuid.uuid4()), project_id=project_id)
+            # Prefer a warm sandbox from the pool; create one only if the pool is empty
+            sandbox_pool = get_sandbox_pool()
+            sandbox_result = await sandbox_pool.claim(project_id) if sandbox_pool else None
+            if not sandbox_result:
+                from sandbox.hybrid_sandbox import create_sandbox
+                sandbox_result = await sandbox_executor.run(
+                    create_sandbox, password=str(uuid.uuid4()), project_id=project_id, timeout=300
+                )
             
             if sandbox_result and 'id' in sandbox_result:
                 sandbox_id = sandbox_result['id']
@@ -982,7 +990,7 @@ async def initiate_agent_with_files(
                                 if inspect.iscoroutinefunction(sandbox.fs.upload_file):
                                     await sandbox.fs.upload_file(content, target_path)
                                 else:
-                                    sandbox.fs.upload_file(content, target_path)
+                                    await sandbox_executor.run(sandbox.fs.upload_file, content, target_path)
                                 logger.debug(f"Called sandbox.fs.upload_file for {target_path}")
                                 upload_successful = True
                             else:
@@ -994,7 +1002,7 @@ async def initiate_agent_with_files(
                             try:
                                 await asyncio.sleep(0.2)
                                 parent_dir = os.path.dirname(target_path)
-                                files_in_dir = sandbox.fs.list_files(parent_dir)
+                                files_in_dir = await sandbox_executor.run(sandbox.fs.list_files, parent_dir)
                                 file_names_in_dir = [f.name for f in files_in_dir]
                                 if safe_filename in file_names_in_dir:
                                     successful_uploads.append(target_path)
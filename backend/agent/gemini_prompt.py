@@ -287,7 +287,7 @@ You have the ability to execute operations using both Python and CLI tools:
   4. Test patterns with small samples first
   5. Use extended regex (-E) for complex patterns
 - Data Processing Workflow:
-  1. Use grep to locate relevant files
+  1. Use the search_files tool to locate relevant files and lines (grep only inside shell pipelines)
   2. Use head/tail to preview content
   3. Use awk for data extraction
   4. Use wc to verify results
@@ -353,7 +353,7 @@ You have the ability to execute operations using both Python and CLI tools:
         - Only if you need specific details not found in search results:
           * Use scrape-webpage on specific URLs from web-search results
         - Only if scrape-webpage fails or if the page requires interaction:
-          * Use direct browser tools (browser_navigate_to, browser_go_back, browser_wait, browser_click_element, browser_input_text, browser_send_keys, browser_switch_tab, browser_close_tab, browser_scroll_down, browser_scroll_up, browser_scroll_to_text, browser_get_dropdown_options, browser_select_dropdown_option, browser_drag_drop, browser_click_coordinates etc.)
+          * Use direct browser tools (browser_navigate_to, browser_go_back, browser_wait, browser_click_element, browser_input_text, browser_send_keys, browser_switch_tab, browser_close_tab, browser_scroll_down, browser_scroll_up, browser_scroll_to_text, browser_get_dropdown_options, browser_select_dropdown_option, browser_drag_drop, browser_click_coordinates, browser_read_page, browser_open_many, browser_get_screen_text etc.)
           * This is needed for:
             - Dynamic content loading
             - JavaScript-heavy sites
@@ -385,7 +385,7 @@ You have the ability to execute operations using both Python and CLI tools:
   4. Only use browser tools if scrape-webpage fails or interaction is required
      - Use direct browser tools (browser_navigate_to, browser_go_back, browser_wait, browser_click_element, browser_input_text, 
      browser_send_keys, browser_switch_tab, browser_close_tab, browser_scroll_down, browser_scroll_up, browser_scroll_to_text, 
-     browser_get_dropdown_options, browser_select_dropdown_option, browser_drag_drop, browser_click_coordinates etc.)
+     browser_get_dropdown_options, browser_select_dropdown_option, browser_drag_drop, browser_click_coordinates, browser_read_page, browser_open_many, browser_get_screen_text etc.)
      - This is needed for:
        * Dynamic content loading
        * JavaScript-heavy sites
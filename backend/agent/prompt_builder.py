@@ -0,0 +1,305 @@
+"""
+System prompt assembly for agent runs.
+
+Builds the final system message for a run (default/Gemini/agent builder/custom
+prompt, sample response, MCP tool listing and XML tool examples) and memoizes it
+per agent configuration so repeated runs reuse a byte-identical prefix, which
+keeps Anthropic prompt caching warm.
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+from agent.prompt import get_system_prompt
+from agent.gemini_prompt import get_gemini_system_prompt
+from agent.agent_builder_prompt import get_agent_builder_prompt
+from agentpress.tool import SchemaType
+from agentpress.tool_registry import ToolRegistry
+from agentpress.thread_manager import build_xml_examples_content
+from utils.logger import logger
+
+SAMPLE_RESPONSE_PATH = os.path.join(os.path.dirname(__file__), 'sample_responses/1.txt')
+
+@dataclass(frozen=True)
+class SystemPromptKey:
+    """Cache key identifying one assembled system prompt.
+
+    Attributes:
+        agent_id (str): Agent the prompt belongs to ("default" when no agent is configured)
+        agent_version (str): Version marker of the agent row (its updated_at)
+        model_family (str): Prompt family selected from the model name
+        tool_set_hash (str): Digest of the registered tool schemas and XML examples
+    """
+    agent_id: str
+    agent_version: str
+    model_family: str
+    tool_set_hash: str
+
+    def __str__(self) -> str:
+        return f"{self.agent_id}:{self.agent_version}:{self.model_family}:{self.tool_set_hash[:12]}"
+
+@dataclass
+class BuiltSystemPrompt:
+    """Result of a system prompt build.
+
+    Attributes:
+        message (Dict[str, Any]): The system message to pass to run_thread
+        cache_key (SystemPromptKey): Key the prompt was stored under
+        size (int): Size of the prompt content in bytes (UTF-8)
+        cache_hit (bool): Whether the prompt was served from the cache
+    """
+    message: Dict[str, Any]
+    cache_key: SystemPromptKey
+    size: int
+    cache_hit: bool
+
+@lru_cache(maxsize=1)
+def _load_sample_response() -> str:
+    """Read the sample assistant response once per process."""
+    with open(SAMPLE_RESPONSE_PATH, 'r') as file:
+        return file.read()
+
+def get_model_family(model_name: str) -> str:
+    """Map a model name to the prompt family it is served with."""
+    model_name = model_name.lower()
+    if "gemini-2.5-flash" in model_name:
+        return "gemini"
+    if "anthropic" in model_name:
+        return "anthropic"
+    return "default"
+
+def compute_tool_set_hash(tool_registry: ToolRegistry) -> str:
+    """Compute a stable digest of the tools registered in a registry."""
+    openapi = sorted(
+        (name, json.dumps(info['schema'].schema, sort_keys=True, default=str))
+        for name, info in tool_registry.tools.items()
+    )
+    xml = sorted(
+        (tag_name, info['method'], info['schema'].xml_schema.example or "")
+        for tag_name, info in tool_registry.xml_tools.items()
+    )
+    payload = json.dumps({"openapi": openapi, "xml": xml}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_mcp_info(mcp_wrapper_instance) -> str:
+    """Render the MCP tool section appended to the system prompt."""
+    mcp_info = "\n\n--- MCP Tools Available ---\n"
+    mcp_info += "You have access to external MCP (Model Context Protocol) server tools.\n"
+    mcp_info += "MCP tools can be called directly using their native function names in the standard function calling format:\n"
+    mcp_info += '<function_calls>\n'
+    mcp_info += '<invoke name="{tool_name}">\n'
+    mcp_info += '<parameter name="param1">value1</parameter>\n'
+    mcp_info += '<parameter name="param2">value2</parameter>\n'
+    mcp_info += '</invoke>\n'
+    mcp_info += '</function_calls>\n\n'
+
+    # List available MCP tools
+    mcp_info += "Available MCP tools:\n"
+    try:
+        # Get the actual registered schemas from the wrapper
+        registered_schemas = mcp_wrapper_instance.get_schemas()
+        for method_name, schema_list in registered_schemas.items():
+            if method_name == 'call_mcp_tool':
+                continue  # Skip the fallback method
+
+            for schema in schema_list:
+                if schema.schema_type == SchemaType.OPENAPI:
+                    func_info = schema.schema.get('function', {})
+                    description = func_info.get('description', 'No description available')
+                    mcp_info += f"- **{method_name}**: {description}\n"
+
+                    # Show parameter info
+                    params = func_info.get('parameters', {})
+                    props = params.get('properties', {})
+                    if props:
+                        mcp_info += f"  Parameters: {', '.join(props.keys())}\n"
+
+    except Exception as e:
+        logger.error(f"Error listing MCP tools: {e}")
+        mcp_info += "- Error loading MCP tool list\n"
+
+    # Add critical instructions for using search results
+    mcp_info += "\n🚨 CRITICAL MCP TOOL RESULT INSTRUCTIONS 🚨\n"
+    mcp_info += "When you use ANY MCP (Model Context Protocol) tools:\n"
+    mcp_info += "1. ALWAYS read and use the EXACT results returned by the MCP tool\n"
+    mcp_info += "2. For search tools: ONLY cite URLs, sources, and information from the actual search results\n"
+    mcp_info += "3. For any tool: Base your response entirely on the tool's output - do NOT add external information\n"
+    mcp_info += "4. DO NOT fabricate, invent, hallucinate, or make up any sources, URLs, or data\n"
+    mcp_info += "5. If you need more information, call the MCP tool again with different parameters\n"
+    mcp_info += "6. When writing reports/summaries: Reference ONLY the data from MCP tool results\n"
+    mcp_info += "7. If the MCP tool doesn't return enough information, explicitly state this limitation\n"
+    mcp_info += "8. Always double-check that every fact, URL, and reference comes from the MCP tool output\n"
+    mcp_info += "\nIMPORTANT: MCP tool results are your PRIMARY and ONLY source of truth for external data!\n"
+    mcp_info += "NEVER supplement MCP results with your training data or make assumptions beyond what the tools provide.\n"
+    return mcp_info
+
+class SystemPromptBuilder:
+    """Assembles and memoizes system prompts per agent configuration.
+
+    Prompts are cached per (agent_id, agent version, model family, tool set hash)
+    in a bounded LRU, so every run of the same configuration in this process gets
+    the exact same bytes.
+
+    Attributes:
+        max_entries (int): Maximum number of prompts kept in the cache
+        hits (int): Number of builds served from the cache
+        misses (int): Number of builds that assembled a new prompt
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """Initialize an empty prompt cache.
+
+        Args:
+            max_entries: Maximum number of prompts kept in the cache
+        """
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[SystemPromptKey, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _make_key(
+        self,
+        model_name: str,
+        tool_registry: ToolRegistry,
+        agent_config: Optional[Dict[str, Any]],
+        is_agent_builder: bool,
+        include_mcp_info: bool,
+        include_xml_examples: bool
+    ) -> SystemPromptKey:
+        """Build the cache key for a prompt configuration."""
+        agent_id = "default"
+        agent_version = "builtin"
+        if agent_config:
+            agent_id = agent_config.get('agent_id') or agent_config.get('name') or "custom"
+            agent_version = str(agent_config.get('updated_at') or "")
+            if not agent_version:
+                # Without a version marker fall back to the prompt content itself
+                custom_prompt = agent_config.get('system_prompt') or ""
+                agent_version = hashlib.sha256(custom_prompt.encode('utf-8')).hexdigest()[:16]
+        if is_agent_builder:
+            agent_id = f"builder:{agent_id}"
+
+        model_family = get_model_family(model_name)
+        if include_mcp_info:
+            model_family += "+mcp"
+        if include_xml_examples:
+            model_family += "+xml"
+
+        return SystemPromptKey(
+            agent_id=agent_id,
+            agent_version=agent_version,
+            model_family=model_family,
+            tool_set_hash=compute_tool_set_hash(tool_registry)
+        )
+
+    def _assemble(
+        self,
+        model_family: str,
+        tool_registry: ToolRegistry,
+        agent_config: Optional[Dict[str, Any]],
+        is_agent_builder: bool,
+        mcp_wrapper_instance,
+        include_xml_examples: bool
+    ) -> str:
+        """Assemble the prompt content from scratch."""
+        if model_family.startswith("gemini"):
+            default_system_content = get_gemini_system_prompt()
+        else:
+            # Use the original prompt - the LLM can only use tools that are registered
+            default_system_content = get_system_prompt()
+
+        # Add sample response for non-anthropic models
+        if not model_family.startswith("anthropic"):
+            default_system_content = default_system_content + "\n\n <sample_assistant_response>" + _load_sample_response() + "</sample_assistant_response>"
+
+        if agent_config and agent_config.get('system_prompt'):
+            # Completely replace the default system prompt with the custom one
+            # This prevents confusion and tool hallucination
+            system_content = agent_config['system_prompt'].strip()
+        elif is_agent_builder:
+            system_content = get_agent_builder_prompt()
+        else:
+            system_content = default_system_content
+
+        if mcp_wrapper_instance is not None:
+            system_content += build_mcp_info(mcp_wrapper_instance)
+
+        if include_xml_examples:
+            xml_examples = tool_registry.get_xml_examples()
+            if xml_examples:
+                system_content += build_xml_examples_content(xml_examples)
+
+        return system_content
+
+    def build(
+        self,
+        model_name: str,
+        tool_registry: ToolRegistry,
+        agent_config: Optional[Dict[str, Any]] = None,
+        is_agent_builder: bool = False,
+        mcp_wrapper_instance=None,
+        include_xml_examples: bool = True
+    ) -> BuiltSystemPrompt:
+        """Return the system message for a run, assembling it on a cache miss.
+
+        Args:
+            model_name: Name of the model the run uses
+            tool_registry: Registry holding every tool registered for the run
+            agent_config: Optional custom agent configuration (agents table row)
+            is_agent_builder: Whether the run is an agent builder session
+            mcp_wrapper_instance: Initialized MCP wrapper whose tools should be listed
+            include_xml_examples: Whether to append the XML tool examples
+
+        Returns:
+            BuiltSystemPrompt with the message, cache key and size
+        """
+        key = self._make_key(
+            model_name, tool_registry, agent_config, is_agent_builder,
+            mcp_wrapper_instance is not None, include_xml_examples
+        )
+
+        content = self._cache.get(key)
+        cache_hit = content is not None
+        if cache_hit:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            content = self._assemble(
+                key.model_family, tool_registry, agent_config, is_agent_builder,
+                mcp_wrapper_instance, include_xml_examples
+            )
+            self._cache[key] = content
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        size = len(content.encode('utf-8'))
+        logger.debug(f"System prompt {'cache hit' if cache_hit else 'assembled'}: key={key} size={size} bytes")
+        return BuiltSystemPrompt(
+            message={"role": "system", "content": content},
+            cache_key=key,
+            size=size,
+            cache_hit=cache_hit
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+
+    def clear(self) -> None:
+        """Drop every cached prompt."""
+        self._cache.clear()
+
+# Process-wide builder shared by all runs
+system_prompt_builder = SystemPromptBuilder()
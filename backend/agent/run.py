@@ -1,4 +1,3 @@
-import os
 import json
 import re
 from uuid import uuid4
@@ -12,26 +11,28 @@ from agent.tools.web_search_tool import SandboxWebSearchTool
 from dotenv import load_dotenv
 from utils.config import config
 
-from agent.agent_builder_prompt import get_agent_builder_prompt
 from agentpress.thread_manager import ThreadManager
 from agentpress.response_processor import ProcessorConfig
+from agentpress.tool_output_stream import ToolOutputStream
+from agentpress.thread_state import thread_state
 from agent.tools.sb_shell_tool import SandboxShellTool
 from agent.tools.sb_files_tool import SandboxFilesTool
+from agent.tools.sb_search_tool import SandboxSearchTool
 from agent.tools.sb_browser_tool import SandboxBrowserTool
 from agent.tools.data_providers_tool import DataProvidersTool
 from agent.tools.expand_msg_tool import ExpandMessageTool
-from agent.prompt import get_system_prompt
+from agent.prompt_builder import system_prompt_builder
 from utils.logger import logger
 from utils.auth_utils import get_account_id_from_thread
 from services.billing import check_billing_status
 from agent.tools.sb_vision_tool import SandboxVisionTool
+from sandbox.resolver import sandbox_resolver
 from services.langfuse import langfuse
 try:
     from langfuse.client import StatefulTraceClient
 except ImportError:
     StatefulTraceClient = None
 from services.langfuse import langfuse
-from agent.gemini_prompt import get_gemini_system_prompt
 from agent.tools.mcp_tool_wrapper import MCPToolWrapper
 from agentpress.tool import SchemaType
 
@@ -51,7 +52,8 @@ async def run_agent(
     agent_config: Optional[dict] = None,    
     trace: Optional[StatefulTraceClient] = None,
     is_agent_builder: Optional[bool] = False,
-    target_agent_id: Optional[str] = None
+    target_agent_id: Optional[str] = None,
+    tool_output_stream: Optional[ToolOutputStream] = None
 ):
     """Run the development agent with specified configuration."""
     logger.info(f"🚀 Starting agent with model: {model_name}")
@@ -79,8 +81,11 @@ async def run_agent(
     if not sandbox_info.get('id'):
         raise ValueError(f"No sandbox found for project {project_id}")
 
-    # Initialize tools with project_id instead of sandbox object
-    # This ensures each tool independently verifies it's operating on the correct project
+    # Initialize tools with project_id instead of sandbox object; they share one
+    # resolver, seeded with this row, so the sandbox is looked up once per run.
+    # A handle cached by an earlier run is dropped, as the sandbox may have stopped since.
+    sandbox_resolver.invalidate(project_id)
+    sandbox_resolver.seed(project_id, sandbox_info)
     
     # Get enabled tools from agent config, or use defaults
     enabled_tools = None
@@ -101,15 +106,16 @@ async def run_agent(
     if enabled_tools is None:
         # No agent specified - register ALL tools for full Neo experience
         logger.info("No agent specified - registering all tools for full Neo capabilities")
-        thread_manager.add_tool(SandboxShellTool, project_id=project_id, thread_manager=thread_manager)
-        thread_manager.add_tool(SandboxFilesTool, project_id=project_id, thread_manager=thread_manager)
-        thread_manager.add_tool(SandboxBrowserTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager)
-        thread_manager.add_tool(SandboxDeployTool, project_id=project_id, thread_manager=thread_manager)
-        thread_manager.add_tool(SandboxExposeTool, project_id=project_id, thread_manager=thread_manager)
+        thread_manager.add_tool(SandboxShellTool, project_id=project_id, thread_manager=thread_manager, output_stream=tool_output_stream, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxFilesTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxSearchTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxBrowserTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxDeployTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxExposeTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         thread_manager.add_tool(ExpandMessageTool, thread_id=thread_id, thread_manager=thread_manager)
         thread_manager.add_tool(MessageTool)
-        thread_manager.add_tool(SandboxWebSearchTool, project_id=project_id, thread_manager=thread_manager)
-        thread_manager.add_tool(SandboxVisionTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager)
+        thread_manager.add_tool(SandboxWebSearchTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        thread_manager.add_tool(SandboxVisionTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if config.RAPID_API_KEY:
             thread_manager.add_tool(DataProvidersTool)
     else:
@@ -117,19 +123,22 @@ async def run_agent(
         thread_manager.add_tool(ExpandMessageTool, thread_id=thread_id, thread_manager=thread_manager)
         thread_manager.add_tool(MessageTool)
         if enabled_tools.get('sb_shell_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxShellTool, project_id=project_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxShellTool, project_id=project_id, thread_manager=thread_manager, output_stream=tool_output_stream, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('sb_files_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxFilesTool, project_id=project_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxFilesTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
+        # Agents configured before the search tool existed get it along with the files tool
+        if enabled_tools.get('sb_search_tool', enabled_tools.get('sb_files_tool', {})).get('enabled', False):
+            thread_manager.add_tool(SandboxSearchTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('sb_browser_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxBrowserTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxBrowserTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('sb_deploy_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxDeployTool, project_id=project_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxDeployTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('sb_expose_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxExposeTool, project_id=project_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxExposeTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('web_search_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxWebSearchTool, project_id=project_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxWebSearchTool, project_id=project_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if enabled_tools.get('sb_vision_tool', {}).get('enabled', False):
-            thread_manager.add_tool(SandboxVisionTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager)
+            thread_manager.add_tool(SandboxVisionTool, project_id=project_id, thread_id=thread_id, thread_manager=thread_manager, sandbox_resolver=sandbox_resolver)
         if config.RAPID_API_KEY and enabled_tools.get('data_providers_tool', {}).get('enabled', False):
             thread_manager.add_tool(DataProvidersTool)
 
@@ -183,10 +192,7 @@ async def run_agent(
                             # Register each dynamic tool in the registry
                             for schema in schema_list:
                                 if schema.schema_type == SchemaType.OPENAPI:
-                                    thread_manager.tool_registry.tools[method_name] = {
-                                        "instance": mcp_wrapper_instance,
-                                        "schema": schema
-                                    }
+                                    thread_manager.tool_registry.register_openapi_function(method_name, mcp_wrapper_instance, schema)
                                     logger.debug(f"Registered dynamic MCP tool: {method_name}")
                 
                 except Exception as e:
@@ -194,99 +200,33 @@ async def run_agent(
                     # Continue without MCP tools if initialization fails
 
     # Prepare system prompt
-    # First, get the default system prompt
-    if "gemini-2.5-flash" in model_name.lower():
-        default_system_content = get_gemini_system_prompt()
-    else:
-        # Use the original prompt - the LLM can only use tools that are registered
-        default_system_content = get_system_prompt()
-        
-    # Add sample response for non-anthropic models
-    if "anthropic" not in model_name.lower():
-        sample_response_path = os.path.join(os.path.dirname(__file__), 'sample_responses/1.txt')
-        with open(sample_response_path, 'r') as file:
-            sample_response = file.read()
-        default_system_content = default_system_content + "\n\n <sample_assistant_response>" + sample_response + "</sample_assistant_response>"
-    
-    # Handle custom agent system prompt
+    # The builder memoizes the assembled prompt (including MCP tool listing and XML examples)
+    # per agent configuration so the prefix stays byte-stable across runs
     if agent_config and agent_config.get('system_prompt'):
-        custom_system_prompt = agent_config['system_prompt'].strip()
-        
-        # Completely replace the default system prompt with the custom one
-        # This prevents confusion and tool hallucination
-        system_content = custom_system_prompt
         logger.info(f"Using ONLY custom agent system prompt for: {agent_config.get('name', 'Unknown')}")
     elif is_agent_builder:
-        system_content = get_agent_builder_prompt()
         logger.info("Using agent builder system prompt")
     else:
-        # Use just the default system prompt
-        system_content = default_system_content
         logger.info("Using default system prompt only")
-    
-    # Add MCP tool information to system prompt if MCP tools are configured
+
+    mcp_prompt_instance = None
     if agent_config and (agent_config.get('configured_mcps') or agent_config.get('custom_mcps')) and mcp_wrapper_instance and mcp_wrapper_instance._initialized:
-        mcp_info = "\n\n--- MCP Tools Available ---\n"
-        mcp_info += "You have access to external MCP (Model Context Protocol) server tools.\n"
-        mcp_info += "MCP tools can be called directly using their native function names in the standard function calling format:\n"
-        mcp_info += '<function_calls>\n'
-        mcp_info += '<invoke name="{tool_name}">\n'
-        mcp_info += '<parameter name="param1">value1</parameter>\n'
-        mcp_info += '<parameter name="param2">value2</parameter>\n'
-        mcp_info += '</invoke>\n'
-        mcp_info += '</function_calls>\n\n'
-        
-        # List available MCP tools
-        mcp_info += "Available MCP tools:\n"
-        try:
-            # Get the actual registered schemas from the wrapper
-            registered_schemas = mcp_wrapper_instance.get_schemas()
-            for method_name, schema_list in registered_schemas.items():
-                if method_name == 'call_mcp_tool':
-                    continue  # Skip the fallback method
-                    
-                # Get the schema info
-                for schema in schema_list:
-                    if schema.schema_type == SchemaType.OPENAPI:
-                        func_info = schema.schema.get('function', {})
-                        description = func_info.get('description', 'No description available')
-                        # Extract server name from description if available
-                        server_match = description.find('(MCP Server: ')
-                        if server_match != -1:
-                            server_end = description.find(')', server_match)
-                            server_info = description[server_match:server_end+1]
-                        else:
-                            server_info = ''
-                        
-                        mcp_info += f"- **{method_name}**: {description}\n"
-                        
-                        # Show parameter info
-                        params = func_info.get('parameters', {})
-                        props = params.get('properties', {})
-                        if props:
-                            mcp_info += f"  Parameters: {', '.join(props.keys())}\n"
-                            
-        except Exception as e:
-            logger.error(f"Error listing MCP tools: {e}")
-            mcp_info += "- Error loading MCP tool list\n"
-        
-        # Add critical instructions for using search results
-        mcp_info += "\n🚨 CRITICAL MCP TOOL RESULT INSTRUCTIONS 🚨\n"
-        mcp_info += "When you use ANY MCP (Model Context Protocol) tools:\n"
-        mcp_info += "1. ALWAYS read and use the EXACT results returned by the MCP tool\n"
-        mcp_info += "2. For search tools: ONLY cite URLs, sources, and information from the actual search results\n"
-        mcp_info += "3. For any tool: Base your response entirely on the tool's output - do NOT add external information\n"
-        mcp_info += "4. DO NOT fabricate, invent, hallucinate, or make up any sources, URLs, or data\n"
-        mcp_info += "5. If you need more information, call the MCP tool again with different parameters\n"
-        mcp_info += "6. When writing reports/summaries: Reference ONLY the data from MCP tool results\n"
-        mcp_info += "7. If the MCP tool doesn't return enough information, explicitly state this limitation\n"
-        mcp_info += "8. Always double-check that every fact, URL, and reference comes from the MCP tool output\n"
-        mcp_info += "\nIMPORTANT: MCP tool results are your PRIMARY and ONLY source of truth for external data!\n"
-        mcp_info += "NEVER supplement MCP results with your training data or make assumptions beyond what the tools provide.\n"
-        
-        system_content += mcp_info
-    
-    system_message = { "role": "system", "content": system_content }
+        mcp_prompt_instance = mcp_wrapper_instance
+
+    built_prompt = system_prompt_builder.build(
+        model_name=model_name,
+        tool_registry=thread_manager.tool_registry,
+        agent_config=agent_config,
+        is_agent_builder=is_agent_builder,
+        mcp_wrapper_instance=mcp_prompt_instance,
+        include_xml_examples=True
+    )
+    system_message = built_prompt.message
+    logger.info(f"System prompt {'reused' if built_prompt.cache_hit else 'built'}: key={built_prompt.cache_key}, size={built_prompt.size} bytes")
+    trace.event(name="system_prompt_built", level="DEFAULT", status_message=(f"System prompt key={built_prompt.cache_key} size={built_prompt.size}"), metadata={"cache_key": str(built_prompt.cache_key), "size": built_prompt.size, "cache_hit": built_prompt.cache_hit})
+
+    # Anthropic models use the append-only cache layout to keep prompt cache hits high
+    is_anthropic_model = "anthropic" in model_name.lower() or "claude" in model_name.lower()
 
     iteration_count = 0
     continue_execution = True
@@ -328,20 +268,28 @@ async def run_agent(
         temporary_message = None
         temp_message_content_list = [] # List to hold text/image blocks
 
-        # Get the latest browser_state message
-        latest_browser_state_msg = client.table('messages').select('*').eq('thread_id', thread_id).eq('type', 'browser_state').order('created_at', desc=True).limit(1).execute()
-        if latest_browser_state_msg.data and len(latest_browser_state_msg.data) > 0:
+        # Get the latest browser state, kept in Redis by the browser tool
+        try:
+            browser_content = await thread_state.get(thread_id, "browser_state")
+        except Exception as e:
+            # Redis is unreachable, so the tool archived its states as messages
+            logger.warning(f"Failed to read browser state from Redis, using messages: {e}")
+            latest_browser_state_msg = client.table('messages').select('*').eq('thread_id', thread_id).eq('type', 'browser_state').order('created_at', desc=True).limit(1).execute()
+            browser_content = latest_browser_state_msg.data[0]["content"] if latest_browser_state_msg.data else None
+        if browser_content:
             try:
-                browser_content = latest_browser_state_msg.data[0]["content"]
                 if isinstance(browser_content, str):
                     browser_content = json.loads(browser_content)
                 screenshot_base64 = browser_content.get("screenshot_base64")
                 screenshot_url = browser_content.get("image_url")
+                screenshot_format = browser_content.get("screenshot_format") or "image/jpeg"
                 
                 # Create a copy of the browser state without screenshot data
                 browser_state_text = browser_content.copy()
                 browser_state_text.pop('screenshot_base64', None)
                 browser_state_text.pop('image_url', None)
+                browser_state_text.pop('screenshot_hash', None)
+                browser_state_text.pop('screenshot_format', None)
 
                 if browser_state_text:
                     temp_message_content_list.append({
@@ -355,7 +303,7 @@ async def run_agent(
                         "type": "image_url",
                         "image_url": {
                             "url": screenshot_url,
-                            "format": "image/jpeg"
+                            "format": screenshot_format
                         }
                     })
                 elif screenshot_base64:
@@ -363,7 +311,7 @@ async def run_agent(
                     temp_message_content_list.append({
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{screenshot_base64}",
+                            "url": f"data:{screenshot_format};base64,{screenshot_base64}",
                         }
                     })
                 else:
@@ -373,11 +321,15 @@ async def run_agent(
                 logger.error(f"Error parsing browser state: {e}")
                 trace.event(name="error_parsing_browser_state", level="ERROR", status_message=(f"{e}"))
 
-        # Get the latest image_context message (NEW)
-        latest_image_context_msg = client.table('messages').select('*').eq('thread_id', thread_id).eq('type', 'image_context').order('created_at', desc=True).limit(1).execute()
-        if latest_image_context_msg.data and len(latest_image_context_msg.data) > 0:
+        # Take the images loaded by see_image since the last call; each is shown once and removed
+        try:
+            image_contexts = await thread_state.pop_all(thread_id, "image_context")
+        except Exception as e:
+            image_contexts = []
+            logger.error(f"Error reading image context: {e}")
+            trace.event(name="error_reading_image_context", level="ERROR", status_message=(f"{e}"))
+        for image_context_content in image_contexts:
             try:
-                image_context_content = latest_image_context_msg.data[0]["content"] if isinstance(latest_image_context_msg.data[0]["content"], dict) else json.loads(latest_image_context_msg.data[0]["content"])
                 base64_image = image_context_content.get("base64")
                 mime_type = image_context_content.get("mime_type")
                 file_path = image_context_content.get("file_path", "unknown file")
@@ -395,8 +347,6 @@ async def run_agent(
                     })
                 else:
                     logger.warning(f"Image context found for '{file_path}' but missing base64 or mime_type.")
-
-                client.table('messages').delete().eq('message_id', latest_image_context_msg.data[0]["message_id"]).execute()
             except Exception as e:
                 logger.error(f"Error parsing image context: {e}")
                 trace.event(name="error_parsing_image_context", level="ERROR", status_message=(f"{e}"))
@@ -432,15 +382,16 @@ async def run_agent(
                     native_tool_calling=False,
                     execute_tools=True,
                     execute_on_stream=True,
-                    tool_execution_strategy="parallel",
+                    tool_execution_strategy="dependency",
                     xml_adding_strategy="user_message"
                 ),
                 native_max_auto_continues=native_max_auto_continues,
-                include_xml_examples=True,
+                include_xml_examples=False, # Already part of the built system prompt
                 enable_thinking=enable_thinking,
                 reasoning_effort=reasoning_effort,
                 enable_context_manager=enable_context_manager,
-                generation=generation
+                generation=generation,
+                cache_layout="stable" if is_anthropic_model else "default"
             )
 
             if isinstance(response, dict) and "status" in response and response["status"] == "error":
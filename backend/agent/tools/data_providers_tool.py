@@ -1,7 +1,7 @@
 import json
 from typing import Union, Dict, Any
 
-from agentpress.tool import Tool, ToolResult, openapi_schema, xml_schema
+from agentpress.tool import Tool, ToolResult, openapi_schema, xml_schema, cache_policy, tool_resources, execution_limits
 from agent.tools.data_providers.LinkedinProvider import LinkedinProvider
 from agent.tools.data_providers.YahooFinanceProvider import YahooFinanceProvider
 from agent.tools.data_providers.AmazonProvider import AmazonProvider
@@ -58,6 +58,7 @@ Use this tool when you need to discover what endpoints are available.
 </function_calls>
         '''
     )
+    @tool_resources()
     async def get_data_provider_endpoints(
         self,
         service_name: str
@@ -134,6 +135,9 @@ Use this tool when you need to discover what endpoints are available.
         </function_calls>
         '''
     )
+    @cache_policy(ttl=900, key_fields=["service_name", "route", "payload"])
+    @execution_limits(timeout=120)
+    @tool_resources()
     async def execute_data_provider_call(
         self,
         service_name: str,
@@ -1,4 +1,4 @@
-from agentpress.tool import Tool, ToolResult, openapi_schema, xml_schema
+from agentpress.tool import Tool, ToolResult, openapi_schema, xml_schema, tool_resources
 from agentpress.thread_manager import ThreadManager
 import json
 
@@ -55,6 +55,7 @@ class ExpandMessageTool(Tool):
         </function_calls>
         '''
     )
+    @tool_resources()
     async def expand_message(self, message_id: str) -> ToolResult:
         """Expand a message from the previous conversation with the user.
 
@@ -1,111 +1,191 @@
 import traceback
 import json
+import shlex
+import random
+from typing import Optional, Any, Tuple
+from urllib.parse import urlencode
 
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources, execution_limits
 from agentpress.thread_manager import ThreadManager
+from agentpress.thread_state import thread_state
 from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
+from sandbox.api_client import sandbox_api_client, SandboxApiUnavailable
 from utils.logger import logger
+from utils.config import config
 from utils.s3_upload_utils import upload_base64_image
 
+# Port of the browser automation API inside the sandbox
+BROWSER_API_PORT = 8003
+# Seconds allowed for one browser action
+BROWSER_ACTION_TIMEOUT = 30
+# Characters of page markdown returned per browser_read_page chunk
+PAGE_CHUNK_CHARS = 20000
+# Pages loaded concurrently and characters returned per page by browser_open_many
+OPEN_MANY_MAX_URLS = 10
+OPEN_MANY_CONCURRENCY = 4
+OPEN_MANY_CHUNK_CHARS = 5000
+# Seconds allowed for one browser_open_many batch. Batches run one at a time in their own
+# concurrency group, as a group's cap is set by whichever of its tools runs first.
+OPEN_MANY_TIMEOUT = 120
+# Seconds the browser API spends loading a batch before returning the pages loaded so far,
+# leaving time for the response within OPEN_MANY_TIMEOUT
+OPEN_MANY_DEADLINE = 100
 
 class SandboxBrowserTool(SandboxToolsBase):
     """Tool for executing tasks in a Daytona sandbox with browser-use capabilities."""
     
-    def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         self.thread_id = thread_id
+        self._last_screenshot_hash: Optional[str] = None
+        # Hash and storage URL of the last uploaded screenshot, reused for identical frames
+        self._uploaded_screenshot: Optional[Tuple[str, str]] = None
 
-    async def _execute_browser_action(self, endpoint: str, params: dict = None, method: str = "POST") -> ToolResult:
+    @staticmethod
+    def _query_params(params: Optional[dict], method: str, query: Optional[dict]) -> Optional[dict]:
+        """Merge GET parameters and per-action options (e.g. full_render) into query parameters."""
+        merged = {**(params or {} if method == "GET" else {}), **(query or {})}
+        return merged or None
+
+    async def _execute_browser_action_via_exec(self, path: str, params: Optional[dict], method: str, query: Optional[dict] = None,
+                                               timeout: int = BROWSER_ACTION_TIMEOUT) -> Tuple[int, Any]:
+        """Call the browser API with curl inside the sandbox, when the direct channel is unavailable.
+
+        Returns:
+            Tuple of HTTP status and decoded JSON body (the raw body if it is not JSON)
+        """
+        url = f"http://localhost:{BROWSER_API_PORT}{path}"
+        query_params = self._query_params(params, method, query)
+        if query_params:
+            url = f"{url}?{urlencode(query_params)}"
+        curl_cmd = f"curl -s -X {method} {shlex.quote(url)} -H 'Content-Type: application/json' -w '\\n%{{http_code}}'"
+        if params and method != "GET":
+            curl_cmd += f" --data-binary {shlex.quote(json.dumps(params))}"
+
+        logger.debug(f"Executing browser action via exec: {method} {path}")
+        response = await self._exec(curl_cmd, timeout=timeout)
+        if response.exit_code != 0:
+            raise Exception(f"curl exited with code {response.exit_code}: {response.result}")
+
+        body, _, status = (response.result or "").rpartition("\n")
+        try:
+            return int(status), json.loads(body)
+        except ValueError:
+            return int(status) if status.isdigit() else 500, body[:500]
+
+    async def _call_browser_api(self, endpoint: str, params: Optional[dict] = None, method: str = "POST", query: Optional[dict] = None,
+                                timeout: int = BROWSER_ACTION_TIMEOUT) -> Tuple[int, Any]:
+        """Call the browser automation API, directly when possible and through exec otherwise.
+
+        Args:
+            endpoint: Automation endpoint, e.g. "navigate_to"
+            params: Action parameters, sent as the JSON body (query parameters for GET)
+            method: HTTP method
+            query: Per-action options sent as query parameters, e.g. {"full_render": "true"}
+            timeout: Seconds allowed for the action
+
+        Returns:
+            Tuple of HTTP status and decoded JSON body
+        """
+        await self._ensure_sandbox()
+        path = f"/api/automation/{endpoint}"
+        try:
+            return await sandbox_api_client.request_json(
+                self.sandbox, BROWSER_API_PORT, method, path,
+                params=self._query_params(params, method, query),
+                json_body=params if method != "GET" else None,
+                timeout=timeout
+            )
+        except SandboxApiUnavailable:
+            return await self._execute_browser_action_via_exec(path, params, method, query, timeout)
+        except Exception:
+            # The request may have reached a sandbox that has since stopped
+            self._invalidate_sandbox()
+            raise
+
+    async def _execute_browser_action(self, endpoint: str, params: dict = None, method: str = "POST", query: dict = None) -> ToolResult:
         """Execute a browser automation action through the API
         
         Args:
             endpoint (str): The API endpoint to call
             params (dict, optional): Parameters to send. Defaults to None.
             method (str, optional): HTTP method to use. Defaults to "POST".
+            query (dict, optional): Per-action options sent as query parameters. Defaults to None.
             
         Returns:
             ToolResult: Result of the execution
         """
         try:
-            # Ensure sandbox is initialized
-            await self._ensure_sandbox()
-            
-            # Build the curl command
-            url = f"http://localhost:8003/api/automation/{endpoint}"
-            
-            if method == "GET" and params:
-                query_params = "&".join([f"{k}={v}" for k, v in params.items()])
-                url = f"{url}?{query_params}"
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-            else:
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                if params:
-                    json_data = json.dumps(params)
-                    curl_cmd += f" -d '{json_data}'"
-            
-            logger.debug("\033[95mExecuting curl command:\033[0m")
-            logger.debug(f"{curl_cmd}")
-            
-            response = self.sandbox.process.exec(curl_cmd, timeout=30)
-            
-            if response.exit_code == 0:
+            status, result = await self._call_browser_api(endpoint, params, method, query)
+
+            if status >= 400 or not isinstance(result, dict):
+                detail = result.get("detail", result) if isinstance(result, dict) else result
+                logger.error(f"Browser automation request failed ({status}): {detail}")
+                return self.fail_response(f"Browser automation request failed ({status}): {detail}")
+
+            if not "content" in result:
+                result["content"] = ""
+
+            if not "role" in result:
+                result["role"] = "assistant"
+
+            logger.info("Browser automation request completed successfully")
+            self._last_screenshot_hash = result.get("screenshot_hash")
+
+            screenshot_hash = result.get("screenshot_hash")
+            if result.get("screenshot_base64") and screenshot_hash and self._uploaded_screenshot \
+                    and self._uploaded_screenshot[0] == screenshot_hash:
+                # The page looks exactly as after the previous action; reuse its upload
+                result["image_url"] = self._uploaded_screenshot[1]
+                result["screenshot_unchanged"] = True
+                del result["screenshot_base64"]
+                logger.debug(f"Screenshot unchanged, reusing {result['image_url']}")
+            elif "screenshot_base64" in result:
                 try:
-                    result = json.loads(response.result)
-
-                    if not "content" in result:
-                        result["content"] = ""
-                    
-                    if not "role" in result:
-                        result["role"] = "assistant"
-
-                    logger.info("Browser automation request completed successfully")
-
-                    if "screenshot_base64" in result:
-                        try:
-                            image_url = await upload_base64_image(result["screenshot_base64"])
-                            result["image_url"] = image_url
-                            # Remove base64 data from result to keep it clean
-                            del result["screenshot_base64"]
-                            logger.debug(f"Uploaded screenshot to {image_url}")
-                        except Exception as e:
-                            logger.error(f"Failed to upload screenshot: {e}")
-                            result["image_upload_error"] = str(e)
-
-                    added_message = await self.thread_manager.add_message(
-                        thread_id=self.thread_id,
-                        type="browser_state",
-                        content=result,
-                        is_llm_message=False
-                    )
-
-                    success_response = {
-                        "success": True,
-                        "message": result.get("message", "Browser action completed successfully")
-                    }
+                    image_url = await upload_base64_image(result["screenshot_base64"], content_type=result.get("screenshot_format"))
+                    result["image_url"] = image_url
+                    # Remove base64 data from result to keep it clean
+                    del result["screenshot_base64"]
+                    if screenshot_hash:
+                        self._uploaded_screenshot = (screenshot_hash, image_url)
+                    logger.debug(f"Uploaded screenshot to {image_url}")
+                except Exception as e:
+                    logger.error(f"Failed to upload screenshot: {e}")
+                    result["image_upload_error"] = str(e)
+
+            # Only the latest state is read back, so it lives in Redis; a sample is archived as messages
+            stored = await thread_state.set(self.thread_id, "browser_state", result)
+            added_message = None
+            if not stored or random.randrange(100) < config.BROWSER_STATE_ARCHIVE_PERCENT:
+                added_message = await self.thread_manager.add_message(
+                    thread_id=self.thread_id,
+                    type="browser_state",
+                    content=result,
+                    is_llm_message=False
+                )
+
+            success_response = {
+                "success": True,
+                "message": result.get("message", "Browser action completed successfully")
+            }
+
+            if added_message and 'message_id' in added_message:
+                success_response['message_id'] = added_message['message_id']
+            if result.get("url"):
+                success_response["url"] = result["url"]
+            if result.get("title"):
+                success_response["title"] = result["title"]
+            if result.get("element_count"):
+                success_response["elements_found"] = result["element_count"]
+            if result.get("pixels_below"):
+                success_response["scrollable_content"] = result["pixels_below"] > 0
+            if result.get("ocr_text"):
+                success_response["ocr_text"] = result["ocr_text"]
+            if result.get("image_url"):
+                success_response["image_url"] = result["image_url"]
 
-                    if added_message and 'message_id' in added_message:
-                        success_response['message_id'] = added_message['message_id']
-                    if result.get("url"):
-                        success_response["url"] = result["url"]
-                    if result.get("title"):
-                        success_response["title"] = result["title"]
-                    if result.get("element_count"):
-                        success_response["elements_found"] = result["element_count"]
-                    if result.get("pixels_below"):
-                        success_response["scrollable_content"] = result["pixels_below"] > 0
-                    if result.get("ocr_text"):
-                        success_response["ocr_text"] = result["ocr_text"]
-                    if result.get("image_url"):
-                        success_response["image_url"] = result["image_url"]
-
-                    return self.success_response(success_response)
-
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse response JSON: {response.result} {e}")
-                    return self.fail_response(f"Failed to parse response JSON: {response.result} {e}")
-            else:
-                logger.error(f"Browser automation request failed 2: {response}")
-                return self.fail_response(f"Browser automation request failed 2: {response}")
+            return self.success_response(success_response)
 
         except Exception as e:
             logger.error(f"Error executing browser action: {e}")
@@ -124,6 +204,11 @@ class SandboxBrowserTool(SandboxToolsBase):
                     "url": {
                         "type": "string",
                         "description": "The url to navigate to"
+                    },
+                    "full_render": {
+                        "type": "boolean",
+                        "description": "Load every resource (fonts, video, ads) instead of the faster text-focused profile. Use only when the screenshot must look exactly like the real page.",
+                        "default": False
                     }
                 },
                 "required": ["url"]
@@ -133,7 +218,8 @@ class SandboxBrowserTool(SandboxToolsBase):
     @xml_schema(
         tag_name="browser-navigate-to",
         mappings=[
-            {"param_name": "url", "node_type": "content", "path": "."}
+            {"param_name": "url", "node_type": "content", "path": "."},
+            {"param_name": "full_render", "node_type": "attribute", "path": ".", "required": False}
         ],
         example='''
         <function_calls>
@@ -143,16 +229,20 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
-    async def browser_navigate_to(self, url: str) -> ToolResult:
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
+    async def browser_navigate_to(self, url: str, full_render: bool = False) -> ToolResult:
         """Navigate to a specific url
         
         Args:
             url (str): The url to navigate to
+            full_render (bool): Load every resource, bypassing the sandbox's request blocking
             
         Returns:
             dict: Result of the execution
         """
-        return await self._execute_browser_action("navigate_to", {"url": url})
+        query = {"full_render": "true"} if str(full_render).lower() == "true" else None
+        return await self._execute_browser_action("navigate_to", {"url": url}, query=query)
 
     # @openapi_schema({
     #     "type": "function",
@@ -215,6 +305,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_go_back(self) -> ToolResult:
         """Navigate back in browser history
         
@@ -253,6 +345,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_wait(self, seconds: int = 3) -> ToolResult:
         """Wait for the specified number of seconds
         
@@ -295,6 +389,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_click_element(self, index: int) -> ToolResult:
         """Click on an element by index
         
@@ -343,6 +439,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_input_text(self, index: int, text: str) -> ToolResult:
         """Input text into an element
         
@@ -386,6 +484,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_send_keys(self, keys: str) -> ToolResult:
         """Send keyboard keys
         
@@ -428,6 +528,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_switch_tab(self, page_id: int) -> ToolResult:
         """Switch to a different browser tab
         
@@ -510,6 +612,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_close_tab(self, page_id: int) -> ToolResult:
         """Close a browser tab
         
@@ -610,6 +714,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_scroll_down(self, amount: int = None) -> ToolResult:
         """Scroll down the page
         
@@ -657,6 +763,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_scroll_up(self, amount: int = None) -> ToolResult:
         """Scroll up the page
         
@@ -705,6 +813,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_scroll_to_text(self, text: str) -> ToolResult:
         """Scroll to specific text on the page
         
@@ -747,6 +857,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_get_dropdown_options(self, index: int) -> ToolResult:
         """Get all options from a dropdown element
         
@@ -795,6 +907,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_select_dropdown_option(self, index: int, text: str) -> ToolResult:
         """Select an option from a dropdown by text
         
@@ -863,6 +977,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_drag_drop(self, element_source: str = None, element_target: str = None, 
                                coord_source_x: int = None, coord_source_y: int = None,
                                coord_target_x: int = None, coord_target_y: int = None) -> ToolResult:
@@ -932,6 +1048,8 @@ class SandboxBrowserTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(writes=["browser"])
     async def browser_click_coordinates(self, x: int, y: int) -> ToolResult:
         """Click at specific X,Y coordinates on the page
         
@@ -943,4 +1061,222 @@ class SandboxBrowserTool(SandboxToolsBase):
             dict: Result of the execution
         """
         logger.debug(f"\033[95mClicking at coordinates: ({x}, {y})\033[0m")
-        return await self._execute_browser_action("click_coordinates", {"x": x, "y": y})
\ No newline at end of file
+        return await self._execute_browser_action("click_coordinates", {"x": x, "y": y})
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "browser_read_page",
+            "description": "Read the main content of the current browser page as markdown (headings, paragraphs, lists, tables and links, without navigation and ads). Long pages are split into chunks; read further chunks with the chunk parameter. Much cheaper than scrolling and taking screenshots to read text.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "chunk": {
+                        "type": "integer",
+                        "description": "1-based chunk to read; the result reports total_chunks",
+                        "default": 1
+                    },
+                    "page_id": {
+                        "type": "string",
+                        "description": "Page kept open by browser_open_many to read instead of the current tab, e.g. \"research:2\""
+                    }
+                }
+            }
+        }
+    })
+    @xml_schema(
+        tag_name="browser-read-page",
+        mappings=[
+            {"param_name": "chunk", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "page_id", "node_type": "attribute", "path": ".", "required": False}
+        ],
+        example='''
+        <function_calls>
+        <invoke name="browser_read_page">
+        <parameter name="chunk">1</parameter>
+        </invoke>
+        </function_calls>
+        '''
+    )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(reads=["browser"])
+    async def browser_read_page(self, chunk: int = 1, page_id: Optional[str] = None) -> ToolResult:
+        """Read a chunk of the current page as markdown, extracted and cached in the sandbox
+        
+        Args:
+            chunk (int): 1-based chunk to read
+            page_id (str, optional): Page kept open by browser_open_many to read instead of the current tab
+            
+        Returns:
+            dict: Result of the execution
+        """
+        try:
+            status, result = await self._call_browser_api(
+                "read_page", {"chunk": int(chunk or 1), "chunk_chars": PAGE_CHUNK_CHARS},
+                query={"page_id": page_id} if page_id else None
+            )
+            if status >= 400 or not isinstance(result, dict) or not result.get("success"):
+                detail = result.get("error", result) if isinstance(result, dict) else result
+                return self.fail_response(f"Reading page failed ({status}): {detail}")
+
+            logger.debug(f"Read chunk {result.get('chunk')}/{result.get('total_chunks')} of {result.get('url')}: cached={result.get('cached')}")
+            return self.success_response({
+                "url": result.get("url"),
+                "title": result.get("title"),
+                "chunk": result.get("chunk"),
+                "total_chunks": result.get("total_chunks"),
+                "content": result.get("content", "")
+            })
+        except Exception as e:
+            logger.error(f"Error reading page: {e}")
+            return self.fail_response(f"Error reading page: {e}")
+
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "browser_open_many",
+            "description": f"Open several URLs at once in parallel, in a separate browser context that does not disturb the current tab, and return the title and the beginning of each page's main content as markdown. Use it to research or compare multiple pages instead of navigating to them one by one. At most {OPEN_MANY_MAX_URLS} URLs per call. Set keep_open to keep the pages open; each result then has a page_id that browser_read_page accepts to read further chunks.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "urls": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "URLs to open"
+                    },
+                    "keep_open": {
+                        "type": "boolean",
+                        "description": "Keep the pages open so further chunks can be read with browser_read_page and page_id",
+                        "default": False
+                    },
+                    "context_id": {
+                        "type": "string",
+                        "description": "Name of the browser context to open the pages in; calls with the same name share cookies and kept pages"
+                    }
+                },
+                "required": ["urls"]
+            }
+        }
+    })
+    @xml_schema(
+        tag_name="browser-open-many",
+        mappings=[
+            {"param_name": "urls", "node_type": "content", "path": ".", "required": True},
+            {"param_name": "keep_open", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "context_id", "node_type": "attribute", "path": ".", "required": False}
+        ],
+        example='''
+        <function_calls>
+        <invoke name="browser_open_many">
+        <parameter name="urls">["https://example.com/pricing", "https://example.org/pricing"]</parameter>
+        </invoke>
+        </function_calls>
+        '''
+    )
+    @execution_limits(timeout=OPEN_MANY_TIMEOUT + 30, max_concurrency=1)
+    @tool_resources(reads=["browser"])
+    async def browser_open_many(self, urls: Any, keep_open: bool = False, context_id: Optional[str] = None) -> ToolResult:
+        """Load several URLs concurrently in an isolated browser context and return per-page content
+        
+        Args:
+            urls (list or str): URLs to open, as a list, a JSON array or a comma/newline separated string
+            keep_open (bool): Keep the pages open for browser_read_page
+            context_id (str, optional): Browser context to open the pages in
+            
+        Returns:
+            dict: Result of the execution
+        """
+        try:
+            if isinstance(urls, str):
+                try:
+                    urls = json.loads(urls)
+                except json.JSONDecodeError:
+                    urls = urls.replace(",", "\n").splitlines()
+            if isinstance(urls, str):
+                urls = [urls]
+            urls = [str(url).strip() for url in urls if str(url).strip()]
+            if not urls:
+                return self.fail_response("No URLs given")
+            if len(urls) > OPEN_MANY_MAX_URLS:
+                return self.fail_response(f"At most {OPEN_MANY_MAX_URLS} URLs can be opened at once, got {len(urls)}")
+            if isinstance(keep_open, str):
+                keep_open = keep_open.lower() == "true"
+
+            params = {
+                "urls": urls,
+                "keep_open": bool(keep_open),
+                "max_concurrency": OPEN_MANY_CONCURRENCY,
+                "chunk_chars": OPEN_MANY_CHUNK_CHARS,
+                "timeout_ms": OPEN_MANY_DEADLINE * 1000
+            }
+            if context_id:
+                params["context_id"] = context_id
+            status, result = await self._call_browser_api("open_many", params, timeout=OPEN_MANY_TIMEOUT)
+            if status >= 400 or not isinstance(result, dict) or not result.get("results"):
+                detail = result.get("error", result) if isinstance(result, dict) else result
+                return self.fail_response(f"Opening pages failed ({status}): {detail}")
+
+            pages = []
+            for page in result["results"]:
+                if page.get("success"):
+                    pages.append({key: page.get(key) for key in ("url", "final_url", "title", "page_id", "total_chunks", "content") if page.get(key) is not None})
+                else:
+                    pages.append({"url": page.get("url"), "error": page.get("error")})
+            loaded = sum(1 for page in result["results"] if page.get("success"))
+            logger.debug(f"Opened {loaded}/{len(urls)} pages in context {result.get('context_id')}: timings={result.get('timings')}")
+            if not loaded:
+                return self.fail_response(f"None of the pages could be opened: {json.dumps(pages)}")
+            message = f"Opened {loaded} of {len(urls)} pages"
+            if result.get("deadline_reached"):
+                message += f"; the others did not load within {OPEN_MANY_DEADLINE}s"
+            return self.success_response({
+                "message": message,
+                "pages": pages
+            })
+        except Exception as e:
+            logger.error(f"Error opening pages: {e}")
+            return self.fail_response(f"Error opening pages: {e}")
+
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "browser_get_screen_text",
+            "description": "Read the visible text of the current browser page from its latest screenshot using OCR. Use it only when the text is not available from the page elements, e.g. text rendered in images, canvases or PDFs viewed in the browser.",
+            "parameters": {
+                "type": "object",
+                "properties": {}
+            }
+        }
+    })
+    @xml_schema(
+        tag_name="browser-get-screen-text",
+        mappings=[],
+        example='''
+        <function_calls>
+        <invoke name="browser_get_screen_text">
+        </invoke>
+        </function_calls>
+        '''
+    )
+    @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+    @tool_resources(reads=["browser"])
+    async def browser_get_screen_text(self) -> ToolResult:
+        """Read the text of the latest screenshot with OCR, computed in the sandbox on demand
+        
+        Returns:
+            dict: Result of the execution
+        """
+        try:
+            status, result = await self._call_browser_api("ocr", {"screenshot_hash": self._last_screenshot_hash})
+            if status >= 400 or not isinstance(result, dict) or not result.get("success"):
+                detail = result.get("error", result) if isinstance(result, dict) else result
+                return self.fail_response(f"OCR failed ({status}): {detail}")
+
+            self._last_screenshot_hash = result.get("screenshot_hash") or self._last_screenshot_hash
+            logger.debug(f"OCR of screenshot {self._last_screenshot_hash}: cached={result.get('cached')} timings={result.get('timings')}")
+            return self.success_response({
+                "ocr_text": result.get("ocr_text", ""),
+                "cached": result.get("cached", False)
+            })
+        except Exception as e:
+            logger.error(f"Error reading screen text: {e}")
+            return self.fail_response(f"Error reading screen text: {e}")
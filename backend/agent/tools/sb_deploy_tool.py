@@ -1,7 +1,9 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources, execution_limits
 from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
 from utils.files_utils import clean_path
 from agentpress.thread_manager import ThreadManager
 
@@ -11,8 +13,8 @@ load_dotenv()
 class SandboxDeployTool(SandboxToolsBase):
     """Tool for deploying static websites from a Daytona sandbox to Cloudflare Pages."""
 
-    def __init__(self, project_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         self.workspace_path = "/workspace"  # Ensure we're always operating in /workspace
         self.cloudflare_api_token = os.getenv("CLOUDFLARE_API_TOKEN")
 
@@ -64,6 +66,8 @@ class SandboxDeployTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=600)
+    @tool_resources(reads=["file:{directory_path}"])
     async def deploy(self, name: str, directory_path: str) -> ToolResult:
         """
         Deploy a static website (HTML+CSS+JS) from the sandbox to Cloudflare Pages.
@@ -87,7 +91,7 @@ class SandboxDeployTool(SandboxToolsBase):
             
             # Verify the directory exists
             try:
-                dir_info = self.sandbox.fs.get_file_info(full_path)
+                dir_info = await self._sandbox_call(self.sandbox.fs.get_file_info, full_path, invalidate=False)
                 if not dir_info.is_dir:
                     return self.fail_response(f"'{directory_path}' is not a directory")
             except Exception as e:
@@ -107,8 +111,7 @@ class SandboxDeployTool(SandboxToolsBase):
                     npx wrangler pages deploy {full_path} --project-name {project_name}))'''
 
                 # Execute the command directly using the sandbox's process.exec method
-                response = self.sandbox.process.exec(f"/bin/sh -c \"{deploy_cmd}\"",
-                                 timeout=300)
+                response = await self._exec(f"/bin/sh -c \"{deploy_cmd}\"", timeout=300)
                 
                 print(f"Deployment command output: {response.result}")
                 
@@ -1,12 +1,14 @@
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
+from typing import Optional
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources
 from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
 from agentpress.thread_manager import ThreadManager
 
 class SandboxExposeTool(SandboxToolsBase):
     """Tool for exposing and retrieving preview URLs for sandbox ports."""
 
-    def __init__(self, project_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
 
     @openapi_schema({
         "type": "function",
@@ -55,6 +57,7 @@ class SandboxExposeTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["port:{port}"])
     async def expose_port(self, port: int) -> ToolResult:
         try:
             # Ensure sandbox is initialized
@@ -68,7 +71,7 @@ class SandboxExposeTool(SandboxToolsBase):
                 return self.fail_response(f"Invalid port number: {port}. Must be between 1 and 65535.")
 
             # Get the preview link for the specified port
-            preview_link = self.sandbox.get_preview_link(port)
+            preview_link = await self._sandbox_call(self.sandbox.get_preview_link, port)
             
             # Extract the actual URL from the preview link object
             url = preview_link.url if hasattr(preview_link, 'url') else str(preview_link)
@@ -1,17 +1,37 @@
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources
 from sandbox.tool_base import SandboxToolsBase    
-from utils.files_utils import should_exclude_file, clean_path
+from sandbox.resolver import SandboxResolver
+from utils.files_utils import should_exclude_file, clean_path, EXCLUDED_FILES, EXCLUDED_DIRS, EXCLUDED_EXT
 from agentpress.thread_manager import ThreadManager
 from utils.logger import logger
+from typing import Optional, Dict, Any, List
+import asyncio
+import shlex
+import json
 import os
 
+# Edit endpoint of the sandbox API server (see sandbox/docker/file_edit_api.py)
+FILE_EDIT_API_URL = "http://localhost:8003/api/files/edit"
+# A shell argument is capped at 128KB; larger edits use the fs API instead
+MAX_EDIT_COMMAND_BYTES = 96 * 1024
+# In-sandbox helper listing workspace metadata (see sandbox/docker/workspace_snapshot.py)
+WORKSPACE_SNAPSHOT_HELPER = "/app/workspace_snapshot.py"
+# Only text files up to this size have their content included in a snapshot
+SNAPSHOT_MAX_CONTENT_BYTES = 256 * 1024
+# Maximum files listed per snapshot
+SNAPSHOT_MAX_FILES = 10000
+# Maximum concurrent downloads while fetching changed files
+SNAPSHOT_CONCURRENCY = 8
+
 class SandboxFilesTool(SandboxToolsBase):
     """Tool for executing file system operations in a Daytona sandbox. All operations are performed relative to the /workspace directory."""
 
-    def __init__(self, project_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         self.SNIPPET_LINES = 4  # Number of context lines to show around edits
         self.workspace_path = "/workspace"  # Ensure we're always operating in /workspace
+        self._snapshot_cache: Dict[str, Dict[str, Any]] = {}  # Maps paths to their last snapshot entry
+        self._snapshot_known: Dict[str, List[Any]] = {}  # Maps paths to [size, mtime, hash, is_text] from the last walk
 
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace"""
@@ -21,47 +41,167 @@ class SandboxFilesTool(SandboxToolsBase):
         """Check if a file should be excluded based on path, name, or extension"""
         return should_exclude_file(rel_path)
 
-    def _file_exists(self, path: str) -> bool:
+    async def _file_exists(self, path: str) -> bool:
         """Check if a file exists in the sandbox"""
         try:
-            self.sandbox.fs.get_file_info(path)
+            await self._sandbox_call(self.sandbox.fs.get_file_info, path, invalidate=False)
             return True
         except Exception:
             return False
 
+    async def _edit_file(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a file edit in the sandbox in a single round trip.
+
+        The request is sent to the sandbox's edit endpoint, which applies it
+        atomically. The endpoint's token is the sandbox's VNC_PASSWORD, expanded
+        by the sandbox shell so it never appears in the command. Sandboxes whose
+        image predates the endpoint, requests the endpoint rejects, and requests
+        too large to send through exec go through the filesystem API instead.
+
+        Args:
+            request: Edit request ("op", "path" relative to /workspace, and the
+                op's "content", "hunks", "permissions" or "overwrite")
+
+        Returns:
+            Response with "success", plus "error" and "message" on failure
+        """
+        command = (
+            f"curl -s -X POST {FILE_EDIT_API_URL} -H 'Content-Type: application/json' "
+            f"-H \"X-Sandbox-Token: $VNC_PASSWORD\" "
+            f"--data-binary {shlex.quote(json.dumps(request))}"
+        )
+        if len(command.encode('utf-8')) <= MAX_EDIT_COMMAND_BYTES:
+            try:
+                response = await self._exec(command, timeout=60)
+                result = json.loads(response.result) if response.exit_code == 0 else None
+                if isinstance(result, dict) and "success" in result:
+                    return result
+                logger.debug(f"File edit endpoint unavailable (exit code {response.exit_code}), using the fs API")
+            except json.JSONDecodeError:
+                logger.debug("File edit endpoint returned no JSON, using the fs API")
+
+        return await self._edit_file_via_fs(request)
+
+    async def _edit_file_via_fs(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a file edit with the sandbox filesystem API (several round trips)."""
+        path = request["path"]
+        full_path = f"{self.workspace_path}/{path}"
+        exists = await self._file_exists(full_path)
+
+        if request["op"] == "create":
+            if exists and not request.get("overwrite"):
+                return {"success": False, "error": "exists", "message": f"File '{path}' already exists"}
+            parent_dir = '/'.join(full_path.split('/')[:-1])
+            if parent_dir:
+                await self._sandbox_call(self.sandbox.fs.create_folder, parent_dir, "755")
+            await self._sandbox_call(self.sandbox.fs.upload_file, request.get("content", "").encode(), full_path)
+            await self._sandbox_call(self.sandbox.fs.set_file_permissions, full_path, request.get("permissions") or "644")
+            return {"success": True, "created": not exists}
+
+        if not exists:
+            return {"success": False, "error": "not_found", "message": f"File '{path}' does not exist"}
+
+        if request["op"] == "rewrite":
+            await self._sandbox_call(self.sandbox.fs.upload_file, request.get("content", "").encode(), full_path)
+            if request.get("permissions"):
+                await self._sandbox_call(self.sandbox.fs.set_file_permissions, full_path, request["permissions"])
+            return {"success": True}
+
+        if request["op"] == "patch":
+            content = (await self._sandbox_call(self.sandbox.fs.download_file, full_path)).decode()
+            for hunk in request.get("hunks", []):
+                occurrences = content.count(hunk["old_str"])
+                if occurrences == 0:
+                    return {"success": False, "error": "no_match", "message": f"String '{hunk['old_str']}' not found in file"}
+                if occurrences > 1:
+                    lines = [i+1 for i, line in enumerate(content.split('\n')) if hunk["old_str"] in line]
+                    return {
+                        "success": False, "error": "multiple_matches", "lines": lines,
+                        "message": f"Multiple occurrences found in lines {lines}. Please ensure string is unique"
+                    }
+                content = content.replace(hunk["old_str"], hunk["new_str"])
+            await self._sandbox_call(self.sandbox.fs.upload_file, content.encode(), full_path)
+            return {"success": True, "hunks_applied": len(request.get("hunks", []))}
+
+        return {"success": False, "error": "invalid", "message": f"Unknown operation '{request['op']}'"}
+
     async def get_workspace_state(self) -> dict:
-        """Get the current workspace state by reading all files"""
-        files_state = {}
+        """Get a snapshot of the workspace files.
+
+        One in-sandbox walk lists the path, size, mtime and hash of every file,
+        honouring .gitignore and the excluded files and directories; only files
+        whose size or mtime changed since the previous walk are hashed. Content is
+        downloaded, a few files at a time, only for small text files whose size
+        or mtime changed since the previous snapshot; unchanged files reuse the
+        cached content.
+
+        Returns:
+            Dict mapping paths relative to /workspace to "content" (None for
+            binary or large files), "is_dir", "size", "modified" and "hash"
+        """
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
-            files = self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
-                rel_path = file_info.name
-                
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
+            snapshot = await self._run_helper(WORKSPACE_SNAPSHOT_HELPER, {
+                "root": self.workspace_path,
+                "excluded_dirs": sorted(EXCLUDED_DIRS),
+                "excluded_files": sorted(EXCLUDED_FILES),
+                "excluded_ext": sorted(EXCLUDED_EXT),
+                "max_files": SNAPSHOT_MAX_FILES,
+                # Files with an unchanged size and mtime are not hashed again
+                "known": self._snapshot_known
+            }, timeout=120)
+            if "files" not in snapshot:
+                raise RuntimeError(snapshot.get("error") or "snapshot helper returned no files")
+            if snapshot.get("truncated"):
+                logger.warning(f"Workspace snapshot truncated at {SNAPSHOT_MAX_FILES} files")
+
+            self._snapshot_known = {
+                info["path"]: [info["size"], info["mtime"], info["hash"], info["is_text"]] for info in snapshot["files"]
+            }
+            changed: List[Dict[str, Any]] = []
+            files_state = {}
+            for info in snapshot["files"]:
+                cached = self._snapshot_cache.get(info["path"])
+                if cached and cached["modified"] == info["mtime"] and cached["size"] == info["size"]:
+                    files_state[info["path"]] = cached
                     continue
+                files_state[info["path"]] = {
+                    "content": None,
+                    "is_dir": False,
+                    "size": info["size"],
+                    "modified": info["mtime"],
+                    "hash": info["hash"]
+                }
+                if info["is_text"] and info["size"] <= SNAPSHOT_MAX_CONTENT_BYTES:
+                    changed.append(info)
 
-                try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = self.sandbox.fs.download_file(full_path).decode()
-                    files_state[rel_path] = {
-                        "content": content,
-                        "is_dir": file_info.is_dir,
-                        "size": file_info.size,
-                        "modified": file_info.mod_time
-                    }
-                except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
-                except UnicodeDecodeError:
-                    print(f"Skipping binary file: {rel_path}")
+            semaphore = asyncio.Semaphore(SNAPSHOT_CONCURRENCY)
+            failed = set()
+
+            async def fetch(info: Dict[str, Any]) -> None:
+                async with semaphore:
+                    try:
+                        content = await self._sandbox_call(
+                            self.sandbox.fs.download_file, f"{self.workspace_path}/{info['path']}", invalidate=False
+                        )
+                        files_state[info["path"]]["content"] = content.decode()
+                    except UnicodeDecodeError:
+                        logger.debug(f"Skipping content of non-UTF-8 file: {info['path']}")
+                    except Exception as e:
+                        failed.add(info["path"])
+                        logger.warning(f"Error reading file {info['path']}: {e}")
 
+            await asyncio.gather(*(fetch(info) for info in changed))
+            logger.debug(f"Workspace snapshot: {len(files_state)} files, {len(changed)} fetched")
+
+            # Files that failed to download are fetched again next time
+            self._snapshot_cache = {path: entry for path, entry in files_state.items() if path not in failed}
             return files_state
         
         except Exception as e:
-            print(f"Error getting workspace state: {str(e)}")
+            logger.error(f"Error getting workspace state: {str(e)}")
             return {}
 
 
@@ -119,31 +259,27 @@ class SandboxFilesTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["file:{file_path}"])
     async def create_file(self, file_path: str, file_contents: str, permissions: str = "644") -> ToolResult:
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
             file_path = self.clean_path(file_path)
-            full_path = f"{self.workspace_path}/{file_path}"
-            if self._file_exists(full_path):
-                return self.fail_response(f"File '{file_path}' already exists. Use update_file to modify existing files.")
-            
-            # Create parent directories if needed
-            parent_dir = '/'.join(full_path.split('/')[:-1])
-            if parent_dir:
-                self.sandbox.fs.create_folder(parent_dir, "755")
-            
-            # Write the file content
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            edit = await self._edit_file({
+                "op": "create", "path": file_path, "content": file_contents, "permissions": permissions
+            })
+            if not edit["success"]:
+                if edit.get("error") == "exists":
+                    return self.fail_response(f"File '{file_path}' already exists. Use update_file to modify existing files.")
+                return self.fail_response(f"Error creating file: {edit.get('message')}")
             
             message = f"File '{file_path}' created successfully."
             
             # Check if index.html was created and add 8080 server info (only in root workspace)
             if file_path.lower() == 'index.html':
                 try:
-                    website_link = self.sandbox.get_preview_link(8080)
+                    website_link = await self._sandbox_call(self.sandbox.get_preview_link, 8080)
                     website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
                     message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
                     message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
@@ -196,36 +332,22 @@ class SandboxFilesTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["file:{file_path}"])
     async def str_replace(self, file_path: str, old_str: str, new_str: str) -> ToolResult:
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
             file_path = self.clean_path(file_path)
-            full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
-                return self.fail_response(f"File '{file_path}' does not exist")
-            
-            content = self.sandbox.fs.download_file(full_path).decode()
             old_str = old_str.expandtabs()
             new_str = new_str.expandtabs()
             
-            occurrences = content.count(old_str)
-            if occurrences == 0:
-                return self.fail_response(f"String '{old_str}' not found in file")
-            if occurrences > 1:
-                lines = [i+1 for i, line in enumerate(content.split('\n')) if old_str in line]
-                return self.fail_response(f"Multiple occurrences found in lines {lines}. Please ensure string is unique")
-            
-            # Perform replacement
-            new_content = content.replace(old_str, new_str)
-            self.sandbox.fs.upload_file(new_content.encode(), full_path)
-            
-            # Show snippet around the edit
-            replacement_line = content.split(old_str)[0].count('\n')
-            start_line = max(0, replacement_line - self.SNIPPET_LINES)
-            end_line = replacement_line + self.SNIPPET_LINES + new_str.count('\n')
-            snippet = '\n'.join(new_content.split('\n')[start_line:end_line + 1])
+            # Only the replaced text travels; the sandbox applies it in place
+            edit = await self._edit_file({
+                "op": "patch", "path": file_path, "hunks": [{"old_str": old_str, "new_str": new_str}]
+            })
+            if not edit["success"]:
+                return self.fail_response(edit.get("message") or f"Error replacing string in '{file_path}'")
             
             # Get preview URL if it's an HTML file
             # preview_url = self._get_preview_url(file_path)
@@ -284,25 +406,27 @@ class SandboxFilesTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["file:{file_path}"])
     async def full_file_rewrite(self, file_path: str, file_contents: str, permissions: str = "644") -> ToolResult:
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
             file_path = self.clean_path(file_path)
-            full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
-                return self.fail_response(f"File '{file_path}' does not exist. Use create_file to create a new file.")
-            
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            edit = await self._edit_file({
+                "op": "rewrite", "path": file_path, "content": file_contents, "permissions": permissions
+            })
+            if not edit["success"]:
+                if edit.get("error") == "not_found":
+                    return self.fail_response(f"File '{file_path}' does not exist. Use create_file to create a new file.")
+                return self.fail_response(f"Error rewriting file: {edit.get('message')}")
             
             message = f"File '{file_path}' completely rewritten successfully."
             
             # Check if index.html was rewritten and add 8080 server info (only in root workspace)
             if file_path.lower() == 'index.html':
                 try:
-                    website_link = self.sandbox.get_preview_link(8080)
+                    website_link = await self._sandbox_call(self.sandbox.get_preview_link, 8080)
                     website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
                     message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
                     message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
@@ -343,6 +467,7 @@ class SandboxFilesTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["file:{file_path}"])
     async def delete_file(self, file_path: str) -> ToolResult:
         try:
             # Ensure sandbox is initialized
@@ -350,10 +475,10 @@ class SandboxFilesTool(SandboxToolsBase):
             
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
+            if not await self._file_exists(full_path):
                 return self.fail_response(f"File '{file_path}' does not exist")
             
-            self.sandbox.fs.delete_file(full_path)
+            await self._sandbox_call(self.sandbox.fs.delete_file, full_path)
             return self.success_response(f"File '{file_path}' deleted successfully.")
         except Exception as e:
             return self.fail_response(f"Error deleting file: {str(e)}")
@@ -0,0 +1,282 @@
+from typing import Optional, Dict, Any, List
+import json
+import shlex
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources, execution_limits
+from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
+from agentpress.thread_manager import ThreadManager
+from utils.logger import logger
+
+# Raw ripgrep JSON read from the sandbox; its events are much larger than the text they carry
+MAX_RAW_OUTPUT_BYTES = 2 * 1024 * 1024
+# Files larger than this are not searched
+MAX_FILESIZE = "10M"
+# Maximum bytes of matched and context text returned to the model
+MAX_RESULT_BYTES = 20000
+# Longest line text returned; longer lines are cut
+MAX_LINE_CHARS = 500
+# Marker printed when the sandbox has no ripgrep binary
+RG_MISSING_MARKER = "__RG_MISSING__"
+
+class SandboxSearchTool(SandboxToolsBase):
+    """Tool for searching file contents in the sandbox workspace with ripgrep.
+    Returns matching lines with their file, line number and optional context, so only the relevant lines of large files reach the model."""
+
+    def __init__(self, project_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
+        self.workspace_path = "/workspace"  # Ensure we're always operating in /workspace
+
+    @staticmethod
+    def _as_text(value: Any) -> Optional[str]:
+        """Restore a string argument the XML parser turned into a number or boolean."""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    @staticmethod
+    def _as_flag(value: Any) -> Optional[bool]:
+        """Parse a boolean argument given as a bool, number or string; None when unset."""
+        if value is None or isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in ("", "none", "null", "auto"):
+            return None
+        return text in ("true", "1", "yes", "y")
+
+    def _build_command(
+        self,
+        pattern: str,
+        path: str,
+        glob: Optional[str],
+        file_type: Optional[str],
+        context_lines: int,
+        max_count: int,
+        case_sensitive: Optional[bool],
+        fixed_strings: bool
+    ) -> str:
+        """Build the ripgrep command line run from the workspace root."""
+        args = [
+            "rg", "--json", "--max-count", str(max_count), "--max-filesize", MAX_FILESIZE,
+            "--max-columns", str(MAX_LINE_CHARS), "--max-columns-preview"
+        ]
+        if context_lines > 0:
+            args += ["--context", str(context_lines)]
+        for pattern_glob in (glob or "").split(","):
+            if pattern_glob.strip():
+                args += ["--glob", pattern_glob.strip()]
+        if file_type:
+            args += ["--type", file_type]
+        if fixed_strings:
+            args.append("--fixed-strings")
+        if case_sensitive is None:
+            args.append("--smart-case")
+        else:
+            args.append("--case-sensitive" if case_sensitive else "--ignore-case")
+        args += ["-e", pattern, "--", path or "."]
+
+        rg = " ".join(shlex.quote(arg) for arg in args)
+        return (
+            f"cd {shlex.quote(self.workspace_path)} && "
+            f"if command -v rg >/dev/null 2>&1; then {rg} 2>&1 | head -c {MAX_RAW_OUTPUT_BYTES}; "
+            f"else echo {RG_MISSING_MARKER}; fi"
+        )
+
+    @staticmethod
+    def _event_text(data: Dict[str, Any]) -> str:
+        lines = data.get("lines", {})
+        text = lines.get("text")
+        if text is None:
+            return "<non-UTF-8 line>"
+        return text.rstrip("\n")[:MAX_LINE_CHARS]
+
+    def _parse_matches(self, output: str, max_results: int) -> Dict[str, Any]:
+        """Group ripgrep JSON events into per-file matches within the result caps."""
+        files: List[Dict[str, Any]] = []
+        by_path: Dict[str, Dict[str, Any]] = {}
+        errors: List[str] = []
+        match_count = 0
+        used_bytes = 0
+        truncated = False
+
+        raw_lines = output.splitlines()
+        for number, raw in enumerate(raw_lines):
+            try:
+                event = json.loads(raw)
+            except json.JSONDecodeError:
+                if number == len(raw_lines) - 1 and len(output.encode("utf-8")) >= MAX_RAW_OUTPUT_BYTES:
+                    # The raw output cap cut the last event
+                    truncated = True
+                elif raw.strip():
+                    errors.append(raw.strip())
+                continue
+            if event.get("type") not in ("match", "context"):
+                continue
+
+            data = event["data"]
+            is_match = event["type"] == "match"
+            if is_match and match_count >= max_results:
+                truncated = True
+                break
+
+            path = data.get("path", {}).get("text", "<non-UTF-8 path>")
+            text = self._event_text(data)
+            used_bytes += len(text.encode("utf-8")) + len(path) + 16
+            if used_bytes > MAX_RESULT_BYTES:
+                truncated = True
+                break
+
+            entry = by_path.get(path)
+            if entry is None:
+                entry = {"path": path, "matches": 0, "lines": []}
+                by_path[path] = entry
+                files.append(entry)
+            line = {"line": data.get("line_number"), "text": text}
+            if is_match:
+                line["match"] = True
+                entry["matches"] += 1
+                match_count += 1
+            entry["lines"].append(line)
+
+        # Drop files that only contributed context before a cap was hit
+        files = [entry for entry in files if entry["matches"]]
+        result = {"match_count": match_count, "file_count": len(files), "truncated": truncated, "files": files}
+        if errors:
+            result["errors"] = errors[:5]
+        return result
+
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "search_files",
+            "description": "Search file contents in the workspace with ripgrep and return the matching lines with file paths and line numbers. Much faster and cheaper than reading whole files or running grep in a shell: use it to locate definitions, usages, config keys or error messages before opening files. Respects .gitignore and skips binary files.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pattern": {
+                        "type": "string",
+                        "description": "Regular expression (Rust regex syntax) to search for, or a literal string when fixed_strings is true"
+                    },
+                    "path": {
+                        "type": "string",
+                        "description": "File or directory to search, relative to /workspace. Defaults to the whole workspace.",
+                        "default": "."
+                    },
+                    "glob": {
+                        "type": "string",
+                        "description": "Optional comma-separated globs restricting the searched files, e.g. '*.py' or 'src/**/*.ts,!*.test.ts'"
+                    },
+                    "file_type": {
+                        "type": "string",
+                        "description": "Optional ripgrep file type, e.g. 'py', 'js', 'ts', 'md'"
+                    },
+                    "context_lines": {
+                        "type": "integer",
+                        "description": "Number of lines of context to show before and after each match",
+                        "default": 0
+                    },
+                    "max_count": {
+                        "type": "integer",
+                        "description": "Maximum number of matches per file",
+                        "default": 20
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of matches returned in total",
+                        "default": 100
+                    },
+                    "case_sensitive": {
+                        "type": "boolean",
+                        "description": "Force case-sensitive (true) or case-insensitive (false) matching. By default the search is case-insensitive unless the pattern contains uppercase letters."
+                    },
+                    "fixed_strings": {
+                        "type": "boolean",
+                        "description": "Treat the pattern as a literal string instead of a regular expression",
+                        "default": False
+                    }
+                },
+                "required": ["pattern"]
+            }
+        }
+    })
+    @xml_schema(
+        tag_name="search-files",
+        mappings=[
+            {"param_name": "pattern", "node_type": "content", "path": "."},
+            {"param_name": "path", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "glob", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "file_type", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "context_lines", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "max_count", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "max_results", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "case_sensitive", "node_type": "attribute", "path": ".", "required": False},
+            {"param_name": "fixed_strings", "node_type": "attribute", "path": ".", "required": False}
+        ],
+        example='''
+        <!-- Example 1: Find a function definition in Python files -->
+        <function_calls>
+        <invoke name="search_files">
+        <parameter name="pattern">def process_payment</parameter>
+        <parameter name="file_type">py</parameter>
+        </invoke>
+        </function_calls>
+
+        <!-- Example 2: Find usages of a config key under src/ with 2 lines of context -->
+        <function_calls>
+        <invoke name="search_files">
+        <parameter name="pattern">API_BASE_URL</parameter>
+        <parameter name="path">src</parameter>
+        <parameter name="glob">*.ts,*.tsx</parameter>
+        <parameter name="context_lines">2</parameter>
+        </invoke>
+        </function_calls>
+        '''
+    )
+    @execution_limits(timeout=60)
+    @tool_resources(reads=["file:{path}"])
+    async def search_files(
+        self,
+        pattern: str,
+        path: str = ".",
+        glob: Optional[str] = None,
+        file_type: Optional[str] = None,
+        context_lines: int = 0,
+        max_count: int = 20,
+        max_results: int = 100,
+        case_sensitive: Optional[bool] = None,
+        fixed_strings: bool = False
+    ) -> ToolResult:
+        try:
+            # Ensure sandbox is initialized
+            await self._ensure_sandbox()
+
+            pattern = self._as_text(pattern)
+            if not pattern:
+                return self.fail_response("A search pattern is required.")
+            path = self.clean_path(self._as_text(path) or ".") or "."
+            glob = self._as_text(glob)
+            file_type = self._as_text(file_type)
+            case_sensitive = self._as_flag(case_sensitive)
+            fixed_strings = bool(self._as_flag(fixed_strings))
+            context_lines = max(0, min(int(context_lines or 0), 10))
+            max_count = max(1, int(max_count or 20))
+            max_results = max(1, min(int(max_results or 100), 1000))
+
+            command = self._build_command(
+                pattern, path, glob, file_type, context_lines, max_count, case_sensitive, fixed_strings
+            )
+            response = await self._exec(command, timeout=45)
+            output = response.result or ""
+            if output.strip() == RG_MISSING_MARKER:
+                return self.fail_response("ripgrep is not installed in this sandbox. Use execute_command with grep instead.")
+
+            result = self._parse_matches(output, max_results)
+            if not result["files"] and result.get("errors"):
+                return self.fail_response(f"Search failed: {' '.join(result['errors'])[:500]}")
+
+            logger.debug(f"search_files '{pattern}' in {path}: {result['match_count']} matches in {result['file_count']} files")
+            return self.success_response({"pattern": pattern, "path": path, **result})
+
+        except Exception as e:
+            return self.fail_response(f"Error searching files: {str(e)}")
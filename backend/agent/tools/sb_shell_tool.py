@@ -1,17 +1,46 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, List
+import re
 import time
+import asyncio
+import functools
 from uuid import uuid4
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
-from sandbox.tool_base import SandboxToolsBase
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources, execution_limits
+from agentpress.tool_output_stream import ToolOutputStream
+from sandbox.tool_base import SandboxToolsBase, EXEC_TIMEOUT_MARGIN
+from sandbox.resolver import SandboxResolver
 from agentpress.thread_manager import ThreadManager
+from utils.logger import logger
+
+# In-sandbox helper running batches of tmux operations (see sandbox/docker/tmux_batch.py)
+TMUX_BATCH_HELPER = "/app/tmux_batch.py"
+# Longest single wait exec while long-polling for command completion
+LONG_POLL_SECONDS = 25
+# Wait exec length while output is streamed to the client
+STREAM_POLL_SECONDS = 2
+# Longest time a non-blocking command's output is streamed
+STREAM_MAX_SECONDS = 600
+# Maximum output returned per read; older output beyond this is skipped
+MAX_OUTPUT_BYTES = 50000
+# Terminal control sequences captured by pipe-pane
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07]*\x07|\x1b[()][A-Za-z0-9]|\r')
 
 class SandboxShellTool(SandboxToolsBase):
     """Tool for executing tasks in a Daytona sandbox with browser-use capabilities. 
     Uses sessions for maintaining state between commands and provides comprehensive process management."""
 
-    def __init__(self, project_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(
+        self,
+        project_id: str,
+        thread_manager: ThreadManager,
+        output_stream: Optional[ToolOutputStream] = None,
+        sandbox_resolver: Optional[SandboxResolver] = None
+    ):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         self._sessions: Dict[str, str] = {}  # Maps session names to session IDs
+        self._output_offsets: Dict[str, int] = {}  # Maps tmux sessions to the log offset already returned
+        self._stream_offsets: Dict[str, int] = {}  # Maps tmux sessions to the log offset already streamed
+        self._tail_tasks: Dict[str, asyncio.Task] = {}  # Maps tmux sessions to their output streaming task
+        self.output_stream = output_stream  # Publishes live output to the client when set
         self.workspace_path = "/workspace"  # Ensure we're always operating in /workspace
 
     async def _ensure_session(self, session_name: str = "default") -> str:
@@ -20,7 +49,7 @@ class SandboxShellTool(SandboxToolsBase):
             session_id = str(uuid4())
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.create_session(session_id)
+                await self._sandbox_call(self.sandbox.process.create_session, session_id)
                 self._sessions[session_name] = session_id
             except Exception as e:
                 raise RuntimeError(f"Failed to create session: {str(e)}")
@@ -31,7 +60,7 @@ class SandboxShellTool(SandboxToolsBase):
         if session_name in self._sessions:
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.delete_session(self._sessions[session_name])
+                await self._sandbox_call(self.sandbox.process.delete_session, self._sessions[session_name])
                 del self._sessions[session_name]
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
@@ -107,6 +136,8 @@ class SandboxShellTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=120, timeout_arg="timeout", timeout_grace=60)
+    @tool_resources(writes=["file:", "shell:{session_name}"])
     async def execute_command(
         self, 
         command: str, 
@@ -129,58 +160,64 @@ class SandboxShellTool(SandboxToolsBase):
             if not session_name:
                 session_name = f"session_{str(uuid4())[:8]}"
             
-            # Check if tmux session already exists
-            check_session = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            session_exists = "not_exists" not in check_session.get("output", "")
-            
-            if not session_exists:
-                # Create a new tmux session
-                await self._execute_raw_command(f"tmux new-session -d -s {session_name}")
-                
-            # Ensure we're in the correct directory and send command to tmux
-            full_command = f"cd {cwd} && {command}"
-            wrapped_command = full_command.replace('"', '\\"')  # Escape double quotes
-            
-            # Send command to tmux session
-            await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_command}" Enter')
+            # Create the session, send the command and start waiting in a single exec
+            ops = [
+                {"op": "ensure_session", "session": session_name},
+                {"op": "send", "session": session_name, "command": command, "cwd": cwd}
+            ]
+            streaming = self._streaming_enabled()
+            poll_seconds = STREAM_POLL_SECONDS if streaming else LONG_POLL_SECONDS
+            first_wait = min(max(int(timeout), 1), poll_seconds)
+            if blocking:
+                ops.append({"op": "wait_exit", "session": session_name, "timeout": first_wait})
+            results = self._require_ok(await self._run_batch(ops, timeout=first_wait + 10))
             
             if blocking:
-                # For blocking execution, wait and capture output
-                start_time = time.time()
-                while (time.time() - start_time) < timeout:
-                    # Wait a bit before checking
-                    time.sleep(2)
-                    
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
-                    if "ended" in check_result.get("output", ""):
-                        break
-                        
-                    # Get current output and check for common completion indicators
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    current_output = output_result.get("output", "")
-                    
-                    # Check for prompt indicators that suggest command completion
-                    last_lines = current_output.split('\n')[-3:]
-                    completion_indicators = ['$', '#', '>', 'Done', 'Completed', 'Finished', '✓']
-                    if any(indicator in line for indicator in completion_indicators for line in last_lines):
-                        break
+                # Keep long-polling until the exit marker appears or the timeout is spent,
+                # publishing new output between polls when streaming
+                wait = results[-1]
+                remaining = int(timeout) - first_wait
+                while wait["exit_code"] is None and not wait["ended"] and remaining > 0:
+                    step = min(remaining, poll_seconds)
+                    ops = [{"op": "wait_exit", "session": session_name, "timeout": step}]
+                    if streaming:
+                        ops.append(self._read_op(session_name, offsets=self._stream_offsets))
+                    results = self._require_ok(await self._run_batch(ops, timeout=step + 10))
+                    wait = results[0]
+                    if streaming:
+                        await self._stream_output(session_name, results[1], final=False)
+                    remaining -= step
+                completed = wait["exit_code"] is not None or wait["ended"]
                 
-                # Capture final output
-                output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                final_output = output_result.get("output", "")
+                # Read new output, killing the session after capture if the command finished
+                ops = [self._read_op(session_name)]
+                if completed:
+                    ops.append({"op": "kill", "session": session_name})
+                results = self._require_ok(await self._run_batch(ops))
+                if streaming:
+                    # The call returns here, so its live output ends even if the command keeps running
+                    await self._stream_output(session_name, results[0], final=True)
+                output, truncated = self._consume_output(session_name, results[0])
+                if completed:
+                    self._forget_session(session_name)
                 
-                # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
-                
-                return self.success_response({
-                    "output": final_output,
+                response = {
+                    "output": output,
                     "session_name": session_name,
                     "cwd": cwd,
-                    "completed": True
-                })
+                    "completed": completed
+                }
+                if wait["exit_code"] is not None:
+                    response["exit_code"] = wait["exit_code"]
+                if truncated:
+                    response["output_truncated"] = True
+                if not completed:
+                    response["message"] = f"Command still running after {timeout}s. Use check_command_output to view further output."
+                return self.success_response(response)
             else:
-                # For non-blocking, just return immediately
+                # For non-blocking, stream the output in the background and return immediately
+                if streaming:
+                    self._start_tailing(session_name)
                 return self.success_response({
                     "session_name": session_name,
                     "cwd": cwd,
@@ -192,13 +229,111 @@ class SandboxShellTool(SandboxToolsBase):
             # Attempt to clean up session in case of error
             if session_name:
                 try:
-                    await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                    await self._run_batch([{"op": "kill", "session": session_name}])
+                    self._forget_session(session_name)
                 except:
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
-    async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
-        """Execute a raw command directly in the sandbox."""
+    async def _run_batch(self, ops: List[Dict[str, Any]], timeout: int = 30) -> List[Dict[str, Any]]:
+        """Run a batch of tmux operations with one sandbox exec.
+
+        Returns:
+            One result dict per executed operation (execution stops at the first failure)
+        """
+        data = await self._run_helper(TMUX_BATCH_HELPER, {"ops": ops}, timeout=timeout)
+        if not isinstance(data.get("results"), list):
+            raise RuntimeError(f"Unexpected tmux helper output: {data.get('error') or data}")
+        return data["results"]
+
+    @staticmethod
+    def _require_ok(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Raise if the last operation of a batch failed."""
+        if not results:
+            raise RuntimeError("tmux helper returned no results")
+        if not results[-1].get("ok"):
+            raise RuntimeError(results[-1].get("error") or f"tmux operation '{results[-1].get('op')}' failed")
+        return results
+
+    def _read_op(self, session_name: str, require_session: bool = False, offsets: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Build the operation reading output produced since the last read."""
+        offsets = self._output_offsets if offsets is None else offsets
+        return {
+            "op": "read",
+            "session": session_name,
+            "offset": offsets.get(session_name, 0),
+            "max_bytes": MAX_OUTPUT_BYTES,
+            "require_session": require_session
+        }
+
+    def _consume_output(self, session_name: str, result: Dict[str, Any], offsets: Optional[Dict[str, int]] = None) -> Tuple[str, bool]:
+        """Advance the session's read offset and return cleaned output.
+
+        Returns:
+            Tuple of (output, whether older output was skipped to fit MAX_OUTPUT_BYTES)
+        """
+        offsets = self._output_offsets if offsets is None else offsets
+        if result.get("size") is not None:
+            offsets[session_name] = result["size"]
+        return ANSI_ESCAPE_RE.sub("", result.get("output", "")), bool(result.get("truncated"))
+
+    def _streaming_enabled(self) -> bool:
+        return self.output_stream is not None and not self.output_stream.closed
+
+    async def _stream_output(self, session_name: str, result: Dict[str, Any], final: bool) -> None:
+        """Publish output read for streaming as a tool_output_chunk."""
+        output = ""
+        if result.get("has_log"):
+            output, _ = self._consume_output(session_name, result, offsets=self._stream_offsets)
+        elif not final:
+            return
+        await self.output_stream.publish("execute_command", session_name, output, final=final)
+
+    def _start_tailing(self, session_name: str) -> None:
+        """Stream a non-blocking command's output until it exits."""
+        previous = self._tail_tasks.pop(session_name, None)
+        if previous:
+            previous.cancel()
+        self._tail_tasks[session_name] = asyncio.create_task(self._tail_session(session_name))
+
+    async def _tail_session(self, session_name: str) -> None:
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        finished = False
+        try:
+            while self._streaming_enabled() and time.monotonic() < deadline:
+                results = await self._run_batch([
+                    {"op": "wait_exit", "session": session_name, "timeout": STREAM_POLL_SECONDS},
+                    self._read_op(session_name, offsets=self._stream_offsets)
+                ], timeout=STREAM_POLL_SECONDS + 10)
+                if len(results) < 2 or not results[-1].get("ok"):
+                    break
+                finished = results[0]["exit_code"] is not None or results[0]["ended"]
+                await self._stream_output(session_name, results[1], final=finished)
+                if finished:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Stopped streaming output of tmux session {session_name}: {str(e)}")
+        finally:
+            if self._tail_tasks.get(session_name) is asyncio.current_task():
+                del self._tail_tasks[session_name]
+        if not finished and self._streaming_enabled():
+            # Tailing stopped before the command exited; tell the client this stream ended
+            await self.output_stream.publish("execute_command", session_name, "", final=True)
+
+    def _forget_session(self, session_name: str) -> None:
+        """Drop read offsets and stop streaming for a killed session."""
+        self._output_offsets.pop(session_name, None)
+        self._stream_offsets.pop(session_name, None)
+        tail_task = self._tail_tasks.pop(session_name, None)
+        if tail_task:
+            tail_task.cancel()
+        if self.output_stream:
+            self.output_stream.reset(session_name)
+
+    async def _execute_raw_command(self, command: str, timeout: int = 30) -> Dict[str, Any]:
+        """Execute a raw command directly in the sandbox without blocking the event loop."""
         # Ensure session exists for raw commands
         session_id = await self._ensure_session("raw_commands")
         
@@ -210,13 +345,18 @@ class SandboxShellTool(SandboxToolsBase):
             cwd=self.workspace_path
         )
         
-        response = self.sandbox.process.execute_session_command(
-            session_id=session_id,
-            req=req,
-            timeout=30  # Short timeout for utility commands
+        response = await self._sandbox_call(
+            functools.partial(
+                self.sandbox.process.execute_session_command,
+                session_id=session_id,
+                req=req,
+                timeout=timeout  # Short timeout for utility commands
+            ),
+            timeout=timeout + EXEC_TIMEOUT_MARGIN
         )
         
-        logs = self.sandbox.process.get_session_command_logs(
+        logs = await self._sandbox_call(
+            self.sandbox.process.get_session_command_logs,
             session_id=session_id,
             command_id=response.cmd_id
         )
@@ -230,7 +370,7 @@ class SandboxShellTool(SandboxToolsBase):
         "type": "function",
         "function": {
             "name": "check_command_output",
-            "description": "Check the output of a previously executed command in a tmux session. Use this to monitor the progress or results of non-blocking commands.",
+            "description": "Check the output of a previously executed command in a tmux session. Use this to monitor the progress or results of non-blocking commands. Only output produced since the previous check of the same session is returned.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -270,6 +410,7 @@ class SandboxShellTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["shell:{session_name}"])
     async def check_command_output(
         self,
         session_name: str,
@@ -279,27 +420,30 @@ class SandboxShellTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
-            # Check if session exists
-            check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            if "not_exists" in check_result.get("output", ""):
-                return self.fail_response(f"Tmux session '{session_name}' does not exist.")
-            
-            # Get output from tmux pane
-            output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-            output = output_result.get("output", "")
+            # Read output produced since the last check (and kill the session if requested) in one exec
+            ops = [self._read_op(session_name, require_session=True)]
+            if kill_session:
+                ops.append({"op": "kill", "session": session_name})
+            results = await self._run_batch(ops)
+            if not results[0].get("ok"):
+                return self.fail_response(results[0].get("error") or f"Tmux session '{session_name}' does not exist.")
+            self._require_ok(results)
+            output, truncated = self._consume_output(session_name, results[0])
             
-            # Kill session if requested
             if kill_session:
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                self._forget_session(session_name)
                 termination_status = "Session terminated."
             else:
                 termination_status = "Session still running."
             
-            return self.success_response({
+            response = {
                 "output": output,
                 "session_name": session_name,
                 "status": termination_status
-            })
+            }
+            if truncated:
+                response["output_truncated"] = True
+            return self.success_response(response)
                 
         except Exception as e:
             return self.fail_response(f"Error checking command output: {str(e)}")
@@ -334,6 +478,7 @@ class SandboxShellTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(writes=["shell:{session_name}"])
     async def terminate_command(
         self,
         session_name: str
@@ -342,13 +487,11 @@ class SandboxShellTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
-            # Check if session exists
-            check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            if "not_exists" in check_result.get("output", ""):
-                return self.fail_response(f"Tmux session '{session_name}' does not exist.")
-            
-            # Kill the session
-            await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+            # Kill the session, failing if it does not exist
+            results = await self._run_batch([{"op": "kill", "session": session_name, "require_session": True}])
+            if not results[0].get("ok"):
+                return self.fail_response(results[0].get("error") or f"Tmux session '{session_name}' does not exist.")
+            self._forget_session(session_name)
             
             return self.success_response({
                 "message": f"Tmux session '{session_name}' terminated successfully."
@@ -378,30 +521,21 @@ class SandboxShellTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @tool_resources(reads=["shell:"])
     async def list_commands(self) -> ToolResult:
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
             # List all tmux sessions
-            result = await self._execute_raw_command("tmux list-sessions 2>/dev/null || echo 'No sessions'")
-            output = result.get("output", "")
+            sessions = self._require_ok(await self._run_batch([{"op": "list"}]))[0]["sessions"]
             
-            if "No sessions" in output or not output.strip():
+            if not sessions:
                 return self.success_response({
                     "message": "No active tmux sessions found.",
                     "sessions": []
                 })
             
-            # Parse session list
-            sessions = []
-            for line in output.split('\n'):
-                if line.strip():
-                    parts = line.split(':')
-                    if parts:
-                        session_name = parts[0].strip()
-                        sessions.append(session_name)
-            
             return self.success_response({
                 "message": f"Found {len(sessions)} active sessions.",
                 "sessions": sessions
@@ -412,6 +546,9 @@ class SandboxShellTool(SandboxToolsBase):
 
     async def cleanup(self):
         """Clean up all sessions."""
+        for tail_task in list(self._tail_tasks.values()):
+            tail_task.cancel()
+        self._tail_tasks.clear()
         for session_name in list(self._sessions.keys()):
             await self._cleanup_session(session_name)
         
@@ -5,9 +5,11 @@ from typing import Optional, Tuple
 from io import BytesIO
 from PIL import Image
 
-from agentpress.tool import ToolResult, openapi_schema, xml_schema
+from agentpress.tool import ToolResult, openapi_schema, xml_schema, tool_resources, execution_limits
 from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
 from agentpress.thread_manager import ThreadManager
+from agentpress.thread_state import thread_state
 import json
 
 # Add common image MIME types if mimetypes module is limited
@@ -30,8 +32,8 @@ DEFAULT_PNG_COMPRESS_LEVEL = 6
 class SandboxVisionTool(SandboxToolsBase):
     """Tool for allowing the agent to 'see' images within the sandbox."""
 
-    def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         self.thread_id = thread_id
         # Make thread_manager accessible within the tool instance
         self.thread_manager = thread_manager
@@ -131,8 +133,10 @@ class SandboxVisionTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=60)
+    @tool_resources(reads=["file:{file_path}"])
     async def see_image(self, file_path: str) -> ToolResult:
-        """Reads an image file, compresses it, converts it to base64, and adds it as a temporary message."""
+        """Reads an image file, compresses it, converts it to base64, and puts it in the thread's image slot for the next turn."""
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
@@ -143,7 +147,7 @@ class SandboxVisionTool(SandboxToolsBase):
 
             # Check if file exists and get info
             try:
-                file_info = self.sandbox.fs.get_file_info(full_path)
+                file_info = await self._sandbox_call(self.sandbox.fs.get_file_info, full_path, invalidate=False)
                 if file_info.is_dir:
                     return self.fail_response(f"Path '{cleaned_path}' is a directory, not an image file.")
             except Exception as e:
@@ -155,7 +159,7 @@ class SandboxVisionTool(SandboxToolsBase):
 
             # Read image file content
             try:
-                image_bytes = self.sandbox.fs.download_file(full_path)
+                image_bytes = await self._sandbox_call(self.sandbox.fs.download_file, full_path)
             except Exception as e:
                 return self.fail_response(f"Could not read image file: {cleaned_path}")
 
@@ -190,14 +194,10 @@ class SandboxVisionTool(SandboxToolsBase):
                 "compressed_size": len(compressed_bytes)
             }
 
-            # Add the temporary message using the thread_manager callback
-            # Use a distinct type like 'image_context'
-            await self.thread_manager.add_message(
-                thread_id=self.thread_id,
-                type="image_context", # Use a specific type for this
-                content=image_context_data, # Store the dict directly
-                is_llm_message=False # This is context generated by a tool
-            )
+            # Hand the image to the next LLM call through the thread's ephemeral image list;
+            # run_agent consumes it, so the base64 data never reaches the messages table
+            if not await thread_state.append(self.thread_id, "image_context", image_context_data):
+                return self.fail_response(f"Could not make the image '{cleaned_path}' available, please try again.")
 
             # Inform the agent the image will be available next turn
             return self.success_response(f"Successfully loaded and compressed the image '{cleaned_path}' (reduced from {file_info.size / 1024:.1f}KB to {len(compressed_bytes) / 1024:.1f}KB).")
@@ -1,23 +1,30 @@
 from tavily import AsyncTavilyClient
 import httpx
 from dotenv import load_dotenv
-from agentpress.tool import Tool, ToolResult, openapi_schema, xml_schema
+from agentpress.tool import Tool, ToolResult, ToolCachePolicy, openapi_schema, xml_schema, cache_policy, tool_resources, execution_limits
+from agentpress.tool_result_cache import tool_result_cache
 from utils.config import config
 from sandbox.tool_base import SandboxToolsBase
+from sandbox.resolver import SandboxResolver
 from agentpress.thread_manager import ThreadManager
 import json
 import os
 import datetime
 import asyncio
 import logging
+from typing import Optional
 
 # TODO: add subpages, etc... in filters as sometimes its necessary 
 
+# scrape_webpage writes its results into the sandbox, so only the Firecrawl
+# fetch of each URL is cached, never the tool result itself
+SCRAPE_CACHE_POLICY = ToolCachePolicy(ttl=3600, key_fields=["url"], max_result_bytes=1024 * 1024)
+
 class SandboxWebSearchTool(SandboxToolsBase):
     """Tool for performing web searches using Tavily API and web scraping using Firecrawl."""
 
-    def __init__(self, project_id: str, thread_manager: ThreadManager):
-        super().__init__(project_id, thread_manager)
+    def __init__(self, project_id: str, thread_manager: ThreadManager, sandbox_resolver: Optional[SandboxResolver] = None):
+        super().__init__(project_id, thread_manager, sandbox_resolver)
         # Load environment variables
         load_dotenv()
         # Use API keys from config
@@ -78,6 +85,9 @@ class SandboxWebSearchTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @cache_policy(ttl=3600, key_fields=["query", "num_results"])
+    @execution_limits(timeout=120, max_concurrency=4)
+    @tool_resources()
     async def web_search(
         self, 
         query: str,
@@ -174,6 +184,8 @@ class SandboxWebSearchTool(SandboxToolsBase):
         </function_calls>
         '''
     )
+    @execution_limits(timeout=600, max_concurrency=2)
+    @tool_resources(writes=["file:scrape"])
     async def scrape_webpage(
         self,
         urls: str
@@ -264,6 +276,84 @@ class SandboxWebSearchTool(SandboxToolsBase):
             logging.error(f"Error in scrape_webpage: {error_message}")
             return self.fail_response(f"Error processing scrape request: {error_message[:200]}")
     
+    async def _fetch_url_content(self, url: str) -> dict:
+        """
+        Fetch a URL through Firecrawl and return its title, markdown and metadata.
+        Results are served from the tool result cache when the URL was fetched recently.
+        """
+        arguments = {"url": url}
+        cached = await tool_result_cache.get("scrape_webpage", arguments, SCRAPE_CACHE_POLICY)
+        if cached is not None:
+            logging.info(f"Using cached Firecrawl content for {url} (hit rate {tool_result_cache.hit_rate('scrape_webpage'):.1%})")
+            return json.loads(cached.output)
+
+        # ---------- Firecrawl scrape endpoint ----------
+        logging.info(f"Sending request to Firecrawl for URL: {url}")
+        async with httpx.AsyncClient() as client:
+            headers = {
+                "Authorization": f"Bearer {self.firecrawl_api_key}",
+                "Content-Type": "application/json",
+            }
+            payload = {
+                "url": url,
+                "formats": ["markdown"]
+            }
+            
+            # Use longer timeout and retry logic for more reliability
+            max_retries = 3
+            timeout_seconds = 120
+            retry_count = 0
+            
+            while retry_count < max_retries:
+                try:
+                    logging.info(f"Sending request to Firecrawl (attempt {retry_count + 1}/{max_retries})")
+                    response = await client.post(
+                        f"{self.firecrawl_url}/v1/scrape",
+                        json=payload,
+                        headers=headers,
+                        timeout=timeout_seconds,
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                    logging.info(f"Successfully received response from Firecrawl for {url}")
+                    break
+                except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
+                    retry_count += 1
+                    logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
+                    if retry_count >= max_retries:
+                        raise Exception(f"Request timed out after {max_retries} attempts with {timeout_seconds}s timeout")
+                    # Exponential backoff
+                    logging.info(f"Waiting {2 ** retry_count}s before retry")
+                    await asyncio.sleep(2 ** retry_count)
+                except Exception as e:
+                    # Don't retry on non-timeout errors
+                    logging.error(f"Error during scraping: {str(e)}")
+                    raise e
+
+        # Format the response
+        title = data.get("data", {}).get("metadata", {}).get("title", "")
+        markdown_content = data.get("data", {}).get("markdown", "")
+        logging.info(f"Extracted content from {url}: title='{title}', content length={len(markdown_content)}")
+        
+        formatted_result = {
+            "title": title,
+            "url": url,
+            "text": markdown_content
+        }
+        
+        # Add metadata if available
+        if "metadata" in data.get("data", {}):
+            formatted_result["metadata"] = data["data"]["metadata"]
+            logging.info(f"Added metadata: {data['data']['metadata'].keys()}")
+
+        await tool_result_cache.set(
+            "scrape_webpage",
+            arguments,
+            SCRAPE_CACHE_POLICY,
+            ToolResult(success=True, output=json.dumps(formatted_result, ensure_ascii=False))
+        )
+        return formatted_result
+
     async def _scrape_single_url(self, url: str) -> dict:
         """
         Helper function to scrape a single URL and return the result information.
@@ -271,64 +361,9 @@ class SandboxWebSearchTool(SandboxToolsBase):
         logging.info(f"Scraping single URL: {url}")
         
         try:
-            # ---------- Firecrawl scrape endpoint ----------
-            logging.info(f"Sending request to Firecrawl for URL: {url}")
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.firecrawl_api_key}",
-                    "Content-Type": "application/json",
-                }
-                payload = {
-                    "url": url,
-                    "formats": ["markdown"]
-                }
-                
-                # Use longer timeout and retry logic for more reliability
-                max_retries = 3
-                timeout_seconds = 120
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        logging.info(f"Sending request to Firecrawl (attempt {retry_count + 1}/{max_retries})")
-                        response = await client.post(
-                            f"{self.firecrawl_url}/v1/scrape",
-                            json=payload,
-                            headers=headers,
-                            timeout=timeout_seconds,
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        logging.info(f"Successfully received response from Firecrawl for {url}")
-                        break
-                    except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
-                        retry_count += 1
-                        logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
-                        if retry_count >= max_retries:
-                            raise Exception(f"Request timed out after {max_retries} attempts with {timeout_seconds}s timeout")
-                        # Exponential backoff
-                        logging.info(f"Waiting {2 ** retry_count}s before retry")
-                        await asyncio.sleep(2 ** retry_count)
-                    except Exception as e:
-                        # Don't retry on non-timeout errors
-                        logging.error(f"Error during scraping: {str(e)}")
-                        raise e
-
-            # Format the response
-            title = data.get("data", {}).get("metadata", {}).get("title", "")
-            markdown_content = data.get("data", {}).get("markdown", "")
-            logging.info(f"Extracted content from {url}: title='{title}', content length={len(markdown_content)}")
-            
-            formatted_result = {
-                "title": title,
-                "url": url,
-                "text": markdown_content
-            }
-            
-            # Add metadata if available
-            if "metadata" in data.get("data", {}):
-                formatted_result["metadata"] = data["data"]["metadata"]
-                logging.info(f"Added metadata: {data['data']['metadata'].keys()}")
+            formatted_result = await self._fetch_url_content(url)
+            title = formatted_result.get("title", "")
+            markdown_content = formatted_result.get("text", "")
             
             # Create a simple filename from the URL domain and date
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -346,13 +381,14 @@ class SandboxWebSearchTool(SandboxToolsBase):
             
             # Save results to a file in the /workspace/scrape directory
             scrape_dir = f"{self.workspace_path}/scrape"
-            self.sandbox.fs.create_folder(scrape_dir, "755")
+            await self._sandbox_call(self.sandbox.fs.create_folder, scrape_dir, "755")
             
             results_file_path = f"{scrape_dir}/{safe_filename}"
             json_content = json.dumps(formatted_result, ensure_ascii=False, indent=2)
             logging.info(f"Saving content to file: {results_file_path}, size: {len(json_content)} bytes")
             
-            self.sandbox.fs.upload_file(
+            await self._sandbox_call(
+                self.sandbox.fs.upload_file,
                 json_content.encode(),
                 results_file_path,
             )
@@ -12,12 +12,16 @@ import json
 import re
 import uuid
 import asyncio
+import time
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple, Union, Callable, Literal
 from dataclasses import dataclass
 from utils.logger import logger
 from agentpress.tool import ToolResult
 from agentpress.tool_registry import ToolRegistry
+from agentpress.tool_result_cache import tool_result_cache
+from agentpress.tool_scheduler import ToolScheduler
+from agentpress.tool_limits import tool_concurrency_limiter
 from agentpress.xml_tool_parser import XMLToolParser
 try:
     from langfuse.client import StatefulTraceClient
@@ -34,7 +38,10 @@ from litellm import token_counter
 XmlAddingStrategy = Literal["user_message", "assistant_message", "inline_edit"]
 
 # Type alias for tool execution strategy
-ToolExecutionStrategy = Literal["sequential", "parallel"]
+ToolExecutionStrategy = Literal["sequential", "parallel", "dependency"]
+
+# Timeout applied to tools that do not declare their own execution limits
+DEFAULT_TOOL_TIMEOUT = 300
 
 @dataclass
 class ToolExecutionContext:
@@ -61,7 +68,8 @@ class ProcessorConfig:
         native_tool_calling: Enable OpenAI-style function calling format
         execute_tools: Whether to automatically execute detected tool calls
         execute_on_stream: For streaming, execute tools as they appear vs. at the end
-        tool_execution_strategy: How to execute multiple tools ("sequential" or "parallel")
+        tool_execution_strategy: How to execute multiple tools ("sequential", "parallel" or
+            "dependency", which runs calls concurrently unless their resources conflict)
         xml_adding_strategy: How to add XML tool results to the conversation
         max_xml_tool_calls: Maximum number of XML tool calls to process (0 = no limit)
     """
@@ -106,6 +114,7 @@ class ResponseProcessor:
         self.xml_parser = XMLToolParser(strict_mode=False)
         self.is_agent_builder = is_agent_builder
         self.target_agent_id = target_agent_id
+        self.tool_cache = tool_result_cache
 
     async def _yield_message(self, message_obj: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Helper to yield a message with proper formatting.
@@ -140,6 +149,8 @@ class ResponseProcessor:
         current_xml_content = ""
         xml_chunks_buffer = []
         pending_tool_executions = []
+        # Streamed calls are ordered by their resource conflicts when requested
+        tool_scheduler = ToolScheduler(self.tool_registry, self._execute_tool) if config.tool_execution_strategy == "dependency" else None
         yielded_tool_indices = set() # Stores indices of tools whose *status* has been yielded
         tool_index = 0
         xml_tool_call_count = 0
@@ -208,6 +219,11 @@ class ResponseProcessor:
                         streaming_metadata["usage"]["completion_tokens"] = chunk.usage.completion_tokens
                     if hasattr(chunk.usage, 'total_tokens') and chunk.usage.total_tokens is not None:
                         streaming_metadata["usage"]["total_tokens"] = chunk.usage.total_tokens
+                    # Anthropic prompt cache accounting
+                    cache_usage = self._extract_prompt_cache_usage(chunk.usage)
+                    for usage_key, usage_value in cache_usage.items():
+                        if usage_value:
+                            streaming_metadata["usage"][usage_key] = usage_value
 
                 if hasattr(chunk, 'choices') and chunk.choices and hasattr(chunk.choices[0], 'finish_reason') and chunk.choices[0].finish_reason:
                     finish_reason = chunk.choices[0].finish_reason
@@ -269,7 +285,7 @@ class ResponseProcessor:
                                         if started_msg_obj: yield format_for_yield(started_msg_obj)
                                         yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                        execution_task = asyncio.create_task(self._execute_tool(tool_call))
+                                        execution_task = tool_scheduler.submit(tool_call) if tool_scheduler else asyncio.create_task(self._execute_tool(tool_call))
                                         pending_tool_executions.append({
                                             "task": execution_task, "tool_call": tool_call,
                                             "tool_index": tool_index, "context": context
@@ -339,7 +355,7 @@ class ResponseProcessor:
                                 if started_msg_obj: yield format_for_yield(started_msg_obj)
                                 yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                execution_task = asyncio.create_task(self._execute_tool(tool_call_data))
+                                execution_task = tool_scheduler.submit(tool_call_data) if tool_scheduler else asyncio.create_task(self._execute_tool(tool_call_data))
                                 pending_tool_executions.append({
                                     "task": execution_task, "tool_call": tool_call_data,
                                     "tool_index": tool_index, "context": context
@@ -387,6 +403,8 @@ class ResponseProcessor:
                     self.trace.event(name="failed_to_calculate_usage", level="WARNING", status_message=(f"Failed to calculate usage: {str(e)}"))
 
 
+            self._log_prompt_cache_usage(streaming_metadata["usage"], thread_id)
+
             # Wait for pending tool executions from streaming phase
             tool_results_buffer = [] # Stores (tool_call, result, tool_index, context)
             if pending_tool_executions:
@@ -787,6 +805,13 @@ class ResponseProcessor:
             raise # Use bare 'raise' to preserve the original exception with its traceback
 
         finally:
+            # Cancel tool executions still running if the stream ended early
+            if tool_scheduler:
+                tool_scheduler.cancel()
+            for execution in pending_tool_executions:
+                if not execution["task"].done():
+                    execution["task"].cancel()
+
             # Save and Yield the final thread_run_end status
             try:
                 end_content = {"status_type": "thread_run_end"}
@@ -837,6 +862,13 @@ class ResponseProcessor:
             )
             if start_msg_obj: yield format_for_yield(start_msg_obj)
 
+            if hasattr(llm_response, 'usage') and llm_response.usage:
+                usage_data = {
+                    "prompt_tokens": getattr(llm_response.usage, 'prompt_tokens', 0) or 0,
+                    **self._extract_prompt_cache_usage(llm_response.usage)
+                }
+                self._log_prompt_cache_usage(usage_data, thread_id)
+
             # Extract finish_reason, content, tool calls
             if hasattr(llm_response, 'choices') and llm_response.choices:
                  if hasattr(llm_response.choices[0], 'finish_reason'):
@@ -994,6 +1026,49 @@ class ResponseProcessor:
             )
             if end_msg_obj: yield format_for_yield(end_msg_obj)
 
+    def _extract_prompt_cache_usage(self, usage: Any) -> Dict[str, int]:
+        """Extract prompt cache token counts from a provider usage object.
+
+        Anthropic reports cache_creation_input_tokens/cache_read_input_tokens directly,
+        OpenAI-compatible providers report prompt_tokens_details.cached_tokens.
+        """
+        def _get(obj: Any, name: str) -> Any:
+            if obj is None:
+                return None
+            if isinstance(obj, dict):
+                return obj.get(name)
+            return getattr(obj, name, None)
+
+        try:
+            cache_creation = _get(usage, 'cache_creation_input_tokens') or 0
+            cache_read = _get(usage, 'cache_read_input_tokens') or 0
+            if not cache_read:
+                cache_read = _get(_get(usage, 'prompt_tokens_details'), 'cached_tokens') or 0
+            return {
+                "cache_creation_input_tokens": int(cache_creation),
+                "cache_read_input_tokens": int(cache_read)
+            }
+        except (TypeError, ValueError):
+            return {"cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+
+    def _log_prompt_cache_usage(self, usage: Dict[str, Any], thread_id: str) -> None:
+        """Log and trace the prompt cache hit rate for one LLM turn."""
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_creation = usage.get("cache_creation_input_tokens") or 0
+        if not prompt_tokens and not cache_read and not cache_creation:
+            return
+        # Anthropic counts cached tokens separately from input_tokens, LiteLLM folds them into prompt_tokens
+        total_prompt = max(prompt_tokens, cache_read + cache_creation)
+        hit_rate = cache_read / total_prompt if total_prompt else 0.0
+        logger.info(f"Prompt cache for thread {thread_id}: read={cache_read}, created={cache_creation}, prompt={prompt_tokens}, hit_rate={hit_rate:.1%}")
+        self.trace.event(name="prompt_cache_usage", level="DEFAULT", status_message=(f"Prompt cache hit rate {hit_rate:.1%}"), metadata={
+            "prompt_tokens": prompt_tokens,
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_creation,
+            "hit_rate": hit_rate
+        })
+
     # XML parsing methods
     def _extract_tag_content(self, xml_chunk: str, tag_name: str) -> Tuple[Optional[str], Optional[str]]:
         """Extract content between opening and closing tags, handling nested tags."""
@@ -1343,9 +1418,50 @@ class ResponseProcessor:
                 span.end(status_message="tool_not_found", level="ERROR")
                 return ToolResult(success=False, output=f"Tool function '{function_name}' not found")
             
+            # Serve idempotent tools from the result cache when possible
+            cache_policy = getattr(tool_fn, 'tool_cache_policy', None)
+            if cache_policy is not None and not cache_policy.idempotent:
+                cache_policy = None
+            if cache_policy:
+                cached_result = await self.tool_cache.get(function_name, arguments, cache_policy)
+                hit_rate = self.tool_cache.hit_rate(function_name)
+                self.trace.event(name="tool_cache_lookup", level="DEFAULT", status_message=(f"{function_name}: {'hit' if cached_result else 'miss'} (hit rate {hit_rate:.1%})"))
+                if cached_result is not None:
+                    logger.info(f"Tool cache hit: {function_name} (hit rate {hit_rate:.1%})")
+                    span.end(status_message="tool_cache_hit", output=cached_result)
+                    return cached_result
+
+            limits = getattr(tool_fn, 'tool_execution_limits', None)
+            timeout = limits.resolve_timeout(arguments, DEFAULT_TOOL_TIMEOUT) if limits else DEFAULT_TOOL_TIMEOUT
+            # Concurrency caps apply per sandbox for project-bound tools
+            scope = getattr(getattr(tool_fn, '__self__', None), 'project_id', None)
+            group = (limits.concurrency_group if limits else None) or function_name
+
             logger.debug(f"Found tool function for '{function_name}', executing...")
-            result = await tool_fn(**arguments)
+            queued_at = time.monotonic()
+            async with tool_concurrency_limiter.limit(group, scope, limits.max_concurrency if limits else None):
+                started_at = time.monotonic()
+                deadline = asyncio.timeout(timeout)
+                try:
+                    async with deadline:
+                        result = await tool_fn(**arguments)
+                except TimeoutError:
+                    if not deadline.expired():
+                        raise
+                    elapsed = time.monotonic() - started_at
+                    logger.warning(f"Tool {function_name} timed out after {elapsed:.1f}s (limit {timeout}s)")
+                    span.end(status_message="tool_timeout", level="ERROR")
+                    return ToolResult(
+                        success=False,
+                        output=f"Tool '{function_name}' timed out after {elapsed:.1f}s (limit {timeout:.0f}s) and was cancelled.",
+                        timing=self._tool_timing(queued_at, started_at, timeout, timed_out=True)
+                    )
+
+            if isinstance(result, ToolResult):
+                result.timing = self._tool_timing(queued_at, started_at, timeout)
             logger.info(f"Tool execution complete: {function_name} -> {result}")
+            if cache_policy and result.success:
+                await self.tool_cache.set(function_name, arguments, cache_policy, result)
             span.end(status_message="tool_executed", output=result)
             return result
         except Exception as e:
@@ -1353,6 +1469,16 @@ class ResponseProcessor:
             span.end(status_message="tool_execution_error", output=f"Error executing tool: {str(e)}", level="ERROR")
             return ToolResult(success=False, output=f"Error executing tool: {str(e)}")
 
+    def _tool_timing(self, queued_at: float, started_at: float, timeout: Optional[float], timed_out: bool = False) -> Dict[str, Any]:
+        """Build the timing attached to a tool result."""
+        now = time.monotonic()
+        return {
+            "queued_ms": round((started_at - queued_at) * 1000, 1),
+            "duration_ms": round((now - started_at) * 1000, 1),
+            "timeout_s": timeout,
+            "timed_out": timed_out
+        }
+
     async def _execute_tools(
         self, 
         tool_calls: List[Dict[str, Any]], 
@@ -1368,6 +1494,7 @@ class ResponseProcessor:
             execution_strategy: Strategy for executing tools:
                 - "sequential": Execute tools one after another, waiting for each to complete
                 - "parallel": Execute all tools simultaneously for better performance 
+                - "dependency": Execute tools simultaneously unless their declared resources conflict
                 
         Returns:
             List of tuples containing the original tool call and its result
@@ -1379,6 +1506,8 @@ class ResponseProcessor:
             return await self._execute_tools_sequentially(tool_calls)
         elif execution_strategy == "parallel":
             return await self._execute_tools_in_parallel(tool_calls)
+        elif execution_strategy == "dependency":
+            return await self._execute_tools_with_dependencies(tool_calls)
         else:
             logger.warning(f"Unknown execution strategy: {execution_strategy}, falling back to sequential")
             return await self._execute_tools_sequentially(tool_calls)
@@ -1461,11 +1590,11 @@ class ResponseProcessor:
             logger.info(f"Executing {len(tool_calls)} tools in parallel: {tool_names}")
             self.trace.event(name="executing_tools_in_parallel", level="DEFAULT", status_message=(f"Executing {len(tool_calls)} tools in parallel: {tool_names}"))
             
-            # Create tasks for all tool calls
-            tasks = [self._execute_tool(tool_call) for tool_call in tool_calls]
-            
-            # Execute all tasks concurrently with error handling
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Run all calls in one task group so cancelling the turn cancels every call
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(self._execute_tool(tool_call)) for tool_call in tool_calls]
+            # The group raises if any call raised, so every task here has a result
+            results = [task.result() for task in tasks]
             
             # Process results and handle any exceptions
             processed_results = []
@@ -1490,6 +1619,36 @@ class ResponseProcessor:
             return [(tool_call, ToolResult(success=False, output=f"Execution error: {str(e)}")) 
                     for tool_call in tool_calls]
 
+    async def _execute_tools_with_dependencies(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
+        """Execute tool calls concurrently while respecting their resource conflicts.
+        
+        Each call waits only for earlier calls whose declared read/write resources
+        conflict with its own (see ToolScheduler); results are returned in the
+        original call order.
+        
+        Args:
+            tool_calls: List of tool calls to execute
+            
+        Returns:
+            List of tuples containing the original tool call and its result
+        """
+        if not tool_calls:
+            return []
+
+        try:
+            tool_names = [t.get('function_name', 'unknown') for t in tool_calls]
+            logger.info(f"Executing {len(tool_calls)} tools with dependency scheduling: {tool_names}")
+            scheduler = ToolScheduler(self.tool_registry, self._execute_tool)
+            results = await scheduler.run(tool_calls)
+            self.trace.event(name="dependency_execution_completed", level="DEFAULT", status_message=(f"Executed {len(tool_calls)} tools with {scheduler.dependency_count} dependency edges"))
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in dependency-scheduled tool execution: {str(e)}", exc_info=True)
+            self.trace.event(name="error_in_dependency_tool_execution", level="ERROR", status_message=(f"Error in dependency-scheduled tool execution: {str(e)}"))
+            return [(tool_call, ToolResult(success=False, output=f"Execution error: {str(e)}"))
+                    for tool_call in tool_calls]
+
     async def _add_tool_result(
         self, 
         thread_id: str, 
@@ -1833,6 +1992,8 @@ class ResponseProcessor:
         # Add the *actual* tool result message ID to the metadata if available and successful
         if context.result.success and tool_message_id:
             metadata["linked_tool_result_message_id"] = tool_message_id
+        if context.result.timing:
+            metadata["timing"] = context.result.timing
             
         # <<< ADDED: Signal if this is a terminating tool >>>
         if context.function_name in ['ask', 'complete']:
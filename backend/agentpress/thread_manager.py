@@ -16,6 +16,7 @@ from services.llm import make_llm_api_call
 from agentpress.tool import Tool
 from agentpress.tool_registry import ToolRegistry
 from agentpress.context_manager import ContextManager
+from agentpress.thread_state import thread_state
 from agentpress.response_processor import (
     ResponseProcessor,
     ProcessorConfig
@@ -34,6 +35,36 @@ from litellm import token_counter
 # Type alias for tool choice
 ToolChoice = Literal["auto", "required", "none"]
 
+# Type alias for prompt cache layout
+# - "default": temporary message before the last user message, recency-based cache breakpoints
+# - "stable": append-only history, volatile content at the tail, token-position breakpoints
+CacheLayout = Literal["default", "stable"]
+
+XML_EXAMPLES_HEADER = """
+--- XML TOOL CALLING ---
+
+In this environment you have access to a set of tools you can use to answer the user's question. The tools are specified in XML format.
+Format your tool calls using the specified XML tags. Place parameters marked as 'attribute' within the opening tag (e.g., `<tag attribute='value'>`). Place parameters marked as 'content' between the opening and closing tags. Place parameters marked as 'element' within their own child tags (e.g., `<tag><element>value</element></tag>`). Refer to the examples provided below for the exact structure of each tool.
+String and scalar parameters should be specified as attributes, while content goes between tags.
+Note that spaces for string values are not stripped. The output is parsed with regular expressions.
+
+Here are the XML tools available with examples:
+"""
+
+def build_xml_examples_content(xml_examples: Dict[str, str]) -> str:
+    """Render the XML tool calling section appended to the system prompt.
+
+    Args:
+        xml_examples: Mapping of XML tag names to their usage examples
+
+    Returns:
+        The section text, in registry order
+    """
+    examples_content = XML_EXAMPLES_HEADER
+    for tag_name, example in xml_examples.items():
+        examples_content += f"<{tag_name}> Example: {example}\\n"
+    return examples_content
+
 class ThreadManager:
     """Manages conversation threads with LLM models and tool execution.
 
@@ -65,6 +96,8 @@ class ThreadManager:
             target_agent_id=self.target_agent_id
         )
         self.context_manager = ContextManager()
+        self._compression_thresholds: Dict[str, int] = {} # thread_id -> sticky threshold, used when Redis is unavailable
+        self._traced_tools_version: Optional[int] = None # Registry version whose full tools array was sent to Langfuse
 
     def _is_tool_result_message(self, msg: Dict[str, Any]) -> bool:
         if not ("content" in msg and msg['content']):
@@ -170,21 +203,25 @@ class ThreadManager:
                             
         return messages
 
-    def _compress_messages(self, messages: List[Dict[str, Any]], llm_model: str, max_tokens: Optional[int] = 41000, token_threshold: Optional[int] = 4096, max_iterations: int = 5) -> List[Dict[str, Any]]:
-        """Compress the messages.
-            token_threshold: must be a power of 2
-        """
-
+    def _get_context_budget(self, llm_model: str) -> int:
+        """Get the prompt token budget for a model before compression kicks in."""
         if 'sonnet' in llm_model.lower():
-            max_tokens = 200 * 1000 - 64000
+            return 200 * 1000 - 64000
         elif 'gpt' in llm_model.lower():
-            max_tokens = 128 * 1000 - 28000
+            return 128 * 1000 - 28000
         elif 'gemini' in llm_model.lower():
-            max_tokens = 1000 * 1000 - 300000
+            return 1000 * 1000 - 300000
         elif 'deepseek' in llm_model.lower():
-            max_tokens = 128 * 1000 - 28000
+            return 128 * 1000 - 28000
         else:
-            max_tokens = 41 * 1000 - 10000
+            return 41 * 1000 - 10000
+
+    def _compress_messages(self, messages: List[Dict[str, Any]], llm_model: str, max_tokens: Optional[int] = 41000, token_threshold: Optional[int] = 4096, max_iterations: int = 5) -> List[Dict[str, Any]]:
+        """Compress the messages.
+            token_threshold: must be a power of 2
+        """
+
+        max_tokens = self._get_context_budget(llm_model)
 
         if max_iterations <= 0:
             logger.warning(f"_compress_messages: Max iterations reached, returning uncompressed messages")
@@ -208,6 +245,41 @@ class ThreadManager:
 
         return result
 
+    async def _compress_messages_stable(self, messages: List[Dict[str, Any]], llm_model: str, thread_id: str, max_iterations: int = 5) -> List[Dict[str, Any]]:
+        """Compress the messages with a per-thread sticky threshold.
+
+        The threshold only ever decreases for a thread, so a message compressed on one
+        turn is compressed identically on every later turn and the cached prefix stays
+        byte-stable. It is kept in the thread's Redis state, since every agent run
+        builds a new ThreadManager.
+        """
+        max_tokens = self._get_context_budget(llm_model)
+        try:
+            stored_threshold = await thread_state.get(thread_id, "compression_threshold")
+        except Exception as e:
+            logger.warning(f"Failed to read compression threshold of thread {thread_id}: {str(e)}")
+            stored_threshold = None
+        token_threshold = stored_threshold or self._compression_thresholds.get(thread_id, 4096)
+
+        uncompressed_total_token_count = token_counter(model=llm_model, messages=messages)
+        result = messages
+        for iteration in range(max_iterations):
+            result = self._compress_tool_result_messages(result, llm_model, max_tokens, token_threshold)
+            result = self._compress_user_messages(result, llm_model, max_tokens, token_threshold)
+            result = self._compress_assistant_messages(result, llm_model, max_tokens, token_threshold)
+
+            compressed_token_count = token_counter(model=llm_model, messages=result)
+            if compressed_token_count <= max_tokens or iteration == max_iterations - 1 or token_threshold <= 1:
+                break
+            logger.warning(f"Further token compression is needed: {compressed_token_count} > {max_tokens}")
+            token_threshold = int(token_threshold / 2)
+
+        self._compression_thresholds[thread_id] = token_threshold
+        if token_threshold != stored_threshold:
+            await thread_state.set(thread_id, "compression_threshold", token_threshold)
+        logger.info(f"_compress_messages_stable: {uncompressed_total_token_count} -> {compressed_token_count} (threshold {token_threshold})")
+        return result
+
     def add_tool(self, tool_class: Type[Tool], function_names: Optional[List[str]] = None, **kwargs):
         """Add a tool to the ThreadManager."""
         self.tool_registry.register_tool(tool_class, function_names, **kwargs)
@@ -320,6 +392,7 @@ class ThreadManager:
         reasoning_effort: Optional[str] = 'low',
         enable_context_manager: bool = True,
         generation: Optional[StatefulGenerationClient] = None,
+        cache_layout: CacheLayout = "default",
     ) -> Union[Dict[str, Any], AsyncGenerator]:
         """Run a conversation thread with LLM integration and tool execution.
 
@@ -340,6 +413,8 @@ class ThreadManager:
             enable_thinking: Whether to enable thinking before making a decision
             reasoning_effort: The effort level for reasoning
             enable_context_manager: Whether to enable automatic context summarization.
+            cache_layout: Prompt cache layout ("default" or "stable"). The stable layout keeps
+                          history append-only and places the temporary message at the tail.
 
         Returns:
             An async generator yielding response chunks or error dict
@@ -365,18 +440,7 @@ class ThreadManager:
         if include_xml_examples and processor_config.xml_tool_calling:
             xml_examples = self.tool_registry.get_xml_examples()
             if xml_examples:
-                examples_content = """
---- XML TOOL CALLING ---
-
-In this environment you have access to a set of tools you can use to answer the user's question. The tools are specified in XML format.
-Format your tool calls using the specified XML tags. Place parameters marked as 'attribute' within the opening tag (e.g., `<tag attribute='value'>`). Place parameters marked as 'content' between the opening and closing tags. Place parameters marked as 'element' within their own child tags (e.g., `<tag><element>value</element></tag>`). Refer to the examples provided below for the exact structure of each tool.
-String and scalar parameters should be specified as attributes, while content goes between tags.
-Note that spaces for string values are not stripped. The output is parsed with regular expressions.
-
-Here are the XML tools available with examples:
-"""
-                for tag_name, example in xml_examples.items():
-                    examples_content += f"<{tag_name}> Example: {example}\\n"
+                examples_content = build_xml_examples_content(xml_examples)
 
                 # # Save examples content to a file
                 # try:
@@ -450,25 +514,35 @@ Here are the XML tools available with examples:
                 # 3. Prepare messages for LLM call + add temporary message if it exists
                 # Use the working_system_prompt which may contain the XML examples
                 prepared_messages = [working_system_prompt]
+                volatile_tail_messages = 0
 
-                # Find the last user message index
-                last_user_index = -1
-                for i, msg in enumerate(messages):
-                    if msg.get('role') == 'user':
-                        last_user_index = i
-
-                # Insert temporary message before the last user message if it exists
-                if temp_msg and last_user_index >= 0:
-                    prepared_messages.extend(messages[:last_user_index])
-                    prepared_messages.append(temp_msg)
-                    prepared_messages.extend(messages[last_user_index:])
-                    logger.debug("Added temporary message before the last user message")
-                else:
-                    # If no user message or no temporary message, just add all messages
+                if cache_layout == "stable":
+                    # Keep history append-only; volatile content goes after it so the prefix stays cacheable
                     prepared_messages.extend(messages)
+                    prepared_messages = await self._compress_messages_stable(prepared_messages, llm_model, thread_id)
                     if temp_msg:
                         prepared_messages.append(temp_msg)
-                        logger.debug("Added temporary message to the end of prepared messages")
+                        volatile_tail_messages = 1
+                        logger.debug("Added temporary message to the tail of prepared messages (stable cache layout)")
+                else:
+                    # Find the last user message index
+                    last_user_index = -1
+                    for i, msg in enumerate(messages):
+                        if msg.get('role') == 'user':
+                            last_user_index = i
+
+                    # Insert temporary message before the last user message if it exists
+                    if temp_msg and last_user_index >= 0:
+                        prepared_messages.extend(messages[:last_user_index])
+                        prepared_messages.append(temp_msg)
+                        prepared_messages.extend(messages[last_user_index:])
+                        logger.debug("Added temporary message before the last user message")
+                    else:
+                        # If no user message or no temporary message, just add all messages
+                        prepared_messages.extend(messages)
+                        if temp_msg:
+                            prepared_messages.append(temp_msg)
+                            logger.debug("Added temporary message to the end of prepared messages")
 
                 # 4. Prepare tools for LLM call
                 openapi_tool_schemas = None
@@ -476,12 +550,24 @@ Here are the XML tools available with examples:
                     openapi_tool_schemas = self.tool_registry.get_openapi_schemas()
                     logger.debug(f"Retrieved {len(openapi_tool_schemas) if openapi_tool_schemas else 0} OpenAPI tool schemas")
 
-                prepared_messages = self._compress_messages(prepared_messages, llm_model)
+                if cache_layout != "stable":
+                    prepared_messages = self._compress_messages(prepared_messages, llm_model)
 
                 # 5. Make LLM API call
                 logger.debug("Making LLM API call")
                 try:
                     if generation:
+                        # Send the full tools array once per registry version, afterwards only a reference
+                        traced_tools = openapi_tool_schemas
+                        if openapi_tool_schemas:
+                            if self._traced_tools_version == self.tool_registry.version:
+                                traced_tools = {
+                                    "registry_version": self.tool_registry.version,
+                                    "count": len(openapi_tool_schemas),
+                                    "size": len(self.tool_registry.get_openapi_schemas_json())
+                                }
+                            else:
+                                self._traced_tools_version = self.tool_registry.version
                         generation.update(
                             input=prepared_messages,
                             start_time=datetime.datetime.now(datetime.timezone.utc),
@@ -492,7 +578,7 @@ Here are the XML tools available with examples:
                               "enable_thinking": enable_thinking,
                               "reasoning_effort": reasoning_effort,
                               "tool_choice": tool_choice,
-                              "tools": openapi_tool_schemas,
+                              "tools": traced_tools,
                             }
                         )
                     llm_response = await make_llm_api_call(
@@ -504,7 +590,9 @@ Here are the XML tools available with examples:
                         tool_choice=tool_choice if processor_config.native_tool_calling else None,
                         stream=stream,
                         enable_thinking=enable_thinking,
-                        reasoning_effort=reasoning_effort
+                        reasoning_effort=reasoning_effort,
+                        cache_layout=cache_layout,
+                        volatile_tail_messages=volatile_tail_messages
                     )
                     logger.debug("Successfully received raw LLM API response stream/object")
 
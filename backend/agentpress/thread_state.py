@@ -0,0 +1,135 @@
+"""
+Ephemeral per-thread state kept in Redis.
+
+Some tool output only matters until the next LLM call of a run, such as the
+latest browser state, which run_agent turns into a temporary message on every
+iteration, or an image loaded by see_image, which is shown to the model once.
+Writing them to the messages table adds a large row per action that is only
+ever read back as "the latest one". Each thread instead gets one Redis hash,
+with a field per kind of state, that is refreshed on write and expires after
+a TTL. Small values that must outlive a single agent run, such as the sticky
+compression threshold of the stable cache layout, are kept there too. State that
+accumulates until it is consumed, such as the images of parallel see_image calls,
+goes to a Redis list per thread and kind instead, so concurrent appends never
+overwrite each other.
+
+Writes report Redis failures through their return value instead of raising,
+so tools can fall back or fail cleanly. Reads raise, so callers can tell an
+empty slot from an unreachable Redis.
+"""
+
+import json
+from typing import Any, List, Optional
+
+from services import redis
+from utils.logger import logger
+
+# Seconds thread state is kept after its last update
+THREAD_STATE_TTL = 3600 * 6
+
+class ThreadStateStore:
+    """Latest value of each kind of ephemeral state, per thread.
+
+    Attributes:
+        prefix (str): Prefix of the Redis hash of each thread
+        ttl (int): Seconds a thread's state is kept after its last update
+    """
+
+    def __init__(self, prefix: str = "thread_state", ttl: int = THREAD_STATE_TTL):
+        """Initialize the store.
+
+        Args:
+            prefix: Prefix of the Redis hash of each thread
+            ttl: Seconds a thread's state is kept after its last update
+        """
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, thread_id: str) -> str:
+        return f"{self.prefix}:{thread_id}"
+
+    def _list_key(self, thread_id: str, field: str) -> str:
+        return f"{self.prefix}:{thread_id}:{field}"
+
+    def _decode(self, thread_id: str, field: str, raw: Optional[str]) -> Optional[Any]:
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding malformed {field} of thread {thread_id}")
+            return None
+
+    async def set(self, thread_id: str, field: str, value: Any) -> bool:
+        """Replace one kind of state of a thread.
+
+        Args:
+            thread_id: Thread the state belongs to
+            field: Kind of state, e.g. "browser_state"
+            value: JSON-serializable state
+
+        Returns:
+            True if the state was stored
+        """
+        key = self._key(thread_id)
+        try:
+            await redis.hset(key, field, json.dumps(value, default=str))
+            await redis.expire(key, self.ttl)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to store {field} of thread {thread_id}: {str(e)}")
+            return False
+
+    async def get(self, thread_id: str, field: str) -> Optional[Any]:
+        """Return one kind of state of a thread, or None if there is none.
+
+        Raises:
+            Exception: If Redis cannot be reached, so callers can tell a miss from a failure
+        """
+        return self._decode(thread_id, field, await redis.hget(self._key(thread_id), field))
+
+    async def pop(self, thread_id: str, field: str) -> Optional[Any]:
+        """Remove and return one kind of state of a thread, or None if there is none.
+
+        The read and the delete run in one transaction, so a value written in between
+        is never deleted unseen.
+
+        Raises:
+            Exception: If Redis cannot be reached
+        """
+        return self._decode(thread_id, field, await redis.hgetdel(self._key(thread_id), field))
+
+    async def append(self, thread_id: str, field: str, value: Any) -> bool:
+        """Add a value to one kind of accumulated state of a thread.
+
+        Args:
+            thread_id: Thread the state belongs to
+            field: Kind of state, e.g. "image_context"
+            value: JSON-serializable state
+
+        Returns:
+            True if the value was stored
+        """
+        key = self._list_key(thread_id, field)
+        try:
+            await redis.rpush(key, json.dumps(value, default=str))
+            await redis.expire(key, self.ttl)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to append {field} of thread {thread_id}: {str(e)}")
+            return False
+
+    async def pop_all(self, thread_id: str, field: str) -> List[Any]:
+        """Remove and return every value appended to one kind of state of a thread, oldest first.
+
+        The read and the delete run in one transaction, so a value appended in between
+        is never deleted unseen.
+
+        Raises:
+            Exception: If Redis cannot be reached
+        """
+        values = [self._decode(thread_id, field, raw) for raw in await redis.lrangedel(self._list_key(thread_id, field))]
+        return [value for value in values if value is not None]
+
+# Process-wide store shared by tools and agent runs
+thread_state = ThreadStateStore()
@@ -4,6 +4,9 @@ Core tool system providing the foundation for creating and managing tools.
 This module defines the base classes and decorators for creating tools in AgentPress:
 - Tool base class for implementing tool functionality
 - Schema decorators for OpenAPI and XML tool definitions
+- Cache policy decorator for idempotent tool results
+- Resource decorator describing what a tool reads and writes, for scheduling
+- Execution limits decorator for per-tool timeouts and concurrency caps
 - Result containers for standardized tool outputs
 """
 
@@ -89,9 +92,71 @@ class ToolResult:
     Attributes:
         success (bool): Whether the tool execution succeeded
         output (str): Output message or error description
+        timing (Dict[str, float], optional): Execution timing filled in by the response processor
     """
     success: bool
     output: str
+    timing: Optional[Dict[str, float]] = field(default=None, repr=False, compare=False)
+
+@dataclass
+class ToolCachePolicy:
+    """Result caching policy declared on a tool method.
+    
+    Attributes:
+        idempotent (bool): Whether identical arguments always yield an equivalent result
+        ttl (int): Seconds a cached result stays valid
+        key_fields (List[str], optional): Arguments identifying a call (all arguments if None)
+        max_result_bytes (int): Results larger than this are never cached
+    """
+    idempotent: bool = True
+    ttl: int = 3600
+    key_fields: Optional[List[str]] = None
+    max_result_bytes: int = 256 * 1024
+
+@dataclass
+class ToolResourceSpec:
+    """Resources a tool method reads and writes, used to order concurrent calls.
+    
+    Resources are written as "kind:path" templates whose placeholders are filled
+    from the call arguments (e.g. "file:{file_path}", "shell:{session_name}",
+    "browser"). An empty path covers every resource of that kind.
+    
+    Attributes:
+        reads (List[str]): Resource templates the tool only reads
+        writes (List[str]): Resource templates the tool modifies
+    """
+    reads: List[str] = field(default_factory=list)
+    writes: List[str] = field(default_factory=list)
+
+@dataclass
+class ToolExecutionLimits:
+    """Execution limits declared on a tool method.
+    
+    Attributes:
+        timeout (float, optional): Seconds a call may run before it is cancelled
+        timeout_arg (str, optional): Argument holding a caller-requested timeout in seconds;
+            the effective timeout is extended to cover it plus timeout_grace
+        timeout_grace (float): Extra seconds allowed on top of the caller-requested timeout
+        max_concurrency (int, optional): Maximum concurrent calls per concurrency group and sandbox
+        concurrency_group (str, optional): Name shared by tools that count against the same cap
+            (defaults to the function name)
+    """
+    timeout: Optional[float] = None
+    timeout_arg: Optional[str] = None
+    timeout_grace: float = 30
+    max_concurrency: Optional[int] = None
+    concurrency_group: Optional[str] = None
+
+    def resolve_timeout(self, arguments: Dict[str, Any], default: Optional[float]) -> Optional[float]:
+        """Return the timeout for a call with the given arguments."""
+        timeout = self.timeout if self.timeout is not None else default
+        if self.timeout_arg and arguments.get(self.timeout_arg) is not None:
+            try:
+                requested = float(arguments[self.timeout_arg]) + self.timeout_grace
+            except (TypeError, ValueError):
+                return timeout
+            timeout = max(timeout or 0, requested)
+        return timeout
 
 class Tool(ABC):
     """Abstract base class for all tools.
@@ -238,3 +303,93 @@ def custom_schema(schema: Dict[str, Any]):
             schema=schema
         ))
     return decorator
+
+def cache_policy(
+    ttl: int = 3600,
+    key_fields: List[str] = None,
+    idempotent: bool = True,
+    max_result_bytes: int = 256 * 1024
+):
+    """
+    Decorator declaring that successful results of a tool may be cached.
+    
+    Args:
+        ttl: Seconds a cached result stays valid
+        key_fields: Arguments that identify a call; all arguments are used if omitted
+        idempotent: Whether identical arguments always yield an equivalent result
+        max_result_bytes: Results larger than this are never cached
+    
+    Example:
+        @cache_policy(ttl=3600, key_fields=["query", "num_results"])
+        async def web_search(self, query: str, num_results: int = 20) -> ToolResult:
+            ...
+    """
+    def decorator(func):
+        logger.debug(f"Applying cache policy (ttl={ttl}s) to function {func.__name__}")
+        func.tool_cache_policy = ToolCachePolicy(
+            idempotent=idempotent,
+            ttl=ttl,
+            key_fields=key_fields,
+            max_result_bytes=max_result_bytes
+        )
+        return func
+    return decorator
+
+def tool_resources(reads: List[str] = None, writes: List[str] = None):
+    """
+    Decorator declaring the resources a tool reads and writes.
+    
+    Calls whose resources do not conflict may run concurrently; tools without
+    this decorator are treated as touching everything and always run alone.
+    
+    Args:
+        reads: Resource templates the tool only reads
+        writes: Resource templates the tool modifies
+    
+    Example:
+        @tool_resources(writes=["file:{file_path}"])
+        async def create_file(self, file_path: str, file_contents: str) -> ToolResult:
+            ...
+    """
+    def decorator(func):
+        logger.debug(f"Applying resource spec to function {func.__name__}")
+        func.tool_resources = ToolResourceSpec(
+            reads=list(reads or []),
+            writes=list(writes or [])
+        )
+        return func
+    return decorator
+
+def execution_limits(
+    timeout: float = None,
+    timeout_arg: str = None,
+    timeout_grace: float = 30,
+    max_concurrency: int = None,
+    concurrency_group: str = None
+):
+    """
+    Decorator declaring the timeout and concurrency cap of a tool.
+    
+    Args:
+        timeout: Seconds a call may run before it is cancelled
+        timeout_arg: Argument holding a caller-requested timeout in seconds
+        timeout_grace: Extra seconds allowed on top of the caller-requested timeout
+        max_concurrency: Maximum concurrent calls per concurrency group and sandbox
+        concurrency_group: Name shared by tools that count against the same cap
+    
+    Example:
+        @execution_limits(timeout=120, max_concurrency=2, concurrency_group="browser")
+        async def browser_navigate_to(self, url: str) -> ToolResult:
+            ...
+    """
+    def decorator(func):
+        logger.debug(f"Applying execution limits to function {func.__name__}")
+        func.tool_execution_limits = ToolExecutionLimits(
+            timeout=timeout,
+            timeout_arg=timeout_arg,
+            timeout_grace=timeout_grace,
+            max_concurrency=max_concurrency,
+            concurrency_group=concurrency_group
+        )
+        return func
+    return decorator
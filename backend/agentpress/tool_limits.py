@@ -0,0 +1,59 @@
+"""
+Concurrency caps for tool execution.
+
+Tools declare max_concurrency through the execution_limits decorator. Calls
+sharing a concurrency group are capped per sandbox (the tool instance's
+project_id), or process-wide for tools that are not bound to a project, so for
+example at most two browser actions hit the same sandbox at once.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple, AsyncIterator
+
+from utils.logger import logger
+
+class ToolConcurrencyLimiter:
+    """Hands out semaphores keyed by (concurrency group, scope).
+
+    Semaphores are dropped once no call holds or waits on them, so the limiter
+    does not grow with the number of projects seen by the process.
+    """
+
+    def __init__(self):
+        self._semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        self._users: Dict[Tuple[str, str], int] = {}
+
+    @asynccontextmanager
+    async def limit(self, group: str, scope: Optional[str], max_concurrency: Optional[int]) -> AsyncIterator[None]:
+        """Hold one slot of a concurrency group for the duration of the block.
+
+        Args:
+            group: Concurrency group name
+            scope: Sandbox/project the call runs against (None for process-wide)
+            max_concurrency: Maximum concurrent holders; no limit if None or < 1
+        """
+        if not max_concurrency or max_concurrency < 1:
+            yield
+            return
+
+        key = (group, scope or "*")
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max_concurrency)
+            self._semaphores[key] = semaphore
+        self._users[key] = self._users.get(key, 0) + 1
+
+        try:
+            if semaphore.locked():
+                logger.debug(f"Waiting for a free '{group}' slot (limit {max_concurrency}, scope {key[1]})")
+            async with semaphore:
+                yield
+        finally:
+            self._users[key] -= 1
+            if self._users[key] == 0:
+                del self._users[key]
+                del self._semaphores[key]
+
+# Process-wide limiter shared by all response processors
+tool_concurrency_limiter = ToolConcurrencyLimiter()
@@ -0,0 +1,127 @@
+"""
+Live tool output streaming through the agent run's Redis response stream.
+
+Long-running tools (e.g. shell commands) publish their incremental output as
+transient tool_output_chunk status messages on agent_run:{id}:responses, the
+same list and channel the background worker uses for LLM responses, so clients
+see progress without waiting for the next LLM turn. Chunks are rate limited
+and capped per source.
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from services import redis
+from utils.logger import logger
+
+class ToolOutputStream:
+    """Publishes incremental tool output for one agent run.
+
+    Output for a source (e.g. a tmux session) is buffered and published at most
+    once per min_interval seconds. Each chunk keeps only its last max_chunk_chars
+    characters, and a source stops streaming after max_total_chars.
+
+    Attributes:
+        agent_run_id (str): Agent run whose response stream receives the chunks
+        thread_id (str): Thread the run belongs to
+        min_interval (float): Minimum seconds between two chunks of a source
+        max_chunk_chars (int): Maximum characters per chunk
+        max_total_chars (int): Maximum characters streamed per source
+        closed (bool): Whether the run ended; closed streams publish nothing
+    """
+
+    def __init__(
+        self,
+        agent_run_id: str,
+        thread_id: Optional[str] = None,
+        min_interval: float = 1.0,
+        max_chunk_chars: int = 4000,
+        max_total_chars: int = 200000
+    ):
+        self.agent_run_id = agent_run_id
+        self.thread_id = thread_id
+        self.min_interval = min_interval
+        self.max_chunk_chars = max_chunk_chars
+        self.max_total_chars = max_total_chars
+        self._pending: Dict[str, str] = {}
+        self._last_published: Dict[str, float] = {}
+        self._published_chars: Dict[str, int] = {}
+        self.closed = False
+
+    @property
+    def response_list_key(self) -> str:
+        return f"agent_run:{self.agent_run_id}:responses"
+
+    @property
+    def response_channel(self) -> str:
+        return f"agent_run:{self.agent_run_id}:new_response"
+
+    async def publish(self, tool_name: str, source: str, output: str, final: bool = False) -> bool:
+        """Queue output of a source and publish it if the rate limit allows.
+
+        Args:
+            tool_name: Name of the tool producing the output
+            source: Identifier of the output source (e.g. tmux session name)
+            output: New output since the previous call
+            final: Whether the source finished; pending output is flushed and a
+                chunk with "final" set is always sent, even if empty or capped
+
+        Returns:
+            True if a chunk was published
+        """
+        if self.closed:
+            return False
+        published_chars = self._published_chars.get(source, 0)
+        pending = self._pending.get(source, "") + (output or "")
+        now = time.monotonic()
+        # A final call always publishes, even with nothing pending, so clients learn the source ended
+        if not final and (published_chars >= self.max_total_chars or not pending
+                          or now - self._last_published.get(source, 0) < self.min_interval):
+            self._pending[source] = pending
+            return False
+
+        self._pending[source] = ""
+        if published_chars >= self.max_total_chars:
+            pending = ""
+        truncated = len(pending) > self.max_chunk_chars
+        chunk = pending[-self.max_chunk_chars:] if truncated else pending
+        remaining = self.max_total_chars - published_chars
+        capped = len(chunk) >= remaining
+        chunk = chunk[:remaining]
+
+        now_iso = datetime.now(timezone.utc).isoformat()
+        message = {
+            "message_id": None, "thread_id": self.thread_id, "type": "status", "is_llm_message": False,
+            "content": json.dumps({
+                "role": "assistant", "status_type": "tool_output_chunk",
+                "function_name": tool_name, "source": source,
+                "output": chunk, "truncated": truncated, "capped": capped, "final": final
+            }),
+            "metadata": json.dumps({"agent_run_id": self.agent_run_id}),
+            "created_at": now_iso, "updated_at": now_iso
+        }
+        try:
+            await redis.rpush(self.response_list_key, json.dumps(message))
+            await redis.publish(self.response_channel, "new")
+        except Exception as e:
+            logger.warning(f"Failed to publish tool output chunk for {source}: {str(e)}")
+            return False
+
+        self._last_published[source] = now
+        self._published_chars[source] = published_chars + len(chunk)
+        if capped:
+            logger.info(f"Tool output stream for {source} reached its cap of {self.max_total_chars} characters")
+        return True
+
+    def close(self) -> None:
+        """Stop publishing; called when the agent run ends."""
+        self.closed = True
+        self._pending.clear()
+
+    def reset(self, source: str) -> None:
+        """Forget the state of a finished source."""
+        self._pending.pop(source, None)
+        self._last_published.pop(source, None)
+        self._published_chars.pop(source, None)
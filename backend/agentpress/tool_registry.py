@@ -1,5 +1,6 @@
+import json
 from typing import Dict, Type, Any, List, Optional, Callable
-from agentpress.tool import Tool, SchemaType
+from agentpress.tool import Tool, SchemaType, ToolSchema
 from utils.logger import logger
 
 
@@ -12,12 +13,15 @@ class ToolRegistry:
     Attributes:
         tools (Dict[str, Dict[str, Any]]): OpenAPI-style tools and schemas
         xml_tools (Dict[str, Dict[str, Any]]): XML-style tools and schemas
+        version (int): Counter bumped on every registration, used to memoize derived data
         
     Methods:
         register_tool: Register a tool with optional function filtering
+        register_openapi_function: Register a single OpenAPI function on an existing instance
         get_tool: Get a specific tool by name
         get_xml_tool: Get a tool by XML tag name
         get_openapi_schemas: Get OpenAPI schemas for function calling
+        get_openapi_schemas_json: Get the serialized OpenAPI schemas
         get_xml_examples: Get examples of XML tool usage
     """
     
@@ -25,7 +29,23 @@ class ToolRegistry:
         """Initialize a new ToolRegistry instance."""
         self.tools = {}
         self.xml_tools = {}
+        self.version = 0
+        self._memo: Dict[str, Any] = {} # name -> (version, value)
         logger.debug("Initialized new ToolRegistry instance")
+
+    def _bump_version(self) -> None:
+        """Invalidate memoized data after a registration change."""
+        self.version += 1
+        logger.debug(f"ToolRegistry version bumped to {self.version}")
+
+    def _get_memoized(self, name: str, build: Callable[[], Any]) -> Any:
+        """Return a memoized value for the current registry version, building it if stale."""
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        value = build()
+        self._memo[name] = (self.version, value)
+        return value
     
     def register_tool(self, tool_class: Type[Tool], function_names: Optional[List[str]] = None, **kwargs):
         """Register a tool with optional function filtering.
@@ -68,14 +88,39 @@ class ToolRegistry:
                         registered_xml += 1
                         logger.debug(f"Registered XML tag {schema.xml_schema.tag_name} -> {func_name} from {tool_class.__name__}")
         
+        self._bump_version()
         logger.debug(f"Tool registration complete for {tool_class.__name__}: {registered_openapi} OpenAPI functions, {registered_xml} XML tags")
 
+    def register_openapi_function(self, func_name: str, tool_instance: Tool, schema: ToolSchema) -> None:
+        """Register a single OpenAPI function provided by an already created tool instance.
+
+        Used for tools that create their functions dynamically after initialization
+        (e.g. MCP tools).
+
+        Args:
+            func_name: Name of the function on the tool instance
+            tool_instance: The tool instance providing the function
+            schema: The OpenAPI schema of the function
+        """
+        self.tools[func_name] = {
+            "instance": tool_instance,
+            "schema": schema
+        }
+        self._bump_version()
+        logger.debug(f"Registered OpenAPI function {func_name} from {tool_instance.__class__.__name__}")
+
     def get_available_functions(self) -> Dict[str, Callable]:
         """Get all available tool functions.
         
+        The mapping is memoized per registry version.
+        
         Returns:
             Dict mapping function names to their implementations
         """
+        return self._get_memoized("available_functions", self._build_available_functions)
+
+    def _build_available_functions(self) -> Dict[str, Callable]:
+        """Build the mapping of function names to their implementations."""
         available_functions = {}
         
         # Get OpenAPI tool functions
@@ -126,17 +171,28 @@ class ToolRegistry:
     def get_openapi_schemas(self) -> List[Dict[str, Any]]:
         """Get OpenAPI schemas for function calling.
         
+        The list is memoized per registry version and shared between callers,
+        so it must not be mutated.
+        
         Returns:
             List of OpenAPI-compatible schema definitions
         """
-        schemas = [
+        schemas = self._get_memoized("openapi_schemas", lambda: [
             tool_info['schema'].schema 
             for tool_info in self.tools.values()
             if tool_info['schema'].schema_type == SchemaType.OPENAPI
-        ]
-        logger.debug(f"Retrieved {len(schemas)} OpenAPI schemas")
+        ])
+        logger.debug(f"Retrieved {len(schemas)} OpenAPI schemas (registry version {self.version})")
         return schemas
 
+    def get_openapi_schemas_json(self) -> str:
+        """Get the OpenAPI schemas serialized as JSON.
+        
+        Returns:
+            JSON string of the schema list, memoized per registry version
+        """
+        return self._get_memoized("openapi_schemas_json", lambda: json.dumps(self.get_openapi_schemas(), default=str))
+
     def get_xml_examples(self) -> Dict[str, str]:
         """Get all XML tag examples.
         
@@ -0,0 +1,177 @@
+"""
+Redis-backed result cache for idempotent tools.
+
+Tools opt in with the cache_policy decorator. Successful results are stored
+under a key derived from the function name and the policy's key fields, expire
+after the policy TTL and are bounded per tool, so repeated searches, scrapes
+and data provider calls across runs are served without hitting the upstream API.
+"""
+
+import json
+import time
+import hashlib
+from typing import Dict, Any, Optional
+
+from agentpress.tool import ToolResult, ToolCachePolicy
+from services import redis
+from utils.logger import logger
+
+class ToolResultCache:
+    """Caches successful tool results in Redis according to each tool's policy.
+
+    Every cached key is also tracked in a per-tool sorted set scored by insertion
+    time; once a tool holds more than max_entries_per_tool results the oldest ones
+    are evicted. Redis failures never fail a tool call, the tool simply runs.
+
+    Attributes:
+        prefix (str): Prefix of every Redis key written by the cache
+        max_entries_per_tool (int): Maximum number of cached results kept per tool
+        hits (Dict[str, int]): Cache hits per function name in this process
+        misses (Dict[str, int]): Cache misses per function name in this process
+    """
+
+    def __init__(self, prefix: str = "tool_cache", max_entries_per_tool: int = 1000):
+        """Initialize the cache.
+
+        Args:
+            prefix: Prefix of every Redis key written by the cache
+            max_entries_per_tool: Maximum number of cached results kept per tool
+        """
+        self.prefix = prefix
+        self.max_entries_per_tool = max_entries_per_tool
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def _normalize_value(value: Any) -> Any:
+        """Normalize an argument so equivalent calls map to the same key."""
+        if isinstance(value, str):
+            value = value.strip()
+            # Payloads arrive either as JSON strings or already parsed
+            if value[:1] in ("{", "["):
+                try:
+                    return json.loads(value)
+                except json.JSONDecodeError:
+                    pass
+        return value
+
+    def make_key(self, function_name: str, arguments: Dict[str, Any], policy: ToolCachePolicy) -> str:
+        """Build the Redis key for a tool call."""
+        fields = policy.key_fields if policy.key_fields is not None else sorted(arguments.keys())
+        key_args = {field: self._normalize_value(arguments.get(field)) for field in fields}
+        digest = hashlib.sha256(
+            json.dumps(key_args, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        return f"{self.prefix}:{function_name}:{digest}"
+
+    def _index_key(self, function_name: str) -> str:
+        return f"{self.prefix}_index:{function_name}"
+
+    def _record(self, function_name: str, hit: bool) -> float:
+        """Count a lookup and return the tool's hit rate in this process."""
+        counter = self.hits if hit else self.misses
+        counter[function_name] = counter.get(function_name, 0) + 1
+        return self.hit_rate(function_name)
+
+    def hit_rate(self, function_name: str) -> float:
+        """Return the hit rate of a tool in this process."""
+        hits = self.hits.get(function_name, 0)
+        total = hits + self.misses.get(function_name, 0)
+        return (hits / total) if total else 0.0
+
+    async def get(
+        self,
+        function_name: str,
+        arguments: Dict[str, Any],
+        policy: ToolCachePolicy
+    ) -> Optional[ToolResult]:
+        """Return the cached result of a tool call, or None on a miss.
+
+        Args:
+            function_name: Name of the tool function
+            arguments: Arguments the tool is called with
+            policy: Cache policy declared on the tool
+
+        Returns:
+            The cached ToolResult, or None if nothing usable is cached
+        """
+        key = self.make_key(function_name, arguments, policy)
+        try:
+            cached = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Tool cache lookup failed for {function_name}: {str(e)}")
+            return None
+
+        result = None
+        if cached:
+            try:
+                data = json.loads(cached)
+                result = ToolResult(success=data["success"], output=data["output"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning(f"Discarding malformed tool cache entry {key}")
+
+        hit_rate = self._record(function_name, result is not None)
+        logger.debug(
+            f"Tool cache {'hit' if result is not None else 'miss'} for {function_name} "
+            f"(hit rate {hit_rate:.1%})"
+        )
+        return result
+
+    async def set(
+        self,
+        function_name: str,
+        arguments: Dict[str, Any],
+        policy: ToolCachePolicy,
+        result: ToolResult
+    ) -> bool:
+        """Store a successful tool result.
+
+        Args:
+            function_name: Name of the tool function
+            arguments: Arguments the tool was called with
+            policy: Cache policy declared on the tool
+            result: Result returned by the tool
+
+        Returns:
+            True if the result was stored
+        """
+        if not result.success:
+            return False
+
+        output = result.output if isinstance(result.output, str) else json.dumps(result.output, default=str)
+        payload = json.dumps({"success": result.success, "output": output})
+        size = len(payload.encode('utf-8'))
+        if size > policy.max_result_bytes:
+            logger.debug(f"Not caching {function_name} result: {size} bytes exceeds {policy.max_result_bytes}")
+            return False
+
+        key = self.make_key(function_name, arguments, policy)
+        index_key = self._index_key(function_name)
+        try:
+            await redis.set(key, payload, ex=policy.ttl)
+            await redis.zadd(index_key, {key: time.time()})
+            await redis.expire(index_key, max(policy.ttl, redis.REDIS_KEY_TTL))
+
+            overflow = await redis.zcard(index_key) - self.max_entries_per_tool
+            if overflow > 0:
+                for evicted_key, _ in await redis.zpopmin(index_key, overflow):
+                    await redis.delete(evicted_key)
+                logger.debug(f"Evicted {overflow} cached results for {function_name}")
+            return True
+        except Exception as e:
+            logger.warning(f"Tool cache store failed for {function_name}: {str(e)}")
+            return False
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-tool hit/miss counts and hit rates for this process."""
+        return {
+            function_name: {
+                "hits": self.hits.get(function_name, 0),
+                "misses": self.misses.get(function_name, 0),
+                "hit_rate": self.hit_rate(function_name)
+            }
+            for function_name in sorted(set(self.hits) | set(self.misses))
+        }
+
+# Process-wide cache shared by all response processors
+tool_result_cache = ToolResultCache()
@@ -0,0 +1,193 @@
+"""
+Dependency-aware scheduling of batched tool calls.
+
+Each call's read/write resources are resolved from the tool_resources metadata
+declared on the tool. A call waits only for earlier calls it conflicts with (a
+write overlapping a read or write of the other), so independent calls such as
+several web searches run concurrently while a create_file still completes before
+the execute_command that follows it. Results stay attached to their calls, and
+callers persist them in the order the model emitted them.
+"""
+
+import json
+import asyncio
+import string
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Set, Tuple, Callable, Awaitable
+
+from agentpress.tool import ToolResult, ToolResourceSpec
+from agentpress.tool_registry import ToolRegistry
+from utils.files_utils import clean_path
+from utils.logger import logger
+
+# A resolved resource: (kind, path). An empty path covers the whole kind.
+Resource = Tuple[str, str]
+
+@dataclass
+class ResolvedResources:
+    """Concrete resources touched by one tool call.
+
+    Attributes:
+        reads (Set[Resource]): Resources the call only reads
+        writes (Set[Resource]): Resources the call modifies
+        exclusive (bool): Whether the call conflicts with every other call
+    """
+    reads: Set[Resource] = field(default_factory=set)
+    writes: Set[Resource] = field(default_factory=set)
+    exclusive: bool = False
+
+def _resources_overlap(a: Resource, b: Resource) -> bool:
+    """Check whether two resources refer to overlapping targets."""
+    if a[0] != b[0]:
+        return False
+    if not a[1] or not b[1] or a[1] == b[1]:
+        return True
+    # Paths overlap when one is a directory containing the other
+    return a[1].startswith(b[1].rstrip('/') + '/') or b[1].startswith(a[1].rstrip('/') + '/')
+
+def _any_overlap(left: Set[Resource], right: Set[Resource]) -> bool:
+    return any(_resources_overlap(a, b) for a in left for b in right)
+
+def conflicts(a: ResolvedResources, b: ResolvedResources) -> bool:
+    """Check whether two calls must not run at the same time."""
+    if a.exclusive or b.exclusive:
+        return True
+    return (
+        _any_overlap(a.writes, b.reads | b.writes) or
+        _any_overlap(b.writes, a.reads)
+    )
+
+def resolve_resource(template: str, arguments: Dict[str, Any]) -> Resource:
+    """Fill a "kind:path" resource template from call arguments.
+
+    If any placeholder has no value the path is left empty, which covers every
+    resource of that kind.
+    """
+    kind, _, path_template = template.partition(':')
+    field_names = [name for _, name, _, _ in string.Formatter().parse(path_template) if name]
+    values = {name: arguments.get(name) for name in field_names}
+    if any(value is None or value == "" for value in values.values()):
+        return kind, ""
+
+    path = path_template.format(**{name: str(value) for name, value in values.items()})
+    if kind == "file":
+        path = clean_path(path).rstrip('/')
+        if path == ".":
+            path = ""
+    return kind, path
+
+class ToolScheduler:
+    """Runs tool calls concurrently while respecting their resource conflicts.
+
+    Calls are submitted in model-emitted order; each submitted call starts once
+    every earlier conflicting call has finished. One scheduler covers one batch
+    of calls (one assistant response).
+
+    Attributes:
+        tool_registry (ToolRegistry): Registry used to look up tool metadata
+        execute (Callable): Coroutine function executing a single tool call
+    """
+
+    def __init__(
+        self,
+        tool_registry: ToolRegistry,
+        execute: Callable[[Dict[str, Any]], Awaitable[ToolResult]]
+    ):
+        """Initialize an empty schedule.
+
+        Args:
+            tool_registry: Registry used to look up tool metadata
+            execute: Coroutine function executing a single tool call
+        """
+        self.tool_registry = tool_registry
+        self.execute = execute
+        self._submitted: List[Tuple[ResolvedResources, asyncio.Task]] = []
+        self.dependency_count = 0
+
+    def resolve(self, tool_call: Dict[str, Any]) -> ResolvedResources:
+        """Resolve the resources touched by a tool call."""
+        tool_fn = self.tool_registry.get_available_functions().get(tool_call.get("function_name"))
+        spec: ToolResourceSpec = getattr(tool_fn, 'tool_resources', None)
+        if spec is None:
+            return ResolvedResources(exclusive=True)
+
+        arguments = tool_call.get("arguments") or {}
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except json.JSONDecodeError:
+                arguments = {}
+        if not isinstance(arguments, dict):
+            arguments = {}
+
+        return ResolvedResources(
+            reads={resolve_resource(template, arguments) for template in spec.reads},
+            writes={resolve_resource(template, arguments) for template in spec.writes}
+        )
+
+    async def _run_after(self, dependencies: List[asyncio.Task], tool_call: Dict[str, Any]) -> ToolResult:
+        if dependencies:
+            # Failed dependencies still release their dependents
+            await asyncio.wait(dependencies)
+        return await self.execute(tool_call)
+
+    def submit(self, tool_call: Dict[str, Any]) -> asyncio.Task:
+        """Schedule a tool call after every earlier call it conflicts with.
+
+        Args:
+            tool_call: Tool call to execute
+
+        Returns:
+            Task resolving to the call's ToolResult
+        """
+        resources = self.resolve(tool_call)
+        dependencies = [
+            task for earlier, task in self._submitted
+            if not task.done() and conflicts(earlier, resources)
+        ]
+        self.dependency_count += len(dependencies)
+        if dependencies:
+            logger.debug(f"Tool {tool_call.get('function_name')} waits for {len(dependencies)} earlier call(s)")
+
+        task = asyncio.create_task(self._run_after(dependencies, tool_call))
+        self._submitted.append((resources, task))
+        return task
+
+    def cancel(self) -> int:
+        """Cancel every submitted call that has not finished yet.
+
+        Returns:
+            Number of calls cancelled
+        """
+        cancelled = 0
+        for _, task in self._submitted:
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} scheduled tool calls")
+        return cancelled
+
+    async def run(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
+        """Execute a batch of tool calls and return results in submission order.
+
+        Args:
+            tool_calls: Tool calls in model-emitted order
+
+        Returns:
+            List of tuples containing the original tool call and its result
+        """
+        tasks = [self.submit(tool_call) for tool_call in tool_calls]
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+        processed_results = []
+        for tool_call, result in zip(tool_calls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error executing tool {tool_call.get('function_name', 'unknown')}: {str(result)}")
+                result = ToolResult(success=False, output=f"Error executing tool: {str(result)}")
+            processed_results.append((tool_call, result))
+        return processed_results
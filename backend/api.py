@@ -18,6 +18,9 @@ from pydantic import BaseModel
 # Import the agent API module
 from agent import api as agent_api
 from sandbox import api as sandbox_api
+from sandbox.executor import sandbox_executor
+from sandbox.api_client import sandbox_api_client
+from sandbox.pool import get_sandbox_pool
 from services import billing as billing_api
 from flags import api as feature_flags_api
 from services import transcription as transcription_api
@@ -64,12 +67,21 @@ async def lifespan(app: FastAPI):
         # Start background tasks
         # asyncio.create_task(agent_api.restore_running_agent_runs())
         
+        # Keep warm sandboxes ready for new projects (SANDBOX_POOL_SIZE > 0)
+        sandbox_pool = get_sandbox_pool()
+        if sandbox_pool:
+            sandbox_pool.start()
+        
         yield
         
         # Clean up agent resources
         logger.info("Cleaning up agent resources")
         await agent_api.cleanup()
         
+        # Stop pool maintenance before Redis closes; pooled sandboxes stay for the next start
+        if sandbox_pool:
+            await sandbox_pool.stop()
+        
         # Clean up Redis connection
         try:
             logger.info("Closing Redis connection")
@@ -78,6 +90,10 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing Redis connection: {e}")
         
+        # Close the pooled connections to sandbox APIs, then stop the sandbox SDK thread pool
+        await sandbox_api_client.aclose()
+        sandbox_executor.shutdown()
+        
         # Clean up database connection
         logger.info("Disconnecting from database")
         await db.disconnect()
@@ -156,7 +172,8 @@ async def health_check():
         "status": "ok", 
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "instance_id": instance_id,
-        "environment": config.ENV_MODE.value
+        "environment": config.ENV_MODE.value,
+        "sandbox_calls": sandbox_executor.get_stats()
     }
 
 class AutoConfirmUserRequest(BaseModel):
@@ -10,16 +10,37 @@ from utils.logger import logger
 import dramatiq
 import uuid
 from agentpress.thread_manager import ThreadManager
+from agentpress.tool_output_stream import ToolOutputStream
 from services.supabase import DBConnection
 from services import redis
 from dramatiq.brokers.rabbitmq import RabbitmqBroker
+from dramatiq.asyncio import get_event_loop_thread
+from sandbox.api_client import sandbox_api_client
 import os
 from services.langfuse import langfuse
 from utils.retry import retry
 
 rabbitmq_host = os.getenv('RABBITMQ_HOST', 'rabbitmq')
 rabbitmq_port = int(os.getenv('RABBITMQ_PORT', 5672))
-rabbitmq_broker = RabbitmqBroker(host=rabbitmq_host, port=rabbitmq_port, middleware=[dramatiq.middleware.AsyncIO()])
+
+class SandboxApiClientShutdown(dramatiq.Middleware):
+    """Close the sandbox API client's pooled connections when the worker stops."""
+
+    def after_worker_shutdown(self, broker, worker):
+        # After hooks run in reverse middleware order, so the event loop thread is still up
+        event_loop_thread = get_event_loop_thread()
+        if event_loop_thread is None:
+            return
+        try:
+            event_loop_thread.run_coroutine(sandbox_api_client.aclose())
+        except Exception as e:
+            logger.warning(f"Failed to close sandbox API client: {e}")
+
+rabbitmq_broker = RabbitmqBroker(
+    host=rabbitmq_host,
+    port=rabbitmq_port,
+    middleware=[dramatiq.middleware.AsyncIO(), SandboxApiClientShutdown()]
+)
 dramatiq.set_broker(rabbitmq_broker)
 
 _initialized = False
@@ -128,6 +149,8 @@ async def run_agent_background(
             stop_signal_received = True # Stop the run if the checker fails
 
     trace = langfuse.trace(name="agent_run", id=agent_run_id, session_id=thread_id, metadata={"project_id": project_id, "instance_id": instance_id})
+    # Live tool output (e.g. shell commands) goes through the same response list
+    tool_output_stream = ToolOutputStream(agent_run_id, thread_id=thread_id)
     try:
         # Setup Pub/Sub listener for control signals
         pubsub = await redis.create_pubsub()
@@ -153,7 +176,8 @@ async def run_agent_background(
             agent_config=agent_config,
             trace=trace,
             is_agent_builder=is_agent_builder,
-            target_agent_id=target_agent_id
+            target_agent_id=target_agent_id,
+            tool_output_stream=tool_output_stream
         )
 
         final_status = "running"
@@ -247,6 +271,9 @@ async def run_agent_background(
 
     finally:
         # Cleanup stop checker task
+        # Stop streaming tool output once the run is over
+        tool_output_stream.close()
+
         if stop_checker and not stop_checker.done():
             stop_checker.cancel()
             try: await stop_checker
@@ -7,6 +7,7 @@ from fastapi.responses import Response
 from pydantic import BaseModel
 
 from sandbox.sandbox import get_or_start_sandbox, delete_sandbox
+from sandbox.executor import sandbox_executor
 from utils.logger import logger
 from utils.auth_utils import get_optional_user_id
 from services.supabase import DBConnection
@@ -166,7 +167,7 @@ async def create_file(
         content = await file.read()
         
         # Create file using raw binary content
-        sandbox.fs.upload_file(content, path)
+        await sandbox_executor.run(sandbox.fs.upload_file, content, path)
         logger.info(f"File created at {path} in sandbox {sandbox_id}")
         
         return {"status": "success", "created": True, "path": path}
@@ -196,7 +197,7 @@ async def list_files(
         sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
         
         # List files
-        files = sandbox.fs.list_files(path)
+        files = await sandbox_executor.run(sandbox.fs.list_files, path)
         result = []
         
         for file in files:
@@ -246,7 +247,7 @@ async def read_file(
         
         # Read file directly - don't check existence first with a separate call
         try:
-            content = sandbox.fs.download_file(path)
+            content = await sandbox_executor.run(sandbox.fs.download_file, path)
         except Exception as download_err:
             logger.error(f"Error downloading file {path} from sandbox {sandbox_id}: {str(download_err)}")
             raise HTTPException(
@@ -297,7 +298,7 @@ async def delete_file(
         sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
         
         # Delete file
-        sandbox.fs.delete_file(path)
+        await sandbox_executor.run(sandbox.fs.delete_file, path)
         logger.info(f"File deleted at {path} in sandbox {sandbox_id}")
         
         return {"status": "success", "deleted": True, "path": path}
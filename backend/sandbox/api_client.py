@@ -0,0 +1,193 @@
+"""
+Direct HTTP channel to APIs served inside sandboxes.
+
+Tools used to reach in-sandbox services (the browser automation API on port
+8003) by running curl through sandbox.process.exec. That costs a process spawn
+and a Daytona exec round trip per call, needs shell quoting of JSON bodies, and
+pushes large responses such as base64 screenshots through exec stdout. The
+client calls the service through the sandbox's preview link instead, over one
+pooled keep-alive httpx.AsyncClient (HTTP/2 when the h2 package is installed),
+and streams response bodies under a size cap.
+
+Callers fall back to exec when the direct channel is unavailable, which is
+signalled with SandboxApiUnavailable. It is only raised when the request cannot
+have reached the service, so falling back never runs an action twice.
+"""
+
+import json
+import time
+import asyncio
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+from sandbox.executor import sandbox_executor
+from utils.logger import logger
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Largest response body read from a sandbox API
+MAX_RESPONSE_BYTES = 32 * 1024 * 1024
+# Seconds a resolved preview link is reused
+ENDPOINT_TTL = 600
+# Seconds a sandbox port stays on the exec fallback after the direct channel failed
+UNAVAILABLE_BACKOFF = 300
+# Statuses returned by the preview proxy when it cannot reach the sandbox service
+GATEWAY_STATUSES = {502, 503, 504}
+
+class SandboxApiUnavailable(Exception):
+    """The direct channel cannot be used; the request did not reach the sandbox service."""
+
+@dataclass
+class SandboxEndpoint:
+    """Resolved preview link of a sandbox port.
+
+    Attributes:
+        base_url (str): Public URL forwarding to the port
+        token (Optional[str]): Preview access token, if the sandbox is private
+        resolved_at (float): Monotonic time of the lookup
+    """
+    base_url: str
+    token: Optional[str]
+    resolved_at: float
+
+class SandboxApiClient:
+    """Pooled HTTP client for services running inside sandboxes.
+
+    Attributes:
+        requests (int): Requests sent over the direct channel
+        failures (int): Requests that could not use the direct channel
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20):
+        """Initialize the client; the connection pool is created on first use.
+
+        Args:
+            max_connections: Maximum open connections across all sandboxes
+            max_keepalive_connections: Idle connections kept alive for reuse
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.requests = 0
+        self.failures = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._endpoints: Dict[Tuple[str, int], SandboxEndpoint] = {}
+        self._unavailable: Dict[Tuple[str, int], float] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        # Connections are bound to the loop that opened them
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(limits=self.limits, http2=HTTP2_AVAILABLE)
+            self._loop = loop
+        return self._client
+
+    async def _endpoint(self, sandbox: Any, port: int) -> SandboxEndpoint:
+        key = (sandbox.id, port)
+        endpoint = self._endpoints.get(key)
+        if endpoint and time.monotonic() - endpoint.resolved_at < ENDPOINT_TTL:
+            return endpoint
+
+        link = await sandbox_executor.run(sandbox.get_preview_link, port, timeout=30)
+        url = link.url if hasattr(link, 'url') else str(link).split("url='")[1].split("'")[0]
+        endpoint = SandboxEndpoint(
+            base_url=url.rstrip("/"),
+            token=getattr(link, 'token', None),
+            resolved_at=time.monotonic()
+        )
+        self._endpoints[key] = endpoint
+        return endpoint
+
+    def _mark_unavailable(self, key: Tuple[str, int], reason: str) -> None:
+        self.failures += 1
+        self._unavailable[key] = time.monotonic()
+        self._endpoints.pop(key, None)
+        logger.info(f"Direct channel to sandbox {key[0]} port {key[1]} unavailable ({reason}), using exec")
+
+    async def request_json(
+        self,
+        sandbox: Any,
+        port: int,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        timeout: float = 30
+    ) -> Tuple[int, Any]:
+        """Call a JSON API inside a sandbox.
+
+        Args:
+            sandbox: Started sandbox
+            port: Port of the service inside the sandbox
+            method: HTTP method
+            path: Request path, e.g. "/api/automation/navigate_to"
+            params: Query parameters
+            json_body: JSON request body
+            timeout: Seconds allowed for the whole request
+
+        Returns:
+            Tuple of HTTP status and decoded JSON body (None if the body is not JSON)
+
+        Raises:
+            SandboxApiUnavailable: If the request did not reach the service
+            httpx.HTTPError: If the request failed after it may have reached the service
+        """
+        key = (sandbox.id, port)
+        failed_at = self._unavailable.get(key)
+        if failed_at and time.monotonic() - failed_at < UNAVAILABLE_BACKOFF:
+            raise SandboxApiUnavailable("direct channel recently failed")
+
+        try:
+            endpoint = await self._endpoint(sandbox, port)
+        except Exception as e:
+            self._mark_unavailable(key, f"no preview link: {e}")
+            raise SandboxApiUnavailable(str(e))
+
+        headers = {"X-Daytona-Skip-Preview-Warning": "true"}
+        if endpoint.token:
+            headers["X-Daytona-Preview-Token"] = endpoint.token
+
+        self.requests += 1
+        try:
+            async with self.client.stream(
+                method, f"{endpoint.base_url}{path}", params=params, json=json_body,
+                headers=headers, timeout=httpx.Timeout(timeout, connect=10)
+            ) as response:
+                if response.status_code in GATEWAY_STATUSES:
+                    self._mark_unavailable(key, f"gateway status {response.status_code}")
+                    raise SandboxApiUnavailable(f"gateway status {response.status_code}")
+                if response.headers.get("content-type", "").startswith("text/html"):
+                    # Preview proxy interstitial or login page; the JSON API never serves HTML
+                    self._mark_unavailable(key, "proxy served an HTML page")
+                    raise SandboxApiUnavailable("proxy served an HTML page")
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > MAX_RESPONSE_BYTES:
+                        raise httpx.HTTPError(f"Response from sandbox port {port} exceeds {MAX_RESPONSE_BYTES} bytes")
+                status = response.status_code
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.UnsupportedProtocol) as e:
+            self._mark_unavailable(key, f"{type(e).__name__}: {e}")
+            raise SandboxApiUnavailable(str(e))
+
+        self._unavailable.pop(key, None)
+        try:
+            return status, json.loads(body)
+        except json.JSONDecodeError:
+            return status, None
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+# Process-wide client for sandbox APIs
+sandbox_api_client = SandboxApiClient()
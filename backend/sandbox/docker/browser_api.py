@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Body
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Depends
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
@@ -12,9 +12,19 @@ import os
 import random
 from functools import cached_property
 import traceback
+import time
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import contextvars
+import uuid
+import re
+from urllib.parse import urlparse
 import pytesseract
 from PIL import Image
 import io
+from file_edit_api import router as file_edit_router
 
 #######################################################
 # Action model definitions
@@ -75,6 +85,348 @@ class DoneAction(BaseModel):
     success: bool = True
     text: str = ""
 
+class OcrAction(BaseModel):
+    screenshot_hash: Optional[str] = None
+
+class ReadPageAction(BaseModel):
+    chunk: int = 1
+    chunk_chars: int = 20000
+
+class OpenManyAction(BaseModel):
+    urls: List[str]
+    context_id: Optional[str] = None
+    keep_open: bool = False
+    max_concurrency: int = 4
+    chunk_chars: int = 5000
+    timeout_ms: int = 90000
+
+class CloseContextAction(BaseModel):
+    context_id: str
+
+#######################################################
+# Screenshot encoding
+#######################################################
+
+# Output format ("jpeg" or "webp"), quality and size limits of action screenshots
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "jpeg").lower()
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "60"))
+SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", "1024"))
+SCREENSHOT_MAX_BYTES = int(os.getenv("SCREENSHOT_MAX_BYTES", str(200 * 1024)))
+# Lowest quality and width tried while fitting a screenshot into the byte budget
+SCREENSHOT_MIN_QUALITY = 30
+SCREENSHOT_MIN_WIDTH = 480
+
+def encode_screenshot(raw: bytes, image_format: str = SCREENSHOT_FORMAT, quality: int = SCREENSHOT_QUALITY,
+                      max_width: int = SCREENSHOT_MAX_WIDTH, max_bytes: int = SCREENSHOT_MAX_BYTES) -> tuple:
+    """Encode a PNG capture as JPEG or WebP within a width limit and byte budget
+    Quality is lowered first, then the image is downscaled, until it fits the budget
+    or the minimums are reached. Returns a tuple of (image_bytes, mime_type)
+    """
+    image_format = image_format if image_format in ("jpeg", "webp") else "jpeg"
+    image = Image.open(io.BytesIO(raw)).convert("RGB")
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format.upper(), quality=quality)
+        encoded = buffer.getvalue()
+        if len(encoded) <= max_bytes:
+            break
+        if quality > SCREENSHOT_MIN_QUALITY:
+            quality = max(SCREENSHOT_MIN_QUALITY, quality - 15)
+        elif image.width * 3 // 4 >= SCREENSHOT_MIN_WIDTH:
+            image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+        else:
+            break
+    return encoded, f"image/{image_format}"
+
+#######################################################
+# Page settling
+#######################################################
+
+# Upper bound of the wait for a page to settle after an action, and after a navigation
+SETTLE_TIMEOUT_MS = 5000
+NAVIGATION_SETTLE_TIMEOUT_MS = 10000
+# Quiet periods that count as settled: no requests in flight, no DOM mutations
+NETWORK_QUIET_MS = 300
+DOM_QUIET_MS = 250
+# Requests pending longer than this (long polling, streaming) do not hold the network wait
+LONG_REQUEST_MS = 3000
+# Fixed sleeps the settle waits replaced, to report the time saved per action
+STATE_SETTLE_BASELINE_MS = 500
+INTERACTION_SETTLE_BASELINE_MS = 1500
+
+DOM_QUIET_SCRIPT = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    let quietTimer;
+    const finish = (settled) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(hardTimer);
+        resolve(settled);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    const hardTimer = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+#######################################################
+# Request interception
+#######################################################
+
+# Ad and tracker domains blocked by default; subdomains match too
+DEFAULT_BLOCKED_DOMAINS = [
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "connect.facebook.net",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "taboola.com", "outbrain.com", "scorecardresearch.com",
+    "quantserve.com", "hotjar.com", "segment.io", "mixpanel.com", "newrelic.com", "nr-data.net"
+]
+
+def env_list(name: str, default: str) -> set:
+    return {item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()}
+
+# File extensions of the blockable resource types; URLs are matched by extension because
+# Chromium's URL blocklist cannot see resource types
+RESOURCE_TYPE_EXTENSIONS = {
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "ogv", "ogg", "mov", "m4v", "mp3", "m4a", "wav", "flac", "aac", "m3u8", "mpd"],
+}
+
+# Interception profile: set BROWSER_INTERCEPTION=false to load every resource
+INTERCEPTION_ENABLED = os.getenv("BROWSER_INTERCEPTION", "true").lower() != "false"
+BLOCKED_RESOURCE_TYPES = env_list("BROWSER_BLOCK_RESOURCE_TYPES", "media,font")
+BLOCKED_DOMAINS = env_list("BROWSER_BLOCK_DOMAINS", ",".join(DEFAULT_BLOCKED_DOMAINS))
+# Images larger than this are replaced by a placeholder (0 disables the check). Checking sizes needs
+# Playwright request routing, which turns off the HTTP cache of the whole browser context.
+MAX_IMAGE_BYTES = int(os.getenv("BROWSER_MAX_IMAGE_BYTES", "0"))
+# 1x1 transparent GIF
+PLACEHOLDER_IMAGE = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+def blocked_url_patterns() -> List[str]:
+    """Chromium URL blocklist patterns for the blocked domains and resource types"""
+    patterns = []
+    for domain in sorted(BLOCKED_DOMAINS):
+        patterns += [f"*://{domain}/*", f"*://*.{domain}/*"]
+    for resource_type in sorted(BLOCKED_RESOURCE_TYPES):
+        for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, []):
+            patterns += [f"*.{extension}", f"*.{extension}?*"]
+    return patterns
+
+# Blocking uses Chromium's URL blocklist instead of request routing, so the HTTP cache keeps working
+BLOCKED_URL_PATTERNS = blocked_url_patterns() if INTERCEPTION_ENABLED else []
+
+def url_pattern_matches(pattern: str, url: str) -> bool:
+    """Whether a URL blocklist pattern, where "*" matches any characters, matches the URL"""
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), url) is not None
+
+def document_blocked_url_patterns(url: Optional[str]) -> List[str]:
+    """URL blocklist of a page showing the given document.
+
+    Chromium applies the blocklist to main-frame navigations too, so the patterns that match
+    the document itself are left out; documents are never blocked, only their subresources.
+    """
+    if not url:
+        return BLOCKED_URL_PATTERNS
+    if not urlparse(url).path:
+        url += "/"
+    return [pattern for pattern in BLOCKED_URL_PATTERNS if not url_pattern_matches(pattern, url)]
+
+def is_blocked_domain(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+def blocked_resource_type(request) -> str:
+    """Blocked resource type of a request blocked by the URL blocklist, by resource type or extension"""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return request.resource_type
+    extension = urlparse(request.url).path.rsplit(".", 1)[-1].lower()
+    for resource_type, extensions in RESOURCE_TYPE_EXTENSIONS.items():
+        if extension in extensions:
+            return resource_type
+    return request.resource_type
+
+def new_interception_stats() -> Dict[str, Any]:
+    return {"requests": 0, "blocked": 0, "blocked_by_type": {}, "blocked_by_domain": 0,
+            "oversized_images": 0, "oversized_image_bytes": 0}
+
+#######################################################
+# Page to markdown extraction
+#######################################################
+
+# Extracted pages kept, by (URL, DOM hash)
+MARKDOWN_CACHE_SIZE = 20
+
+# FNV-1a hash of the serialized DOM; identical documents give identical hashes
+DOM_HASH_SCRIPT = """
+() => {
+    const html = document.documentElement ? document.documentElement.outerHTML : '';
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < html.length; i++) {
+        hash ^= html.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return (hash >>> 0).toString(16) + ':' + html.length;
+}
+"""
+
+# Readability-style extraction: pick the main content container, drop page chrome, emit markdown
+PAGE_MARKDOWN_SCRIPT = """
+() => {
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'SVG', 'CANVAS', 'IFRAME', 'FORM',
+                          'NAV', 'HEADER', 'FOOTER', 'ASIDE', 'BUTTON', 'SELECT', 'INPUT', 'TEXTAREA']);
+    const BLOCK = new Set(['DIV', 'SECTION', 'ARTICLE', 'MAIN', 'P', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'UL', 'OL',
+                           'LI', 'PRE', 'BLOCKQUOTE', 'TABLE', 'FIGURE', 'DL', 'DETAILS', 'HR']);
+    const CHROME = /(^|[\\s_-])(nav|menu|sidebar|footer|header|cookie|banner|advert|ads|promo|share|social|related|comment)([\\s_-]|$)/i;
+
+    const isHidden = (el) => {
+        const style = window.getComputedStyle(el);
+        return style.display === 'none' || style.visibility === 'hidden';
+    };
+
+    const pickRoot = () => {
+        const explicit = document.querySelector('article, main, [role="main"]');
+        if (explicit && explicit.innerText.trim().length > 500) return explicit;
+        // Otherwise the container with the most paragraph text
+        let best = document.body, bestScore = 0;
+        for (const el of document.querySelectorAll('div, section')) {
+            let score = 0;
+            for (const p of el.querySelectorAll(':scope > p, :scope > * > p')) score += p.innerText.length;
+            if (score > bestScore) { best = el; bestScore = score; }
+        }
+        return bestScore > 500 ? best : document.body;
+    };
+
+    const inline = (node) => {
+        if (node.nodeType === Node.TEXT_NODE) return node.textContent.replace(/\\s+/g, ' ');
+        if (node.nodeType !== Node.ELEMENT_NODE || SKIP.has(node.tagName) || isHidden(node)) return '';
+        const text = Array.from(node.childNodes).map(inline).join('');
+        switch (node.tagName) {
+            case 'A': {
+                const href = node.href;
+                return href && !href.startsWith('javascript:') && text.trim() ? `[${text.trim()}](${href})` : text;
+            }
+            case 'STRONG': case 'B': return text.trim() ? `**${text.trim()}**` : '';
+            case 'EM': case 'I': return text.trim() ? `*${text.trim()}*` : '';
+            case 'CODE': return text.trim() ? '`' + text.trim() + '`' : '';
+            case 'BR': return '\\n';
+            case 'IMG': return node.alt ? `[image: ${node.alt}]` : '';
+            default: return text;
+        }
+    };
+
+    const blocks = [];
+    const block = (node, prefix = '') => {
+        if (node.nodeType === Node.TEXT_NODE) {
+            const text = node.textContent.replace(/\\s+/g, ' ').trim();
+            if (text) blocks.push(prefix + text);
+            return;
+        }
+        if (node.nodeType !== Node.ELEMENT_NODE || SKIP.has(node.tagName) || isHidden(node)) return;
+        if (node !== root && CHROME.test((node.className && node.className.baseVal === undefined ? node.className : '') + ' ' + node.id)) return;
+        const tag = node.tagName;
+        if (/^H[1-6]$/.test(tag)) {
+            const text = inline(node).trim();
+            if (text) blocks.push('#'.repeat(Number(tag[1])) + ' ' + text);
+        } else if (tag === 'P') {
+            const text = inline(node).trim();
+            if (text) blocks.push(prefix + text);
+        } else if (tag === 'UL' || tag === 'OL') {
+            let n = 1;
+            const items = [];
+            for (const li of node.children) {
+                if (li.tagName !== 'LI' || isHidden(li)) continue;
+                const text = inline(li).replace(/\\n+/g, ' ').trim();
+                if (text) items.push((tag === 'OL' ? `${n++}. ` : '- ') + text);
+            }
+            if (items.length) blocks.push(items.join('\\n'));
+        } else if (tag === 'PRE') {
+            blocks.push('```\\n' + node.innerText.replace(/\\n+$/, '') + '\\n```');
+        } else if (tag === 'BLOCKQUOTE') {
+            const text = inline(node).trim();
+            if (text) blocks.push('> ' + text.replace(/\\n/g, '\\n> '));
+        } else if (tag === 'TABLE') {
+            const rows = Array.from(node.rows).map(row =>
+                '| ' + Array.from(row.cells).map(cell => inline(cell).replace(/\\|/g, '\\\\|').replace(/\\s+/g, ' ').trim()).join(' | ') + ' |');
+            if (rows.length) {
+                const columns = node.rows[0].cells.length;
+                rows.splice(1, 0, '|' + ' --- |'.repeat(columns));
+                blocks.push(rows.join('\\n'));
+            }
+        } else {
+            // Consecutive inline children (text, links, emphasis) form one paragraph
+            let run = '';
+            const flush = () => {
+                const text = run.replace(/[^\\S\\n]+/g, ' ').replace(/ *\\n */g, '\\n').trim();
+                if (text) blocks.push(prefix + text);
+                run = '';
+            };
+            for (const child of node.childNodes) {
+                if (child.nodeType === Node.ELEMENT_NODE && (BLOCK.has(child.tagName) || SKIP.has(child.tagName))) {
+                    flush();
+                    block(child, prefix);
+                } else {
+                    run += inline(child);
+                }
+            }
+            flush();
+        }
+    };
+
+    const root = pickRoot();
+    block(root);
+    return {title: document.title, markdown: blocks.join('\\n\\n')};
+}
+"""
+
+def split_markdown(markdown: str, chunk_chars: int) -> List[str]:
+    """Split markdown into chunks of at most chunk_chars, at paragraph boundaries where possible"""
+    chunks, current = [], ""
+    for paragraph in markdown.split("\n\n"):
+        while len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:]
+        if current and len(current) + 2 + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks or [""]
+
+#######################################################
+# Parallel pages
+#######################################################
+
+# Pages loaded at the same time across all open_many batches
+MAX_PARALLEL_PAGES = int(os.getenv("BROWSER_MAX_PARALLEL_PAGES", "4"))
+# Isolated contexts kept open; the least recently used one is closed beyond this
+MAX_ISOLATED_CONTEXTS = 4
+# Upper bound of an open_many batch; pages not loaded by then are reported as failed
+MAX_OPEN_MANY_TIMEOUT_MS = 300000
+# Page targeted by the current request (the page_id query parameter); None means the current tab
+target_page_id: contextvars.ContextVar = contextvars.ContextVar("target_page_id", default=None)
+
+#######################################################
+# OCR worker
+#######################################################
+
+# Screenshots whose OCR text is kept, by screenshot hash
+OCR_CACHE_SIZE = 32
+
+def run_ocr(image_bytes: bytes) -> str:
+    """Extract text from an image; runs in the OCR worker process"""
+    image = Image.open(io.BytesIO(image_bytes))
+    return pytesseract.image_to_string(image).strip()
+
 #######################################################
 # DOM Structure Models
 #######################################################
@@ -245,6 +597,7 @@ class DOMState:
     title: str = ""
     pixels_above: int = 0
     pixels_below: int = 0
+    document_id: str = ""  # Changes when the page loads a new document; element indices are stable within one
 
 #######################################################
 # Browser Action Result Model
@@ -263,11 +616,16 @@ class BrowserActionResult(BaseModel):
     pixels_above: int = 0
     pixels_below: int = 0
     content: Optional[str] = None
-    ocr_text: Optional[str] = None  # Added field for OCR text
+    ocr_text: Optional[str] = None  # Only set by the /automation/ocr endpoint
+    screenshot_hash: Optional[str] = None  # SHA-256 of the screenshot; identical frames have the same hash
+    screenshot_format: Optional[str] = None  # MIME type of screenshot_base64
+    timings: Optional[Dict[str, float]] = None  # Milliseconds spent per step of the action
     
     # Additional metadata
     element_count: int = 0  # Number of interactive elements found
-    interactive_elements: Optional[List[Dict[str, Any]]] = None  # Simplified list of interactive elements
+    interception: Optional[Dict[str, Any]] = None  # Requests of the current page blocked by the interception profile
+    interactive_elements: Optional[List[Dict[str, Any]]] = None  # Interactive elements added or changed since the previous state (all after a refresh)
+    dom_diff: Optional[Dict[str, Any]] = None  # Whether the state is a full refresh, with added/changed counts and removed indices
     viewport_width: Optional[int] = None
     viewport_height: Optional[int] = None
     
@@ -280,7 +638,7 @@ class BrowserActionResult(BaseModel):
 
 class BrowserAutomation:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(dependencies=[Depends(self.action_options)])
         self.browser: Browser = None
         self.browser_context: BrowserContext = None
         self.pages: List[Page] = []
@@ -290,6 +648,43 @@ class BrowserAutomation:
         self.screenshot_dir = os.path.join(os.getcwd(), "screenshots")
         os.makedirs(self.screenshot_dir, exist_ok=True)
         
+        # OCR runs in a worker process so tesseract never blocks the event loop
+        self.ocr_pool: Optional[ProcessPoolExecutor] = None
+        self.ocr_cache: OrderedDict = OrderedDict()
+        self.ocr_pending: Dict[str, asyncio.Future] = {}
+        self.last_screenshot: Optional[str] = None
+        self.last_screenshot_hash: Optional[str] = None
+        self.last_screenshot_format: Optional[str] = None
+        # Last raw PNG capture, read by OCR instead of the lossy encoding, and its SHA-256,
+        # to skip re-encoding unchanged frames
+        self.last_capture: Optional[bytes] = None
+        self.last_capture_hash: Optional[str] = None
+        
+        # Requests in flight per page, with their start time, for the network-quiet wait
+        self.pending_requests: Dict[Page, Dict[Any, float]] = {}
+        
+        # Request interception: statistics per page, CDP sessions that set each page's URL blocklist,
+        # per page the actions in flight that asked for full rendering, and the document each
+        # page's blocklist is computed for
+        self.interception_stats: Dict[Page, Dict[str, Any]] = {}
+        self.cdp_sessions: Dict[Page, Any] = {}
+        self.full_render_pages: Dict[Page, int] = {}
+        self.document_urls: Dict[Page, str] = {}
+        
+        # Isolated contexts opened by open_many, and their kept pages by page ID ("<context_id>:<n>")
+        self.isolated_contexts: OrderedDict = OrderedDict()
+        self.named_pages: Dict[str, Page] = {}
+        # Last page number handed out per context; numbers are never reused, even for failed loads
+        self.page_counters: Dict[str, int] = {}
+        self.page_semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
+        
+        # Markdown of extracted pages, by (URL, DOM hash)
+        self.markdown_cache: OrderedDict = OrderedDict()
+        
+        # Interactive elements last reported, to send only differences; keyed by document
+        self.element_snapshot: Optional[tuple] = None
+        self.last_document_id: str = ""
+        
         # Register routes
         self.router.on_startup.append(self.startup)
         self.router.on_shutdown.append(self.shutdown)
@@ -326,6 +721,16 @@ class BrowserAutomation:
         
         # Drag and drop
         self.router.post("/automation/drag_drop")(self.drag_drop)
+        
+        # On-demand OCR of the current screenshot
+        self.router.post("/automation/ocr")(self.ocr)
+        
+        # Paginated markdown of the current page
+        self.router.post("/automation/read_page")(self.read_page)
+        
+        # Parallel pages in isolated contexts
+        self.router.post("/automation/open_many")(self.open_many)
+        self.router.post("/automation/close_context")(self.close_context)
 
     async def startup(self):
         """Initialize the browser instance on startup"""
@@ -353,6 +758,12 @@ class BrowserAutomation:
                 self.browser_context = await self.browser.new_context(viewport={'width': 1024, 'height': 768})
                 print("Browser launched with minimal options")
 
+            if INTERCEPTION_ENABLED:
+                if MAX_IMAGE_BYTES:
+                    await self.browser_context.route("**/*", self.route_request)
+                print(f"Request interception enabled: types={sorted(BLOCKED_RESOURCE_TYPES)}, "
+                      f"{len(BLOCKED_DOMAINS)} domains, max image bytes={MAX_IMAGE_BYTES or 'unlimited'}")
+
             try:
                 await self.get_current_page()
                 print("Found existing page, using it")
@@ -361,6 +772,8 @@ class BrowserAutomation:
                 print(f"Error finding existing page, creating new one. ( {page_error})")
                 page = await self.browser_context.new_page()
                 print("New page created successfully")
+                self.track_page(page)
+                await self.apply_interception(page)
                 self.pages.append(page)
                 self.current_page_index = 0
                 # Navigate directly to google.com instead of about:blank
@@ -382,20 +795,242 @@ class BrowserAutomation:
             
     async def shutdown(self):
         """Clean up browser instance on shutdown"""
+        for context in list(self.isolated_contexts.values()):
+            await context.close()
+        self.isolated_contexts.clear()
+        self.named_pages.clear()
+        self.page_counters.clear()
         if self.browser_context:
             await self.browser_context.close()
         if self.browser:
             await self.browser.close()
+        if self.ocr_pool:
+            self.ocr_pool.shutdown(wait=False, cancel_futures=True)
+            self.ocr_pool = None
 
     async def handle_page_created(self, page: Page):
         """Handle new page creation"""
-        await asyncio.sleep(0.5)
+        self.track_page(page)
+        await self.apply_interception(page)
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=SETTLE_TIMEOUT_MS)
+        except Exception as e:
+            print(f"New page did not load within {SETTLE_TIMEOUT_MS}ms: {e}")
         self.pages.append(page)
         self.current_page_index = len(self.pages) - 1
         print(f"Page created: {page.url}; current page index: {self.current_page_index}")
     
+    async def action_options(self, full_render: bool = False, page_id: Optional[str] = None):
+        """Per-action options shared by all automation endpoints (query parameters)
+        full_render: load every resource during the action, for screenshots that must look faithful
+        page_id: act on a page kept open by open_many instead of the current tab
+        """
+        # Each request runs in its own context copy, so the target page never leaks into other requests
+        target_page_id.set(page_id)
+        page = None
+        if full_render:
+            # Only the page the action targets loads everything; other pages and contexts keep blocking
+            try:
+                page = await self.get_current_page()
+            except HTTPException:
+                page = None
+        if page is not None:
+            self.full_render_pages[page] = self.full_render_pages.get(page, 0) + 1
+            await self.apply_interception(page)
+        try:
+            yield
+        finally:
+            if page is not None:
+                self.full_render_pages[page] -= 1
+                if not self.full_render_pages[page]:
+                    del self.full_render_pages[page]
+                if not page.is_closed():
+                    await self.apply_interception(page)
+
+    async def apply_interception(self, page: Page):
+        """Set the page's URL blocklist, empty while a full_render action runs on it"""
+        if not BLOCKED_URL_PATTERNS:
+            return
+        try:
+            session = self.cdp_sessions.get(page)
+            if session is None:
+                session = await page.context.new_cdp_session(page)
+                await session.send("Network.enable")
+                self.cdp_sessions[page] = session
+            if self.full_render_pages.get(page):
+                urls = []
+            else:
+                urls = document_blocked_url_patterns(self.document_urls.get(page))
+            await session.send("Network.setBlockedURLs", {"urls": urls})
+        except Exception as e:
+            print(f"Error applying interception profile to {page.url[:100]}: {e}")
+
+    async def allow_document(self, page: Page, url: str) -> bool:
+        """Compute the page's blocklist for a document it is about to show, so the document itself
+        is never blocked. Returns whether the blocklist changed."""
+        previous = self.document_urls.get(page)
+        self.document_urls[page] = url
+        if document_blocked_url_patterns(previous) == document_blocked_url_patterns(url):
+            return False
+        await self.apply_interception(page)
+        return True
+
+    async def retry_blocked_document(self, page: Page, url: str):
+        """Reload a main-frame navigation (link click, redirect, history) the blocklist rejected"""
+        try:
+            # Once its patterns are lifted the document cannot be blocked again, so this never loops
+            await self.allow_document(page, url)
+            if not page.is_closed():
+                await page.goto(url, wait_until="domcontentloaded")
+        except Exception as e:
+            print(f"Error reloading blocked document {url[:100]}: {e}")
+
+    def page_stats(self, page: Page, request) -> Dict[str, Any]:
+        """Interception statistics of the page's current document"""
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            # A new document starts fresh statistics
+            self.interception_stats[page] = new_interception_stats()
+        return self.interception_stats.setdefault(page, new_interception_stats())
+
+    def record_request_failed(self, page: Page, request):
+        """Count requests rejected by the page's URL blocklist"""
+        if "ERR_BLOCKED_BY_CLIENT" not in (request.failure or ""):
+            return
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            # A document navigated to by the page itself; lift the patterns matching it and reload
+            asyncio.create_task(self.retry_blocked_document(page, request.url))
+            return
+        stats = self.interception_stats.setdefault(page, new_interception_stats())
+        stats["blocked"] += 1
+        if is_blocked_domain(request.url):
+            stats["blocked_by_domain"] += 1
+        else:
+            resource_type = blocked_resource_type(request)
+            stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+
+    async def route_request(self, route, request):
+        """Replace oversized images with a placeholder; only routed when BROWSER_MAX_IMAGE_BYTES is set"""
+        try:
+            page = request.frame.page
+        except Exception:
+            page = None
+        
+        try:
+            if request.resource_type != "image" or (page is not None and self.full_render_pages.get(page)):
+                return await route.continue_()
+            
+            response = await route.fetch()
+            body = await response.body()
+            if len(body) > MAX_IMAGE_BYTES:
+                if page is not None:
+                    stats = self.interception_stats.setdefault(page, new_interception_stats())
+                    stats["oversized_images"] += 1
+                    stats["oversized_image_bytes"] += len(body)
+                return await route.fulfill(status=200, content_type="image/gif", body=PLACEHOLDER_IMAGE)
+            return await route.fulfill(response=response, body=body)
+        except Exception as e:
+            # The page may have closed or navigated away while the request was routed
+            print(f"Error routing request {request.url[:100]}: {e}")
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    def track_page(self, page: Page):
+        """Track the requests in flight on a page"""
+        if page in self.pending_requests:
+            return
+        pending = {}
+        self.pending_requests[page] = pending
+        
+        def on_request(request):
+            pending[request] = time.monotonic()
+            self.page_stats(page, request)["requests"] += 1
+            if request.is_navigation_request() and request.frame.parent_frame is None:
+                previous = self.document_urls.get(page)
+                if previous is not None and request.url != previous:
+                    # Leaving an exempted document restores the patterns matching it
+                    asyncio.create_task(self.allow_document(page, request.url))
+        
+        def on_request_failed(request):
+            pending.pop(request, None)
+            self.record_request_failed(page, request)
+        
+        def on_close(_):
+            self.pending_requests.pop(page, None)
+            self.interception_stats.pop(page, None)
+            self.cdp_sessions.pop(page, None)
+            self.document_urls.pop(page, None)
+        
+        page.on("request", on_request)
+        page.on("requestfinished", lambda request: pending.pop(request, None))
+        page.on("requestfailed", on_request_failed)
+        page.on("close", on_close)
+
+    async def wait_for_network_quiet(self, page: Page, deadline: float) -> bool:
+        """Wait until the page has had no short-lived requests in flight for NETWORK_QUIET_MS"""
+        pending = self.pending_requests.get(page)
+        if pending is None:
+            return True
+        quiet_since = None
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            busy = any(now - started < LONG_REQUEST_MS / 1000 for started in list(pending.values()))
+            if busy:
+                quiet_since = None
+            elif quiet_since is None:
+                quiet_since = now
+            elif now - quiet_since >= NETWORK_QUIET_MS / 1000:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def wait_for_dom_quiet(self, page: Page, deadline: float) -> bool:
+        """Wait until the DOM has had no mutations for DOM_QUIET_MS, following a navigation once"""
+        for attempt in range(2):
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                return False
+            try:
+                return await page.evaluate(DOM_QUIET_SCRIPT, [DOM_QUIET_MS, remaining_ms])
+            except Exception as e:
+                # The action started a navigation and destroyed the document being observed
+                if attempt == 0:
+                    try:
+                        await page.wait_for_load_state("domcontentloaded", timeout=max(1, int((deadline - time.monotonic()) * 1000)))
+                    except Exception:
+                        pass
+                else:
+                    print(f"DOM settle wait failed: {e}")
+        return False
+
+    async def settle_page(self, page: Page, baseline_ms: float = STATE_SETTLE_BASELINE_MS,
+                          timeout_ms: int = SETTLE_TIMEOUT_MS) -> dict:
+        """Wait until the page is loaded, the network is quiet and the DOM stopped changing, within timeout_ms
+        Returns timings with the time spent and the time saved compared to the fixed baseline_ms sleep
+        """
+        started = time.monotonic()
+        deadline = started + timeout_ms / 1000
+        network_quiet = dom_quiet = False
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+            network_quiet = await self.wait_for_network_quiet(page, deadline)
+            dom_quiet = await self.wait_for_dom_quiet(page, deadline)
+        except Exception as e:
+            print(f"Page settle wait failed, proceeding anyway: {e}")
+        settle_ms = round((time.monotonic() - started) * 1000, 1)
+        if not (network_quiet and dom_quiet):
+            print(f"Page not settled after {settle_ms}ms (network quiet: {network_quiet}, DOM quiet: {dom_quiet})")
+        return {"settle_ms": settle_ms, "settle_saved_ms": round(baseline_ms - settle_ms, 1)}
+
     async def get_current_page(self) -> Page:
-        """Get the current active page"""
+        """Get the current active page, or the page named by the request's page_id"""
+        page_id = target_page_id.get()
+        if page_id:
+            page = self.named_pages.get(page_id)
+            if page is None or page.is_closed():
+                raise HTTPException(status_code=404, detail=f"Page {page_id} not found")
+            return page
         if not self.pages:
             raise HTTPException(status_code=500, detail="No browser pages available")
         return self.pages[self.current_page_index]
@@ -411,6 +1046,18 @@ class BrowserAutomation:
             # More comprehensive JavaScript to find interactive elements
             elements_js = """
             (() => {
+                // Indices stay stable for an element as long as the document lives
+                if (!window.__neoIndex) {
+                    window.__neoIndex = {
+                        documentId: Date.now().toString(36) + Math.random().toString(36).slice(2),
+                        next: 1,
+                        ids: new WeakMap(),
+                        elements: new Map()
+                    };
+                }
+                const registry = window.__neoIndex;
+                registry.elements = new Map();
+                
                 // Helper function to get all attributes as an object
                 function getAttributes(el) {
                     const attributes = {};
@@ -437,7 +1084,13 @@ class BrowserAutomation:
                 });
                 
                 // Map to our expected structure
-                return visibleElements.map((el, index) => {
+                const elements = visibleElements.map(el => {
+                    let index = registry.ids.get(el);
+                    if (index === undefined) {
+                        index = registry.next++;
+                        registry.ids.set(el, index);
+                    }
+                    registry.elements.set(index, el);
                     const rect = el.getBoundingClientRect();
                     const isInViewport = rect.top >= 0 && 
                                       rect.left >= 0 && 
@@ -445,7 +1098,7 @@ class BrowserAutomation:
                                       rect.right <= window.innerWidth;
                     
                     return {
-                        index: index + 1,
+                        index: index,
                         tagName: el.tagName.toLowerCase(),
                         text: el.innerText || el.value || '',
                         attributes: getAttributes(el),
@@ -466,10 +1119,13 @@ class BrowserAutomation:
                         isInViewport: isInViewport
                     };
                 });
+                return {documentId: registry.documentId, elements: elements};
             })();
             """
             
-            elements = await page.evaluate(elements_js)
+            extraction = await page.evaluate(elements_js)
+            elements = extraction['elements']
+            self.last_document_id = extraction['documentId']
             print(f"Found {len(elements)} interactive elements in selector map")
             
             # Create a root element for the tree
@@ -529,6 +1185,7 @@ class BrowserAutomation:
         except Exception as e:
             print(f"Error getting selector map: {e}")
             traceback.print_exc()
+            self.last_document_id = ""
             # Create a dummy element to avoid breaking tests
             dummy = DOMElementNode(
                 is_visible=True,
@@ -605,7 +1262,8 @@ class BrowserAutomation:
                 url=url,
                 title=title,
                 pixels_above=pixels_above,
-                pixels_below=pixels_below
+                pixels_below=pixels_below,
+                document_id=self.last_document_id
             )
         except Exception as e:
             print(f"Error getting DOM state: {e}")
@@ -638,25 +1296,32 @@ class BrowserAutomation:
         try:
             page = await self.get_current_page()
             
-            # Wait for network to be idle and DOM to be stable
-            try:
-                await page.wait_for_load_state("networkidle", timeout=60000)  # Increased timeout to 60s
-            except Exception as e:
-                print(f"Warning: Network idle timeout, proceeding anyway: {e}")
+            # Callers settle the page first (see settle_page)
             
             # Wait for any animations to complete
             # await page.wait_for_timeout(1000)  # Wait 1 second for animations
             
-            # Take screenshot with increased timeout and better options
-            screenshot_bytes = await page.screenshot(
-                type='jpeg',
-                quality=60,
+            # Capture losslessly and encode once, so the format and byte budget apply to a clean frame
+            capture = await page.screenshot(
+                type='png',
                 full_page=False,
                 timeout=60000,  # Increased timeout to 60s
-                scale='device'  # Use device scale factor
+                scale='css'  # Device pixels beyond the CSS viewport only cost bytes
             )
             
-            return base64.b64encode(screenshot_bytes).decode('utf-8')
+            capture_hash = hashlib.sha256(capture).hexdigest()
+            if capture_hash == self.last_capture_hash and self.last_screenshot:
+                # Identical frame: reuse the previous encoding and hash
+                return self.last_screenshot
+            
+            screenshot_bytes, screenshot_format = await asyncio.to_thread(encode_screenshot, capture)
+            screenshot = base64.b64encode(screenshot_bytes).decode('utf-8')
+            self.last_screenshot = screenshot
+            self.last_screenshot_hash = hashlib.sha256(screenshot_bytes).hexdigest()
+            self.last_screenshot_format = screenshot_format
+            self.last_capture = capture
+            self.last_capture_hash = capture_hash
+            return screenshot
         except Exception as e:
             print(f"Error taking screenshot: {e}")
             traceback.print_exc()
@@ -678,39 +1343,61 @@ class BrowserAutomation:
             print(f"Error saving screenshot: {e}")
             return ""
     
-    async def extract_ocr_text_from_screenshot(self, screenshot_base64: str) -> str:
-        """Extract text from screenshot using OCR"""
-        if not screenshot_base64:
-            return ""
+    async def extract_ocr_text_from_screenshot(self, image_bytes: bytes, screenshot_hash: Optional[str] = None) -> tuple:
+        """Extract text from a screenshot image using OCR in the worker process
+        Returns a tuple of (ocr_text, cached); results are cached by screenshot hash
+        and concurrent requests for the same screenshot share one OCR run
+        """
+        if not image_bytes:
+            return "", False
             
         try:
-            # Decode base64 to image
-            image_bytes = base64.b64decode(screenshot_base64)
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Extract text using pytesseract
-            ocr_text = pytesseract.image_to_string(image)
-            
-            # Clean up the text
-            ocr_text = ocr_text.strip()
-            
-            return ocr_text
+            screenshot_hash = screenshot_hash or hashlib.sha256(image_bytes).hexdigest()
+            
+            if screenshot_hash in self.ocr_cache:
+                self.ocr_cache.move_to_end(screenshot_hash)
+                return self.ocr_cache[screenshot_hash], True
+            if screenshot_hash in self.ocr_pending:
+                return await asyncio.shield(self.ocr_pending[screenshot_hash]), True
+            
+            if self.ocr_pool is None:
+                # Spawned, not forked: the API process runs Playwright threads
+                self.ocr_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            future = asyncio.get_running_loop().run_in_executor(self.ocr_pool, run_ocr, image_bytes)
+            self.ocr_pending[screenshot_hash] = future
+            try:
+                ocr_text = await future
+            finally:
+                self.ocr_pending.pop(screenshot_hash, None)
+            
+            self.ocr_cache[screenshot_hash] = ocr_text
+            while len(self.ocr_cache) > OCR_CACHE_SIZE:
+                self.ocr_cache.popitem(last=False)
+            return ocr_text, False
         except Exception as e:
             print(f"Error performing OCR: {e}")
             traceback.print_exc()
-            return ""
+            return "", False
     
-    async def get_updated_browser_state(self, action_name: str) -> tuple:
+    async def get_updated_browser_state(self, action_name: str, settle_baseline_ms: float = STATE_SETTLE_BASELINE_MS,
+                                        settle_timeout_ms: int = SETTLE_TIMEOUT_MS) -> tuple:
         """Helper method to get updated browser state after any action
         Returns a tuple of (dom_state, screenshot, elements, metadata)
+        settle_baseline_ms is the fixed wait the action used before adaptive settling, for reporting
         """
         try:
-            # Wait a moment for any potential async processes to settle
-            await asyncio.sleep(0.5)
+            started = time.monotonic()
+            
+            # Wait for the page to settle instead of sleeping a fixed time
+            timings = await self.settle_page(await self.get_current_page(), settle_baseline_ms, settle_timeout_ms)
             
             # Get updated state
+            step_started = time.monotonic()
             dom_state = await self.get_current_dom_state()
+            timings['dom_ms'] = round((time.monotonic() - step_started) * 1000, 1)
+            step_started = time.monotonic()
             screenshot = await self.take_screenshot()
+            timings['screenshot_ms'] = round((time.monotonic() - step_started) * 1000, 1)
             
             # Format elements for output
             elements = dom_state.element_tree.clickable_elements_to_string(
@@ -741,7 +1428,11 @@ class BrowserAutomation:
                 
                 interactive_elements.append(element_info)
             
-            metadata['interactive_elements'] = interactive_elements
+            metadata['interactive_elements'], metadata['dom_diff'] = self.diff_elements(
+                page, dom_state.document_id, interactive_elements
+            )
+            if page in self.interception_stats:
+                metadata['interception'] = dict(self.interception_stats[page])
             
             # Get viewport dimensions - Fix syntax error in JavaScript
             try:
@@ -760,11 +1451,13 @@ class BrowserAutomation:
                 metadata['viewport_width'] = 0
                 metadata['viewport_height'] = 0
             
-            # Extract OCR text from screenshot if available
-            ocr_text = ""
+            # OCR is on demand through /automation/ocr, keyed by this hash
             if screenshot:
-                ocr_text = await self.extract_ocr_text_from_screenshot(screenshot)
-                metadata['ocr_text'] = ocr_text
+                metadata['screenshot_hash'] = self.last_screenshot_hash
+                metadata['screenshot_format'] = self.last_screenshot_format
+            
+            timings['total_ms'] = round((time.monotonic() - started) * 1000, 1)
+            metadata['timings'] = timings
             
             print(f"Got updated state after {action_name}: {len(dom_state.selector_map)} elements")
             return dom_state, screenshot, elements, metadata
@@ -774,6 +1467,31 @@ class BrowserAutomation:
             # Return empty values in case of error
             return None, "", "", {}
 
+    def diff_elements(self, page: Page, document_id: str, interactive_elements: List[Dict[str, Any]]) -> tuple:
+        """Reduce the interactive elements to those added or changed since the previous state
+        A full list is returned after a navigation, a tab change or an extraction failure.
+        Returns a tuple of (elements, dom_diff)
+        """
+        # Viewport visibility flips for most elements on every scroll; it is not a change of the element
+        current = {
+            info['index']: (info, {k: v for k, v in info.items() if k != 'is_in_viewport'})
+            for info in interactive_elements
+        }
+        previous = self.element_snapshot
+        self.element_snapshot = (page, document_id, {index: signature for index, (_, signature) in current.items()})
+        
+        if not document_id or not previous or previous[0] is not page or previous[1] != document_id:
+            return interactive_elements, {"full": True, "added": len(interactive_elements), "changed": 0, "removed": []}
+        
+        previous_elements = previous[2]
+        added = [info for index, (info, _) in current.items() if index not in previous_elements]
+        changed = [
+            info for index, (info, signature) in current.items()
+            if index in previous_elements and previous_elements[index] != signature
+        ]
+        removed = sorted(index for index in previous_elements if index not in current)
+        return added + changed, {"full": False, "added": len(added), "changed": len(changed), "removed": removed}
+
     def build_action_result(self, success: bool, message: str, dom_state, screenshot: str, 
                               elements: str, metadata: dict, error: str = "", content: str = None,
                               fallback_url: str = None) -> BrowserActionResult:
@@ -793,9 +1511,14 @@ class BrowserAutomation:
             pixels_above=dom_state.pixels_above if dom_state else 0,
             pixels_below=dom_state.pixels_below if dom_state else 0,
             content=content,
-            ocr_text=metadata.get('ocr_text', ""),
+            ocr_text=metadata.get('ocr_text'),
+            screenshot_hash=metadata.get('screenshot_hash'),
+            screenshot_format=metadata.get('screenshot_format'),
+            timings=metadata.get('timings'),
             element_count=metadata.get('element_count', 0),
             interactive_elements=metadata.get('interactive_elements', []),
+            dom_diff=metadata.get('dom_diff'),
+            interception=metadata.get('interception'),
             viewport_width=metadata.get('viewport_width', 0),
             viewport_height=metadata.get('viewport_height', 0)
         )
@@ -806,11 +1529,13 @@ class BrowserAutomation:
         """Navigate to a specified URL"""
         try:
             page = await self.get_current_page()
+            await self.allow_document(page, action.url)
             await page.goto(action.url, wait_until="domcontentloaded")
-            await page.wait_for_load_state("networkidle", timeout=10000)
             
             # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"navigate_to({action.url})")
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"navigate_to({action.url})", settle_timeout_ms=NAVIGATION_SETTLE_TIMEOUT_MS
+            )
             
             result = self.build_action_result(
                 True,
@@ -974,12 +1699,10 @@ class BrowserAutomation:
             # Perform the click at the specified coordinates
             await page.mouse.click(action.x, action.y)
             
-            # Give time for any navigation or DOM updates to occur
-            await page.wait_for_load_state("networkidle", timeout=5000)
-            
-            await asyncio.sleep(1)
-            # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"click_coordinates({action.x}, {action.y})")
+            # Get updated state after action, once navigation or DOM updates have settled
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"click_coordinates({action.x}, {action.y})", settle_baseline_ms=INTERACTION_SETTLE_BASELINE_MS
+            )
             
             return self.build_action_result(
                 True,
@@ -997,8 +1720,9 @@ class BrowserAutomation:
             
             # Try to get state even after error
             try:
-                await asyncio.sleep(1)
-                dom_state, screenshot, elements, metadata = await self.get_updated_browser_state("click_coordinates_error_recovery")
+                dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                    "click_coordinates_error_recovery", settle_baseline_ms=INTERACTION_SETTLE_BASELINE_MS
+                )
                 return self.build_action_result(
                     False,
                     str(e),
@@ -1050,6 +1774,10 @@ class BrowserAutomation:
             # Find the element based on its properties captured in selector_map
             js_selector_script = """
             (targetElementInfo) => {
+                // Elements are registered under their stable index during extraction
+                if (window.__neoIndex) {
+                    return window.__neoIndex.elements.get(targetElementInfo.index) || null;
+                }
                 const interactiveElements = Array.from(document.querySelectorAll(
                     'a, button, input, select, textarea, [role="button"], [role="link"], [role="checkbox"], [role="radio"], [tabindex]:not([tabindex="-1"])'
                 ));
@@ -1092,15 +1820,10 @@ class BrowserAutomation:
                  print(error_message)
 
 
-            # Wait for potential page changes/network activity
-            try:
-                await page.wait_for_load_state("networkidle", timeout=5000)
-            except Exception as wait_error:
-                print(f"Timeout or error waiting for network idle after click: {wait_error}")
-            await asyncio.sleep(1)
-
-            # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"click_element({action.index})")
+            # Get updated state after action, once page changes/network activity have settled
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"click_element({action.index})", settle_baseline_ms=INTERACTION_SETTLE_BASELINE_MS
+            )
 
             return self.build_action_result(
                 click_success,
@@ -1182,9 +1905,10 @@ class BrowserAutomation:
                 # Fallback to xpath
                 await page.fill(f"//{element.tag_name}[{action.index}]", action.text)
             
-            await asyncio.sleep(1)
             # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"input_text({action.index}, '{action.text}')")
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"input_text({action.index}, '{action.text}')", settle_baseline_ms=INTERACTION_SETTLE_BASELINE_MS
+            )
             
             return self.build_action_result(
                 True,
@@ -1214,9 +1938,10 @@ class BrowserAutomation:
             page = await self.get_current_page()
             await page.keyboard.press(action.keys)
             
-            await asyncio.sleep(1)
             # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"send_keys({action.keys})")
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"send_keys({action.keys})", settle_baseline_ms=INTERACTION_SETTLE_BASELINE_MS
+            )
             
             return self.build_action_result(
                 True,
@@ -1292,10 +2017,11 @@ class BrowserAutomation:
             # Create new page in same browser instance
             new_page = await self.browser_context.new_page()
             print(f"New page created successfully")
+            self.document_urls[new_page] = action.url
+            await self.apply_interception(new_page)
             
             # Navigate to the URL
             await new_page.goto(action.url, wait_until="domcontentloaded")
-            await new_page.wait_for_load_state("networkidle", timeout=10000)
             print(f"Navigated to URL in new tab: {action.url}")
             
             # Add to page list and make it current
@@ -1304,7 +2030,9 @@ class BrowserAutomation:
             print(f"New tab added as index {self.current_page_index}")
             
             # Get updated state after action
-            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"open_tab({action.url})")
+            dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(
+                f"open_tab({action.url})", settle_timeout_ms=NAVIGATION_SETTLE_TIMEOUT_MS
+            )
             
             return self.build_action_result(
                 True,
@@ -1392,20 +2120,9 @@ class BrowserAutomation:
             content = await page.content()
             
             # In a full implementation, we would use an LLM to extract specific content
-            # based on the goal. For this example, we'll extract visible text.
-            extracted_text = await page.evaluate("""
-            Array.from(document.querySelectorAll('p, h1, h2, h3, h4, h5, h6, li, span, div'))
-                .filter(el => {
-                    const style = window.getComputedStyle(el);
-                    return style.display !== 'none' && 
-                           style.visibility !== 'hidden' && 
-                           style.opacity !== '0' &&
-                           el.innerText && 
-                           el.innerText.trim().length > 0;
-                })
-                .map(el => el.innerText.trim())
-                .join('\\n\\n');
-            """)
+            # based on the goal. For this example, we'll extract the page as markdown.
+            extracted, _ = await self.get_page_markdown(page)
+            extracted_text = extracted["markdown"]
             
             # Get updated state
             dom_state, screenshot, elements, metadata = await self.get_updated_browser_state(f"extract_content({goal})")
@@ -1620,15 +2337,18 @@ class BrowserAutomation:
             try:
                 if element.tag_name.lower() == 'select':
                     # For <select> elements, get options using JavaScript
-                    options_js = f"""
-                    Array.from(document.querySelectorAll('select')[{index-1}].options)
-                        .map((option, index) => ({
-                            index: index,
-                            text: option.text,
-                            value: option.value
-                        }));
+                    options_js = """
+                    (index) => {
+                        const select = window.__neoIndex && window.__neoIndex.elements.get(index);
+                        return select ? Array.from(select.options)
+                            .map((option, index) => ({
+                                index: index,
+                                text: option.text,
+                                value: option.value
+                            })) : [];
+                    }
                     """
-                    options = await page.evaluate(options_js)
+                    options = await page.evaluate(options_js, index)
                 else:
                     # For other dropdown types, try to get options using a more generic approach
                     # Example for custom dropdowns - would need refinement in real implementation
@@ -1838,6 +2558,205 @@ class BrowserAutomation:
                 content=None
             )
 
+    # Page reading
+
+    async def get_page_markdown(self, page: Page) -> tuple:
+        """Extract the page's main content as markdown, cached by URL and DOM hash
+        Returns a tuple of (entry, cached) where entry has "title", "markdown" and "chunks"
+        """
+        key = (page.url, await page.evaluate(DOM_HASH_SCRIPT))
+        if key in self.markdown_cache:
+            self.markdown_cache.move_to_end(key)
+            return self.markdown_cache[key], True
+        
+        extracted = await page.evaluate(PAGE_MARKDOWN_SCRIPT)
+        entry = {"title": extracted.get("title", ""), "markdown": extracted.get("markdown", ""), "chunks": {}}
+        self.markdown_cache[key] = entry
+        while len(self.markdown_cache) > MARKDOWN_CACHE_SIZE:
+            self.markdown_cache.popitem(last=False)
+        return entry, False
+
+    async def read_page(self, action: ReadPageAction = Body(...)):
+        """Return one chunk of the current page's content as markdown"""
+        try:
+            started = time.monotonic()
+            page = await self.get_current_page()
+            entry, cached = await self.get_page_markdown(page)
+            
+            chunk_chars = max(1000, min(action.chunk_chars, 100000))
+            if chunk_chars not in entry["chunks"]:
+                entry["chunks"][chunk_chars] = split_markdown(entry["markdown"], chunk_chars)
+            chunks = entry["chunks"][chunk_chars]
+            
+            if action.chunk < 1 or action.chunk > len(chunks):
+                return {"success": False, "error": f"Chunk {action.chunk} out of range (1-{len(chunks)})",
+                        "total_chunks": len(chunks)}
+            return {
+                "success": True,
+                "url": page.url,
+                "title": entry["title"],
+                "content": chunks[action.chunk - 1],
+                "chunk": action.chunk,
+                "total_chunks": len(chunks),
+                "total_chars": len(entry["markdown"]),
+                "cached": cached,
+                "timings": {"read_ms": round((time.monotonic() - started) * 1000, 1)}
+            }
+        except Exception as e:
+            print(f"Error reading page: {e}")
+            traceback.print_exc()
+            return {"success": False, "error": str(e)}
+
+    # Parallel pages
+
+    async def get_isolated_context(self, context_id: str) -> BrowserContext:
+        """Return the isolated context with this ID, creating it with the main context's settings"""
+        context = self.isolated_contexts.get(context_id)
+        if context is not None:
+            self.isolated_contexts.move_to_end(context_id)
+            return context
+        
+        while len(self.isolated_contexts) >= MAX_ISOLATED_CONTEXTS:
+            oldest_id = next(iter(self.isolated_contexts))
+            await self.close_context(CloseContextAction(context_id=oldest_id))
+        
+        context = await self.browser.new_context(viewport={'width': 1024, 'height': 768})
+        if INTERCEPTION_ENABLED and MAX_IMAGE_BYTES:
+            await context.route("**/*", self.route_request)
+        self.isolated_contexts[context_id] = context
+        return context
+
+    async def read_new_page(self, page: Page, url: str, chunk_chars: int, started: float) -> dict:
+        """Load a URL in a fresh page, wait for it to settle and return its first markdown chunk"""
+        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        timings = await self.settle_page(page, timeout_ms=NAVIGATION_SETTLE_TIMEOUT_MS)
+        entry, cached = await self.get_page_markdown(page)
+        if chunk_chars not in entry["chunks"]:
+            entry["chunks"][chunk_chars] = split_markdown(entry["markdown"], chunk_chars)
+        chunks = entry["chunks"][chunk_chars]
+        timings['total_ms'] = round((time.monotonic() - started) * 1000, 1)
+        return {
+            "success": True,
+            "url": url,
+            "final_url": page.url,
+            "title": entry["title"],
+            "content": chunks[0],
+            "total_chunks": len(chunks),
+            "cached": cached,
+            "timings": timings
+        }
+
+    async def load_page_content(self, context: BrowserContext, url: str, page_id: str, keep_open: bool,
+                                chunk_chars: int, deadline: float) -> dict:
+        """Open a URL in its own page and return its first markdown chunk, giving up at the batch deadline"""
+        async with self.page_semaphore:
+            started = time.monotonic()
+            remaining = deadline - started
+            if remaining <= 0:
+                return {"success": False, "url": url, "error": "Not loaded: the batch ran out of time"}
+            page = await context.new_page()
+            self.track_page(page)
+            self.document_urls[page] = url
+            await self.apply_interception(page)
+            kept = False
+            try:
+                result = await asyncio.wait_for(self.read_new_page(page, url, chunk_chars, started), remaining)
+                if keep_open:
+                    self.named_pages[page_id] = page
+                    result["page_id"] = page_id
+                    kept = True
+                return result
+            except asyncio.TimeoutError:
+                return {"success": False, "url": url, "error": f"Not loaded within the batch's {remaining:.0f}s left"}
+            except Exception as e:
+                print(f"Error loading {url}: {e}")
+                return {"success": False, "url": url, "error": str(e)}
+            finally:
+                if not kept:
+                    await page.close()
+
+    async def open_many(self, action: OpenManyAction = Body(...)):
+        """Load several URLs concurrently in an isolated context and return per-page content
+        The batch ends after timeout_ms with the pages loaded so far, so callers get partial
+        results instead of timing out themselves
+        """
+        try:
+            started = time.monotonic()
+            deadline = started + max(1000, min(action.timeout_ms, MAX_OPEN_MANY_TIMEOUT_MS)) / 1000
+            context_id = action.context_id or f"ctx-{uuid.uuid4().hex}"
+            context = await self.get_isolated_context(context_id)
+            # Reserve this batch's page numbers before any load starts, so concurrent batches never share one
+            first_index = self.page_counters.get(context_id, 0) + 1
+            self.page_counters[context_id] = first_index + len(action.urls) - 1
+            chunk_chars = max(1000, min(action.chunk_chars, 100000))
+            
+            # The shared semaphore caps pages across batches; this one caps the batch itself
+            batch_semaphore = asyncio.Semaphore(max(1, min(action.max_concurrency, MAX_PARALLEL_PAGES)))
+            
+            async def load(index: int, url: str) -> dict:
+                async with batch_semaphore:
+                    return await self.load_page_content(
+                        context, url, f"{context_id}:{first_index + index}", action.keep_open, chunk_chars, deadline
+                    )
+            
+            results = await asyncio.gather(*(load(i, url) for i, url in enumerate(action.urls)))
+            if not any(page_id.startswith(f"{context_id}:") for page_id in self.named_pages):
+                # Nothing was kept, so the context only held this batch's cookies and storage
+                await self.close_context(CloseContextAction(context_id=context_id))
+            return {
+                "success": any(result["success"] for result in results),
+                "context_id": context_id,
+                "results": results,
+                "deadline_reached": time.monotonic() >= deadline,
+                "timings": {"total_ms": round((time.monotonic() - started) * 1000, 1)}
+            }
+        except Exception as e:
+            print(f"Error in open_many: {e}")
+            traceback.print_exc()
+            return {"success": False, "error": str(e), "results": []}
+
+    async def close_context(self, action: CloseContextAction = Body(...)):
+        """Close an isolated context and its kept pages"""
+        context = self.isolated_contexts.pop(action.context_id, None)
+        self.page_counters.pop(action.context_id, None)
+        for page_id in [page_id for page_id in self.named_pages if page_id.startswith(f"{action.context_id}:")]:
+            del self.named_pages[page_id]
+        if context is None:
+            return {"success": False, "error": f"Context {action.context_id} not found"}
+        await context.close()
+        return {"success": True, "context_id": action.context_id}
+
+    # OCR
+
+    async def ocr(self, action: OcrAction = Body(...)):
+        """Return the OCR text of the latest screenshot
+        If screenshot_hash names an older frame whose text is no longer cached,
+        a fresh screenshot of the current page is read instead
+        """
+        try:
+            timings = {}
+            screenshot_hash = action.screenshot_hash
+            if screenshot_hash and screenshot_hash in self.ocr_cache:
+                self.ocr_cache.move_to_end(screenshot_hash)
+                return {"success": True, "ocr_text": self.ocr_cache[screenshot_hash],
+                        "screenshot_hash": screenshot_hash, "cached": True, "timings": timings}
+
+            if not self.last_capture or (screenshot_hash and screenshot_hash != self.last_screenshot_hash):
+                step_started = time.monotonic()
+                await self.take_screenshot()
+                timings['screenshot_ms'] = round((time.monotonic() - step_started) * 1000, 1)
+
+            step_started = time.monotonic()
+            # The raw capture reads better than the downscaled, compressed screenshot sent to the model
+            ocr_text, cached = await self.extract_ocr_text_from_screenshot(self.last_capture, self.last_screenshot_hash)
+            timings['ocr_ms'] = round((time.monotonic() - step_started) * 1000, 1)
+            return {"success": True, "ocr_text": ocr_text, "screenshot_hash": self.last_screenshot_hash,
+                    "cached": cached, "timings": timings}
+        except Exception as e:
+            print(f"Error in OCR endpoint: {e}")
+            traceback.print_exc()
+            return {"success": False, "ocr_text": "", "error": str(e)}
+
 # Create singleton instance
 automation_service = BrowserAutomation()
 
@@ -1851,6 +2770,9 @@ async def health_check():
 # Include automation service router with /api prefix
 api_app.include_router(automation_service.router, prefix="/api")
 
+# In-place file edits used by the files tool
+api_app.include_router(file_edit_router, prefix="/api")
+
 async def test_browser_api():
     """Test the browser automation API functionality"""
     try:
@@ -1890,13 +2812,14 @@ async def test_browser_api():
         
         # Test OCR extraction from screenshot
         print("\n--- Testing OCR Text Extraction ---")
-        if result.ocr_text:
+        ocr_result = await automation_service.ocr(OcrAction(screenshot_hash=result.screenshot_hash))
+        if ocr_result.get("ocr_text"):
             print("OCR text extracted from screenshot:")
             print("=== OCR TEXT START ===")
-            print(result.ocr_text)
+            print(ocr_result["ocr_text"])
             print("=== OCR TEXT END ===")
-            print(f"OCR text length: {len(result.ocr_text)} characters")
-            print(result.ocr_text)
+            print(f"OCR text length: {len(ocr_result['ocr_text'])} characters")
+            print(f"OCR timings: {ocr_result.get('timings')}")
         else:
             print("No OCR text extracted from screenshot")
         
@@ -1913,10 +2836,11 @@ async def test_browser_api():
             print(f"Page title: {result.title}")
             
             # Test OCR extraction from search results
-            if result.ocr_text:
+            ocr_result = await automation_service.ocr(OcrAction(screenshot_hash=result.screenshot_hash))
+            if ocr_result.get("ocr_text"):
                 print("\nOCR text from search results:")
                 print("=== OCR TEXT START ===")
-                print(result.ocr_text)
+                print(ocr_result["ocr_text"])
                 print("=== OCR TEXT END ===")
             else:
                 print("\nNo OCR text extracted from search results")
@@ -0,0 +1,162 @@
+"""
+In-sandbox file edits for the files tool.
+
+Served by the sandbox API server (browser_api.py, port 8003) under /api/files.
+A single request creates, rewrites or patches a file in place, so an edit costs
+one round trip carrying only the changed text instead of downloading and
+re-uploading the whole file. Writes go to a temporary file in the same directory
+and are moved into place with os.replace, so readers never see a partial file
+and a patch whose hunks do not all apply leaves the file untouched.
+
+Operations:
+    create   Write a new file (parents created), failing if it exists unless "overwrite"
+    rewrite  Replace the content of an existing file
+    patch    Apply one or more {"old_str", "new_str"} hunks, each matching exactly once
+
+Every response has "success"; failures carry an "error" code ("exists",
+"not_found", "no_match", "multiple_matches", "invalid", "os_error") and a
+"message".
+
+Port 8003 is also reachable through the sandbox's public preview link, so every
+request must carry the sandbox's VNC password (set at creation, and stored with
+the project) in the X-Sandbox-Token header. Requests without it get a 403.
+"""
+
+import os
+import hmac
+import tempfile
+from typing import Optional, List, Dict, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel
+
+WORKSPACE_PATH = "/workspace"
+# Secret every edit request must present; unset, or left at the image's public default,
+# the endpoint refuses all edits and the files tool uses the filesystem API
+EDIT_TOKEN = os.getenv("VNC_PASSWORD", "")
+if EDIT_TOKEN == "vncpassword":
+    EDIT_TOKEN = ""
+
+class PatchHunk(BaseModel):
+    old_str: str
+    new_str: str
+
+class FileEditRequest(BaseModel):
+    op: str
+    path: str
+    content: Optional[str] = None
+    hunks: List[PatchHunk] = []
+    permissions: Optional[str] = None
+    overwrite: bool = False
+
+class FileEditError(Exception):
+    def __init__(self, error: str, message: str, **details):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.details = details
+
+def resolve_path(path: str) -> str:
+    """Resolve a path and make sure it stays inside the workspace."""
+    full_path = os.path.realpath(os.path.join(WORKSPACE_PATH, path.lstrip('/')))
+    if full_path != WORKSPACE_PATH and not full_path.startswith(WORKSPACE_PATH + '/'):
+        raise FileEditError("invalid", f"Path '{path}' is outside of {WORKSPACE_PATH}")
+    return full_path
+
+def read_text(full_path: str) -> str:
+    with open(full_path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def write_atomic(full_path: str, content: str, mode: Optional[int]) -> None:
+    """Write content next to the target and move it into place."""
+    directory = os.path.dirname(full_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def parse_permissions(permissions: Optional[str]) -> Optional[int]:
+    if not permissions:
+        return None
+    try:
+        return int(permissions, 8)
+    except ValueError:
+        raise FileEditError("invalid", f"Invalid permissions '{permissions}'")
+
+def apply_hunks(content: str, hunks: List[PatchHunk]) -> str:
+    """Apply hunks in order; every hunk must match exactly once."""
+    for number, hunk in enumerate(hunks, start=1):
+        occurrences = content.count(hunk.old_str)
+        if occurrences == 0:
+            raise FileEditError("no_match", f"String '{hunk.old_str}' not found in file", hunk=number)
+        if occurrences > 1:
+            lines = [i + 1 for i, line in enumerate(content.split('\n')) if hunk.old_str in line]
+            raise FileEditError(
+                "multiple_matches",
+                f"Multiple occurrences found in lines {lines}. Please ensure string is unique",
+                hunk=number, lines=lines
+            )
+        content = content.replace(hunk.old_str, hunk.new_str)
+    return content
+
+def op_create(request: FileEditRequest, full_path: str) -> Dict[str, Any]:
+    exists = os.path.exists(full_path)
+    if exists and not request.overwrite:
+        raise FileEditError("exists", f"File '{request.path}' already exists")
+    os.makedirs(os.path.dirname(full_path), mode=0o755, exist_ok=True)
+    write_atomic(full_path, request.content or "", parse_permissions(request.permissions) or 0o644)
+    return {"created": not exists}
+
+def op_rewrite(request: FileEditRequest, full_path: str) -> Dict[str, Any]:
+    if not os.path.isfile(full_path):
+        raise FileEditError("not_found", f"File '{request.path}' does not exist")
+    mode = parse_permissions(request.permissions)
+    if mode is None:
+        mode = os.stat(full_path).st_mode & 0o7777
+    write_atomic(full_path, request.content or "", mode)
+    return {}
+
+def op_patch(request: FileEditRequest, full_path: str) -> Dict[str, Any]:
+    if not os.path.isfile(full_path):
+        raise FileEditError("not_found", f"File '{request.path}' does not exist")
+    if not request.hunks:
+        raise FileEditError("invalid", "Patch has no hunks")
+    content = read_text(full_path)
+    new_content = apply_hunks(content, request.hunks)
+    write_atomic(full_path, new_content, os.stat(full_path).st_mode & 0o7777)
+    return {"hunks_applied": len(request.hunks), "size": len(new_content.encode('utf-8'))}
+
+OPERATIONS = {
+    "create": op_create,
+    "rewrite": op_rewrite,
+    "patch": op_patch,
+}
+
+def require_token(x_sandbox_token: Optional[str] = Header(None)) -> None:
+    """Reject requests that do not carry the sandbox's secret."""
+    if not EDIT_TOKEN or not hmac.compare_digest((x_sandbox_token or "").encode(), EDIT_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid sandbox token")
+
+router = APIRouter(dependencies=[Depends(require_token)])
+
+@router.post("/files/edit")
+async def edit_file(request: FileEditRequest):
+    try:
+        handler = OPERATIONS.get(request.op)
+        if handler is None:
+            raise FileEditError("invalid", f"Unknown operation '{request.op}'")
+        result = handler(request, resolve_path(request.path))
+        return {"success": True, "op": request.op, "path": request.path, **result}
+    except FileEditError as e:
+        return {"success": False, "op": request.op, "error": e.error, "message": e.message, **e.details}
+    except UnicodeDecodeError:
+        return {"success": False, "op": request.op, "error": "invalid", "message": f"File '{request.path}' is not a UTF-8 text file"}
+    except OSError as e:
+        return {"success": False, "op": request.op, "error": "os_error", "message": str(e)}
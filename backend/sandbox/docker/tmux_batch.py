@@ -0,0 +1,186 @@
+"""
+Batched tmux operations for the shell tool.
+
+Runs a JSON list of operations against tmux in one process and prints one JSON
+result, so a shell tool call costs a single sandbox exec instead of one exec per
+tmux command.
+
+Usage:
+    python3 /app/tmux_batch.py '{"ops": [{"op": "ensure_session", "session": "build"}, ...]}'
+    python3 /app/tmux_batch.py < batch.json
+
+Operations:
+    ensure_session  Create the session (with its output piped to a log file) if missing
+    send            Run a command through a script, so its exit code lands in a marker file
+    wait_exit       Wait up to `timeout` seconds for the exit marker or the session to end
+    read            Return log output after `offset` (at most `max_bytes`, keeping the tail)
+    kill            Kill the session and remove its log, exit marker and command script
+    has_session     Report whether the session exists
+    list            List running sessions
+
+Every operation result has "ok"; a failed operation stops the batch unless
+"stop_on_error" is false.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shlex
+import subprocess
+
+LOG_DIR = "/tmp/tmux_logs"
+POLL_INTERVAL = 0.2
+
+def tmux(*args):
+    return subprocess.run(["tmux", *args], capture_output=True, text=True)
+
+def log_file(session):
+    return os.path.join(LOG_DIR, f"{session}.log")
+
+def exit_file(session):
+    return os.path.join(LOG_DIR, f"{session}.exit")
+
+def command_file(session, sent_at):
+    return os.path.join(LOG_DIR, f"{session}.{sent_at}.sh")
+
+def source_line_pattern(session):
+    """Matches the only line typed into the pane for a command, with its prompt"""
+    return re.compile(r"(^|\s)\. '?" + re.escape(os.path.join(LOG_DIR, session)) + r"\.\d+\.sh'?\s*$")
+
+def has_session(session):
+    return tmux("has-session", "-t", session).returncode == 0
+
+def op_ensure_session(session, **_):
+    if has_session(session):
+        return {"created": False}
+    os.makedirs(LOG_DIR, exist_ok=True)
+    for path in (log_file(session), exit_file(session)):
+        if os.path.exists(path):
+            os.remove(path)
+    # Pipe the pane in the same tmux invocation so no early output is missed
+    result = tmux(
+        "new-session", "-d", "-s", session, ";",
+        "pipe-pane", "-o", "-t", session, f"cat >> {shlex.quote(log_file(session))}"
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "failed to create session")
+    return {"created": True}
+
+def op_send(session, command, cwd=None, **_):
+    marker = shlex.quote(exit_file(session))
+    # The command gets its own lines inside a group, so a trailing "&" or "# comment"
+    # cannot swallow the marker statement. It is sourced from a script, so it runs in the
+    # session's shell while only the short source line is echoed into the log. Each command
+    # gets its own script, which removes itself once the shell has read it.
+    script_path = shlex.quote(command_file(session, time.time_ns()))
+    script = f"rm -f {script_path} {marker}\n"
+    if cwd:
+        script += f"cd {shlex.quote(cwd)} && "
+    script += f"{{\n{command}\n}}; echo $? > {marker}\n"
+    os.makedirs(LOG_DIR, exist_ok=True)
+    with open(shlex.split(script_path)[0], "w") as f:
+        f.write(script)
+    for args in (["send-keys", "-t", session, "-l", f". {script_path}"], ["send-keys", "-t", session, "Enter"]):
+        result = tmux(*args)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "failed to send keys")
+    return {}
+
+def op_wait_exit(session, timeout=25, **_):
+    deadline = time.monotonic() + float(timeout)
+    marker = exit_file(session)
+    while True:
+        if os.path.exists(marker) and os.path.getsize(marker) > 0:
+            with open(marker) as f:
+                content = f.read().strip()
+            try:
+                return {"exit_code": int(content), "ended": False}
+            except ValueError:
+                pass
+        if not has_session(session):
+            return {"exit_code": None, "ended": True}
+        if time.monotonic() >= deadline:
+            return {"exit_code": None, "ended": False}
+        time.sleep(POLL_INTERVAL)
+
+def strip_source_lines(session, output):
+    """Drop the echoed source lines of sent commands (with their prompt) from pane output"""
+    pattern = source_line_pattern(session)
+    return "".join(text for text in output.splitlines(keepends=True) if not pattern.search(text.rstrip("\r\n")))
+
+def op_read(session, offset=0, max_bytes=50000, require_session=False, **_):
+    if require_session and not has_session(session):
+        raise RuntimeError(f"Tmux session '{session}' does not exist.")
+    path = log_file(session)
+    if not os.path.exists(path):
+        # Sessions created without a log: fall back to the full pane history
+        pane = tmux("capture-pane", "-t", session, "-p", "-S", "-", "-E", "-")
+        return {"output": strip_source_lines(session, pane.stdout), "size": None, "truncated": False, "has_log": False}
+
+    size = os.path.getsize(path)
+    offset = min(int(offset), size)
+    start = max(offset, size - int(max_bytes))
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(size - start)
+    return {
+        "output": strip_source_lines(session, data.decode("utf-8", errors="replace")),
+        "size": size,
+        "truncated": start > offset,
+        "has_log": True
+    }
+
+def op_kill(session, require_session=False, **_):
+    exists = has_session(session)
+    if require_session and not exists:
+        raise RuntimeError(f"Tmux session '{session}' does not exist.")
+    if exists:
+        tmux("kill-session", "-t", session)
+    for path in [log_file(session), exit_file(session), *glob.glob(command_file(glob.escape(session), "*"))]:
+        if os.path.exists(path):
+            os.remove(path)
+    return {"killed": exists}
+
+def op_has_session(session, **_):
+    return {"exists": has_session(session)}
+
+def op_list(**_):
+    result = tmux("list-sessions", "-F", "#{session_name}")
+    sessions = [line.strip() for line in result.stdout.splitlines() if line.strip()] if result.returncode == 0 else []
+    return {"sessions": sessions}
+
+OPERATIONS = {
+    "ensure_session": op_ensure_session,
+    "send": op_send,
+    "wait_exit": op_wait_exit,
+    "read": op_read,
+    "kill": op_kill,
+    "has_session": op_has_session,
+    "list": op_list,
+}
+
+def run_batch(batch):
+    results = []
+    stop_on_error = batch.get("stop_on_error", True)
+    for op in batch.get("ops", []):
+        name = op.get("op")
+        try:
+            handler = OPERATIONS[name]
+            result = handler(**{k: v for k, v in op.items() if k != "op"})
+            results.append({"op": name, "ok": True, **result})
+        except Exception as e:
+            results.append({"op": name, "ok": False, "error": str(e)})
+            if stop_on_error:
+                break
+    return {"results": results}
+
+if __name__ == "__main__":
+    try:
+        batch = json.loads(sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read())
+    except (IndexError, json.JSONDecodeError) as e:
+        print(json.dumps({"error": f"Invalid batch: {e}"}))
+        sys.exit(2)
+    print(json.dumps(run_batch(batch)))
@@ -0,0 +1,150 @@
+"""
+Workspace metadata snapshot for the files tool.
+
+Walks the workspace once inside the sandbox and prints one JSON document with
+the path, size, mtime, content hash and text/binary flag of every file, so the
+backend can tell which files changed without downloading them.
+
+Usage:
+    python3 /app/workspace_snapshot.py '{"root": "/workspace", "max_files": 10000, ...}'
+
+Options:
+    root            Directory to walk (default /workspace)
+    excluded_dirs   Directory names never descended into
+    excluded_files  File names to skip
+    excluded_ext    File extensions to skip
+    use_gitignore   Honour .gitignore files found during the walk (default true)
+    max_files       Stop after this many files ("truncated" is set)
+    max_hash_bytes  Files larger than this are listed without a hash
+    known           Previous results by path, as [size, mtime, hash, is_text]; files whose
+                    size and mtime are unchanged reuse them instead of being read again
+"""
+
+import os
+import sys
+import json
+import fnmatch
+import hashlib
+
+SNIFF_BYTES = 8192
+
+def parse_gitignore(path):
+    """Parse a .gitignore into (pattern, negated, dir_only, anchored) rules."""
+    rules = []
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line.startswith("**/"):
+            line, anchored = line[3:], "/" in line[3:]
+        if line:
+            rules.append((line, negated, dir_only, anchored))
+    return rules
+
+def is_ignored(rel_path, is_dir, rule_sets):
+    """Apply the rules of every enclosing .gitignore; the last match wins."""
+    ignored = False
+    for base, rules in rule_sets:
+        if base and not rel_path.startswith(base + "/"):
+            continue
+        local = rel_path[len(base) + 1:] if base else rel_path
+        name = local.rsplit("/", 1)[-1]
+        for pattern, negated, dir_only, anchored in rules:
+            if dir_only and not is_dir:
+                continue
+            target = local if anchored else name
+            if fnmatch.fnmatchcase(target, pattern) or (anchored and fnmatch.fnmatchcase(local, pattern + "/*")):
+                ignored = not negated
+    return ignored
+
+def file_info(full_path, rel_path, max_hash_bytes, known=None):
+    stat = os.stat(full_path)
+    info = {"path": rel_path, "size": stat.st_size, "mtime": stat.st_mtime, "hash": None, "is_text": False}
+    if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+        info["hash"], info["is_text"] = known[2], known[3]
+        return info
+    if stat.st_size > max_hash_bytes:
+        return info
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    info["hash"] = digest.hexdigest()
+    info["is_text"] = b"\0" not in head
+    return info
+
+def snapshot(options):
+    root = os.path.realpath(options.get("root", "/workspace"))
+    excluded_dirs = set(options.get("excluded_dirs", []))
+    excluded_files = set(options.get("excluded_files", []))
+    excluded_ext = {ext.lower() for ext in options.get("excluded_ext", [])}
+    use_gitignore = options.get("use_gitignore", True)
+    max_files = int(options.get("max_files", 10000))
+    max_hash_bytes = int(options.get("max_hash_bytes", 16 * 1024 * 1024))
+    known = options.get("known") or {}
+
+    files = []
+    truncated = False
+    rules_by_dir = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else rel_dir
+        parent_rules = rules_by_dir.pop(rel_dir, [])
+        rule_sets = parent_rules
+        if use_gitignore and ".gitignore" in filenames:
+            rule_sets = parent_rules + [(rel_dir, parse_gitignore(os.path.join(dirpath, ".gitignore")))]
+
+        def rel(name):
+            return f"{rel_dir}/{name}" if rel_dir else name
+
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in excluded_dirs
+            and not os.path.islink(os.path.join(dirpath, d))
+            and not is_ignored(rel(d), True, rule_sets)
+        )
+        for d in dirnames:
+            rules_by_dir[rel(d)] = rule_sets
+
+        for name in sorted(filenames):
+            rel_path = rel(name)
+            if name in excluded_files or os.path.splitext(name)[1].lower() in excluded_ext:
+                continue
+            if is_ignored(rel_path, False, rule_sets):
+                continue
+            full_path = os.path.join(dirpath, name)
+            if not os.path.isfile(full_path):
+                continue
+            if len(files) >= max_files:
+                truncated = True
+                break
+            try:
+                files.append(file_info(full_path, rel_path, max_hash_bytes, known.get(rel_path)))
+            except OSError:
+                continue
+        if truncated:
+            break
+
+    return {"root": root, "files": files, "truncated": truncated}
+
+if __name__ == "__main__":
+    try:
+        options = json.loads(sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read() or "{}")
+    except json.JSONDecodeError as e:
+        print(json.dumps({"error": f"Invalid options: {e}"}))
+        sys.exit(2)
+    print(json.dumps(snapshot(options)))
@@ -0,0 +1,155 @@
+"""
+Async facade over the synchronous Daytona SDK.
+
+Every Daytona call (sandbox lookups and starts, sandbox.fs.*, sandbox.process.*)
+is a blocking HTTP request. Made directly from async code, a slow sandbox start
+stalls the event loop for every request and agent run in the process. The
+executor runs these calls on a dedicated, bounded thread pool. Each call gets a
+timeout, and per-operation metrics (latency, queue wait, errors, timeouts)
+record where sandbox time goes.
+"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, Callable, TypeVar
+
+from utils.logger import logger
+
+T = TypeVar("T")
+
+# Timeout applied when a call does not pass one
+DEFAULT_CALL_TIMEOUT = 120
+# Calls slower than this are logged
+SLOW_CALL_SECONDS = 5.0
+
+class SandboxCallTimeoutError(TimeoutError):
+    """Raised when a sandbox SDK call does not finish within its timeout."""
+
+@dataclass
+class SandboxCallStats:
+    """Metrics of one SDK operation in this process.
+
+    Attributes:
+        calls (int): Completed calls, successful or not
+        errors (int): Calls that raised
+        timeouts (int): Calls abandoned after their timeout
+        total_seconds (float): Summed call latency
+        max_seconds (float): Slowest call
+        queue_seconds (float): Summed time spent waiting for a free worker
+    """
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    queue_seconds: float = 0.0
+
+class SandboxExecutor:
+    """Runs blocking sandbox SDK calls on a bounded thread pool.
+
+    A call that times out is abandoned, not interrupted: its worker thread stays
+    busy until the SDK returns, which is why the pool is separate from the event
+    loop's default executor.
+
+    Attributes:
+        max_workers (int): Maximum concurrent SDK calls
+        default_timeout (float): Timeout of calls that do not pass one
+        in_flight (int): Calls currently awaited (abandoned calls are not counted)
+    """
+
+    def __init__(self, max_workers: int = 32, default_timeout: float = DEFAULT_CALL_TIMEOUT):
+        """Initialize the executor; the thread pool is created on first use.
+
+        Args:
+            max_workers: Maximum concurrent SDK calls
+            default_timeout: Timeout of calls that do not pass one
+        """
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.in_flight = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stats: Dict[str, SandboxCallStats] = {}
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sandbox-sdk")
+        return self._pool
+
+    @staticmethod
+    def _operation_name(func: Callable) -> str:
+        """Name an operation after the SDK method, e.g. "Process.exec"."""
+        func = getattr(func, "func", func)  # functools.partial
+        return getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+        **kwargs: Any
+    ) -> T:
+        """Run a blocking SDK call without blocking the event loop.
+
+        Args:
+            func: Blocking callable, e.g. sandbox.fs.upload_file
+            *args: Positional arguments of the call
+            timeout: Seconds to wait for the call; the executor default if None
+            name: Operation name used for metrics; derived from func if None
+            **kwargs: Keyword arguments of the call
+
+        Returns:
+            The call's return value
+
+        Raises:
+            SandboxCallTimeoutError: If the call does not finish within the timeout
+        """
+        name = name or self._operation_name(func)
+        timeout = self.default_timeout if timeout is None else timeout
+        stats = self._stats.setdefault(name, SandboxCallStats())
+        submitted_at = time.monotonic()
+        started_at: Dict[str, float] = {}
+
+        def call() -> T:
+            started_at["time"] = time.monotonic()
+            return func(*args, **kwargs)
+
+        self.in_flight += 1
+        future = asyncio.wrap_future(self.pool.submit(call))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.warning(f"Sandbox call {name} timed out after {timeout}s ({self.in_flight} in flight)")
+            raise SandboxCallTimeoutError(f"Sandbox call {name} timed out after {timeout}s")
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            elapsed = time.monotonic() - submitted_at
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.queue_seconds += started_at.get("time", time.monotonic()) - submitted_at
+            if elapsed >= SLOW_CALL_SECONDS:
+                logger.info(f"Slow sandbox call {name}: {elapsed:.2f}s")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-operation metrics, with average latency, for this process."""
+        return {
+            name: {**asdict(stats), "avg_seconds": stats.total_seconds / stats.calls if stats.calls else 0.0}
+            for name, stats in sorted(self._stats.items())
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the thread pool; a later call creates a new one."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+# Process-wide executor for all sandbox SDK calls
+sandbox_executor = SandboxExecutor()
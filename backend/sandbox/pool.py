@@ -0,0 +1,361 @@
+"""
+Warm sandbox pool for new projects.
+
+Creating a sandbox (image pull, container start, supervisord) takes tens of
+seconds, and project creation used to wait for it on the request path. The pool
+keeps a few started sandboxes ready per backend/image in a Redis sorted set
+scored by creation time. A new project claims one with an atomic ZPOPMIN and
+relabels it with its project id. The pool is refilled in the background, and
+members idle longer than the policy allows are deleted, so the pool does not
+keep paying for sandboxes nobody claims.
+
+The backend interface has a Daytona implementation and a LocalSandbox (Docker)
+stand-in for local development and testing.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+from sandbox.executor import sandbox_executor
+from services import redis
+from utils.config import config
+from utils.logger import logger
+
+@dataclass
+class PooledSandbox:
+    """A started sandbox waiting in the pool.
+
+    Attributes:
+        sandbox_id (str): Sandbox ID in the backend
+        password (str): VNC password the sandbox was created with
+        created_at (float): Unix time the sandbox was created
+    """
+    sandbox_id: str
+    password: str
+    created_at: float
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, data: str) -> "PooledSandbox":
+        return cls(**json.loads(data))
+
+@dataclass
+class SandboxPoolPolicy:
+    """Sizing and cost policy of a sandbox pool.
+
+    Attributes:
+        target_size (int): Sandboxes kept ready; 0 disables the pool
+        max_idle_seconds (float): Members older than this are deleted instead of claimed
+        max_creates_per_cycle (int): Sandboxes created per refill, bounding creation bursts
+        refill_interval (float): Seconds between background eviction/refill cycles
+    """
+    target_size: int = 0
+    max_idle_seconds: float = 600
+    max_creates_per_cycle: int = 2
+    refill_interval: float = 30
+
+class SandboxPoolBackend(ABC):
+    """Creates, relabels and deletes sandboxes for a pool.
+
+    Attributes:
+        name (str): Identifies the pool in Redis (backend and image)
+    """
+
+    name: str
+
+    @abstractmethod
+    async def create(self, password: str) -> str:
+        """Create and start an unassigned sandbox and return its ID."""
+
+    @abstractmethod
+    async def assign(self, sandbox_id: str, project_id: str) -> Dict[str, Any]:
+        """Relabel a pooled sandbox for a project.
+
+        Returns:
+            Extra sandbox info stored on the project ("vnc_preview", "sandbox_url", "token")
+        """
+
+    @abstractmethod
+    async def delete(self, sandbox_id: str) -> None:
+        """Delete a sandbox."""
+
+def _preview_url(link: Any) -> str:
+    return link.url if hasattr(link, 'url') else str(link).split("url='")[1].split("'")[0]
+
+class DaytonaPoolBackend(SandboxPoolBackend):
+    """Pool backend creating Daytona sandboxes from the configured image."""
+
+    def __init__(self):
+        self.name = f"daytona:{config.SANDBOX_IMAGE_NAME}"
+
+    async def create(self, password: str) -> str:
+        from sandbox.sandbox import create_sandbox
+        sandbox = await sandbox_executor.run(create_sandbox, password, timeout=300)
+        return sandbox.id
+
+    async def assign(self, sandbox_id: str, project_id: str) -> Dict[str, Any]:
+        from sandbox.sandbox import get_or_start_sandbox
+        sandbox = await get_or_start_sandbox(sandbox_id)
+        if hasattr(sandbox, 'set_labels'):
+            await sandbox_executor.run(sandbox.set_labels, {'id': project_id})
+
+        vnc_link = await sandbox_executor.run(sandbox.get_preview_link, 6080)
+        website_link = await sandbox_executor.run(sandbox.get_preview_link, 8080)
+        return {
+            "vnc_preview": _preview_url(vnc_link),
+            "sandbox_url": _preview_url(website_link),
+            "token": getattr(vnc_link, 'token', None)
+        }
+
+    async def delete(self, sandbox_id: str) -> None:
+        from sandbox.sandbox import delete_sandbox
+        await delete_sandbox(sandbox_id)
+
+class LocalPoolBackend(SandboxPoolBackend):
+    """Pool backend on local Docker containers (LocalSandbox), for development and tests.
+
+    Docker labels cannot change after creation, so project assignments are kept
+    in memory.
+    """
+
+    def __init__(self, local_sandbox: Any = None):
+        if local_sandbox is None:
+            from sandbox.local_sandbox import local_sandbox
+        self.local_sandbox = local_sandbox
+        self.name = f"local:{local_sandbox.image_name}"
+        self.assignments: Dict[str, str] = {}
+
+    async def create(self, password: str) -> str:
+        sandbox_id = f"neo-pool-{uuid.uuid4().hex[:8]}"
+        return await sandbox_executor.run(self.local_sandbox.create_sandbox, sandbox_id, timeout=300)
+
+    async def assign(self, sandbox_id: str, project_id: str) -> Dict[str, Any]:
+        info = await sandbox_executor.run(self.local_sandbox.get_container_info, sandbox_id)
+        self.assignments[sandbox_id] = project_id
+        http_port = info.get("ports", {}).get("8080/tcp")
+        return {
+            "vnc_preview": info.get("novnc_url"),
+            "sandbox_url": f"http://localhost:{http_port}" if http_port else None,
+            "token": None
+        }
+
+    async def delete(self, sandbox_id: str) -> None:
+        self.assignments.pop(sandbox_id, None)
+        await sandbox_executor.run(self.local_sandbox.delete_sandbox, sandbox_id)
+
+class SandboxPool:
+    """Keeps started sandboxes ready and hands them out to new projects.
+
+    Pool membership lives in Redis, so every API instance claims from the same
+    pool; a short Redis lock keeps instances from refilling it concurrently.
+
+    Attributes:
+        backend (SandboxPoolBackend): Creates and deletes the pooled sandboxes
+        policy (SandboxPoolPolicy): Sizing and cost policy
+        claims (int): Sandboxes handed out by this process
+        misses (int): Claims that found the pool empty
+        created (int): Sandboxes created by this process
+        evicted (int): Sandboxes deleted by this process for exceeding the policy
+    """
+
+    def __init__(self, backend: SandboxPoolBackend, policy: SandboxPoolPolicy, key_prefix: str = "sandbox_pool"):
+        """Initialize the pool.
+
+        Args:
+            backend: Creates and deletes the pooled sandboxes
+            policy: Sizing and cost policy
+            key_prefix: Prefix of the pool's Redis keys
+        """
+        self.backend = backend
+        self.policy = policy
+        self.key = f"{key_prefix}:{backend.name}"
+        self.lock_key = f"{self.key}:refill_lock"
+        self.claims = 0
+        self.misses = 0
+        self.created = 0
+        self.evicted = 0
+        self._task: Optional[asyncio.Task] = None
+        self._refill_task: Optional[asyncio.Task] = None
+
+    def _is_idle_expired(self, member: PooledSandbox) -> bool:
+        return time.time() - member.created_at > self.policy.max_idle_seconds
+
+    async def claim(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Take a ready sandbox from the pool and assign it to a project.
+
+        Args:
+            project_id: Project the sandbox is assigned to
+
+        Returns:
+            Project sandbox info ("id", "pass", "vnc_preview", "sandbox_url",
+            "token"), or None if the pool has no usable sandbox
+        """
+        try:
+            for _ in range(3):
+                popped = await redis.zpopmin(self.key, 1)
+                if not popped:
+                    break
+                member = PooledSandbox.from_json(popped[0][0])
+                if self._is_idle_expired(member):
+                    await self._delete(member, reason="idle")
+                    continue
+                try:
+                    info = await self.backend.assign(member.sandbox_id, project_id)
+                except Exception as e:
+                    logger.warning(f"Failed to assign pooled sandbox {member.sandbox_id}: {str(e)}")
+                    await self._delete(member, reason="assign failed")
+                    continue
+
+                self.claims += 1
+                logger.info(f"Claimed pooled sandbox {member.sandbox_id} for project {project_id}")
+                return {"id": member.sandbox_id, "pass": member.password, **info}
+        except Exception as e:
+            logger.warning(f"Sandbox pool claim failed for project {project_id}: {str(e)}")
+        finally:
+            self._schedule_refill()
+
+        self.misses += 1
+        logger.info(f"Sandbox pool {self.key} empty for project {project_id}")
+        return None
+
+    async def _delete(self, member: PooledSandbox, reason: str) -> None:
+        try:
+            await self.backend.delete(member.sandbox_id)
+            self.evicted += 1
+            logger.info(f"Evicted pooled sandbox {member.sandbox_id} ({reason})")
+        except Exception as e:
+            logger.warning(f"Failed to delete pooled sandbox {member.sandbox_id}: {str(e)}")
+
+    async def evict(self) -> int:
+        """Delete members idle past the policy, and members beyond the target size.
+
+        Returns:
+            Number of sandboxes evicted
+        """
+        evicted = 0
+        cutoff = time.time() - self.policy.max_idle_seconds
+        for raw in await redis.zrangebyscore(self.key, 0, cutoff):
+            # Only the instance whose ZREM succeeds deletes it; a claim may have won
+            if await redis.zrem(self.key, raw):
+                await self._delete(PooledSandbox.from_json(raw), reason="idle")
+                evicted += 1
+
+        overflow = await redis.zcard(self.key) - self.policy.target_size
+        if overflow > 0:
+            for raw, _ in await redis.zpopmin(self.key, overflow):
+                await self._delete(PooledSandbox.from_json(raw), reason="over target size")
+                evicted += 1
+        return evicted
+
+    async def refill(self) -> int:
+        """Create sandboxes until the pool reaches its target size.
+
+        At most max_creates_per_cycle sandboxes are created per call, and only
+        one instance refills at a time.
+
+        Returns:
+            Number of sandboxes added
+        """
+        if self.policy.target_size <= 0:
+            return 0
+        if not await redis.set(self.lock_key, "1", ex=600, nx=True):
+            return 0
+        try:
+            missing = self.policy.target_size - await redis.zcard(self.key)
+            count = min(missing, self.policy.max_creates_per_cycle)
+            if count <= 0:
+                return 0
+
+            async def create_one() -> Optional[PooledSandbox]:
+                password = str(uuid.uuid4())
+                try:
+                    sandbox_id = await self.backend.create(password)
+                except Exception as e:
+                    logger.warning(f"Failed to create pooled sandbox: {str(e)}")
+                    return None
+                return PooledSandbox(sandbox_id=sandbox_id, password=password, created_at=time.time())
+
+            members = [m for m in await asyncio.gather(*(create_one() for _ in range(count))) if m]
+            if members:
+                await redis.zadd(self.key, {member.to_json(): member.created_at for member in members})
+                self.created += len(members)
+                logger.info(f"Added {len(members)} sandboxes to pool {self.key}")
+            return len(members)
+        finally:
+            await redis.delete(self.lock_key)
+
+    def _schedule_refill(self) -> None:
+        """Refill in the background after a claim, without delaying the request."""
+        if self.policy.target_size > 0 and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self._safe_cycle())
+
+    async def _safe_cycle(self) -> None:
+        try:
+            await self.evict()
+            await self.refill()
+        except Exception as e:
+            logger.warning(f"Sandbox pool maintenance failed: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await self._safe_cycle()
+            await asyncio.sleep(self.policy.refill_interval)
+
+    def start(self) -> None:
+        """Start background eviction and refilling."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Sandbox pool {self.key} started (target size {self.policy.target_size})")
+
+    async def stop(self) -> None:
+        """Stop background maintenance; pooled sandboxes stay for the next start."""
+        for task in (self._task, self._refill_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._refill_task = None
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Return pool size and this process's claim/creation counters."""
+        return {
+            "pool": self.key,
+            "size": await redis.zcard(self.key),
+            "target_size": self.policy.target_size,
+            "claims": self.claims,
+            "misses": self.misses,
+            "created": self.created,
+            "evicted": self.evicted
+        }
+
+_sandbox_pool: Optional[SandboxPool] = None
+
+def get_sandbox_pool() -> Optional[SandboxPool]:
+    """Return the process's sandbox pool, or None if pooling is disabled or no backend is available."""
+    global _sandbox_pool
+    if _sandbox_pool is not None or config.SANDBOX_POOL_SIZE <= 0:
+        return _sandbox_pool
+
+    from sandbox.hybrid_sandbox import hybrid_sandbox
+    if hybrid_sandbox.preferred_mode == "daytona":
+        backend = DaytonaPoolBackend()
+    elif hybrid_sandbox.preferred_mode == "local":
+        backend = LocalPoolBackend()
+    else:
+        return None
+
+    _sandbox_pool = SandboxPool(backend, SandboxPoolPolicy(
+        target_size=config.SANDBOX_POOL_SIZE,
+        max_idle_seconds=config.SANDBOX_POOL_MAX_IDLE_MINUTES * 60
+    ))
+    return _sandbox_pool
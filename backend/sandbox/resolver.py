@@ -0,0 +1,148 @@
+"""
+Shared sandbox lookups for sandbox tools.
+
+Every sandbox tool needs the project's sandbox. Without sharing, each tool
+instance queried the projects table and called get_or_start_sandbox on its own,
+about seven identical lookups per run. The resolver resolves a project's sandbox
+once, behind a per-project lock so concurrent first calls wait for the same
+lookup. It keeps the handle for a short TTL and drops it when a tool reports a
+failure. run_agent seeds it with the project row it already fetched and injects
+it into every sandbox tool.
+"""
+
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from daytona_sdk import Sandbox
+from sandbox.sandbox import get_or_start_sandbox
+from services.supabase import DBConnection
+from utils.logger import logger
+
+@dataclass
+class SandboxHandle:
+    """A resolved sandbox of a project.
+
+    Attributes:
+        project_id (str): Project the sandbox belongs to
+        sandbox_id (str): Daytona sandbox ID
+        sandbox_pass (Optional[str]): VNC password stored with the project
+        sandbox (Sandbox): Started sandbox instance
+        resolved_at (float): Monotonic time of the lookup
+    """
+    project_id: str
+    sandbox_id: str
+    sandbox_pass: Optional[str]
+    sandbox: Sandbox
+    resolved_at: float
+
+class SandboxResolver:
+    """Resolves and caches project sandboxes for the tools of this process.
+
+    Attributes:
+        ttl (float): Seconds a resolved handle is reused before the sandbox state is checked again
+        lookups (int): Number of sandbox lookups performed
+        hits (int): Number of resolves served from the cache
+    """
+
+    def __init__(self, ttl: float = 300):
+        """Initialize an empty resolver.
+
+        Args:
+            ttl: Seconds a resolved handle is reused before the sandbox state is checked again
+        """
+        self.ttl = ttl
+        self._handles: Dict[str, SandboxHandle] = {}
+        self._sandbox_info: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def seed(self, project_id: str, sandbox_info: Dict[str, Any]) -> None:
+        """Record a project's sandbox info so resolving it skips the projects query.
+
+        Args:
+            project_id: Project ID
+            sandbox_info: The project row's "sandbox" column (with "id" and "pass")
+        """
+        if sandbox_info and sandbox_info.get('id'):
+            self._sandbox_info[project_id] = sandbox_info
+
+    def invalidate(self, project_id: str) -> None:
+        """Drop the cached handle of a project; the next resolve looks it up again."""
+        if self._handles.pop(project_id, None) is not None:
+            logger.debug(f"Invalidated cached sandbox of project {project_id}")
+
+    def _fresh(self, project_id: str) -> Optional[SandboxHandle]:
+        handle = self._handles.get(project_id)
+        if handle and time.monotonic() - handle.resolved_at < self.ttl:
+            return handle
+        return None
+
+    async def _get_sandbox_info(self, project_id: str, db: Optional[DBConnection]) -> Dict[str, Any]:
+        sandbox_info = self._sandbox_info.get(project_id)
+        if sandbox_info:
+            return sandbox_info
+
+        client = await (db or DBConnection()).client
+        project = client.table('projects').select('*').eq('project_id', project_id).execute()
+        if not project.data or len(project.data) == 0:
+            raise ValueError(f"Project {project_id} not found")
+
+        sandbox_info = project.data[0].get('sandbox', {})
+        if not sandbox_info.get('id'):
+            raise ValueError(f"No sandbox found for project {project_id}")
+        self._sandbox_info[project_id] = sandbox_info
+        return sandbox_info
+
+    async def resolve(self, project_id: str, db: Optional[DBConnection] = None) -> SandboxHandle:
+        """Return the started sandbox of a project.
+
+        Args:
+            project_id: Project ID
+            db: Database connection used if the project's sandbox info is not known yet
+
+        Returns:
+            The project's SandboxHandle
+        """
+        handle = self._fresh(project_id)
+        if handle:
+            self.hits += 1
+            return handle
+
+        lock = self._locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            # Another caller may have resolved it while we waited
+            handle = self._fresh(project_id)
+            if handle:
+                self.hits += 1
+                return handle
+
+            sandbox_info = await self._get_sandbox_info(project_id, db)
+            self.lookups += 1
+            sandbox = await get_or_start_sandbox(sandbox_info['id'])
+            handle = SandboxHandle(
+                project_id=project_id,
+                sandbox_id=sandbox_info['id'],
+                sandbox_pass=sandbox_info.get('pass'),
+                sandbox=sandbox,
+                resolved_at=time.monotonic()
+            )
+            self._prune()
+            self._handles[project_id] = handle
+            logger.debug(f"Resolved sandbox {handle.sandbox_id} for project {project_id}")
+            return handle
+
+    def _prune(self) -> None:
+        """Forget expired handles and idle locks so the resolver does not grow unbounded."""
+        now = time.monotonic()
+        for project_id in [pid for pid, h in self._handles.items() if now - h.resolved_at >= self.ttl]:
+            del self._handles[project_id]
+            lock = self._locks.get(project_id)
+            if lock and not lock.locked():
+                del self._locks[project_id]
+                self._sandbox_info.pop(project_id, None)
+
+# Process-wide resolver shared by all sandbox tools
+sandbox_resolver = SandboxResolver()
@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from utils.logger import logger
 from utils.config import config
 from utils.config import Configuration
+from sandbox.executor import sandbox_executor
 
 load_dotenv()
 
@@ -36,20 +37,20 @@ async def get_or_start_sandbox(sandbox_id: str):
     logger.info(f"Getting or starting sandbox with ID: {sandbox_id}")
     
     try:
-        sandbox = daytona.get_current_sandbox(sandbox_id)
+        sandbox = await sandbox_executor.run(daytona.get_current_sandbox, sandbox_id, timeout=60)
         
         # Check if sandbox needs to be started
         if sandbox.instance.state == WorkspaceState.ARCHIVED or sandbox.instance.state == WorkspaceState.STOPPED:
             logger.info(f"Sandbox is in {sandbox.instance.state} state. Starting...")
             try:
-                daytona.start(sandbox)
+                await sandbox_executor.run(daytona.start, sandbox, timeout=300)
                 # Wait a moment for the sandbox to initialize
                 # sleep(5)
                 # Refresh sandbox state after starting
-                sandbox = daytona.get_current_sandbox(sandbox_id)
+                sandbox = await sandbox_executor.run(daytona.get_current_sandbox, sandbox_id, timeout=60)
                 
                 # Start supervisord in a session when restarting
-                start_supervisord_session(sandbox)
+                await sandbox_executor.run(start_supervisord_session, sandbox, timeout=60)
             except Exception as e:
                 logger.error(f"Error starting sandbox: {e}")
                 raise e
@@ -79,7 +80,10 @@ def start_supervisord_session(sandbox: Sandbox):
         raise e
 
 def create_sandbox(password: str, project_id: str = None):
-    """Create a new sandbox with all required services configured and running."""
+    """Create a new sandbox with all required services configured and running.
+
+    Blocking; call it from async code through sandbox_executor.
+    """
     
     if not daytona:
         logger.error("Daytona client not initialized - cannot create sandboxes")
@@ -140,10 +144,10 @@ async def delete_sandbox(sandbox_id: str):
     
     try:
         # Get the sandbox
-        sandbox = daytona.get_current_sandbox(sandbox_id)
+        sandbox = await sandbox_executor.run(daytona.get_current_sandbox, sandbox_id, timeout=60)
         
         # Delete the sandbox
-        daytona.remove(sandbox)
+        await sandbox_executor.run(daytona.remove, sandbox, timeout=120)
         
         logger.info(f"Successfully deleted sandbox {sandbox_id}")
         return True
@@ -1,73 +1,67 @@
 
-from typing import Optional
+import os
+import json
+import shlex
+import functools
+from uuid import uuid4
+from typing import Optional, Dict, Any, Callable
 
 from agentpress.thread_manager import ThreadManager
 from agentpress.tool import Tool
 from daytona_sdk import Sandbox
-from sandbox.sandbox import get_or_start_sandbox
+from sandbox.resolver import SandboxResolver, sandbox_resolver as default_sandbox_resolver
+from sandbox.executor import sandbox_executor
 from utils.logger import logger
 from utils.files_utils import clean_path
 
+# Sources of the helper scripts shipped in the sandbox image under /app
+SANDBOX_HELPERS_DIR = os.path.join(os.path.dirname(__file__), "docker")
+# Extra seconds the executor waits for an exec beyond the command's own timeout
+EXEC_TIMEOUT_MARGIN = 15
+# Largest helper payload passed as an argument; Linux caps a single argument at 128KB,
+# so larger payloads are uploaded and piped to the helper's stdin
+MAX_HELPER_ARG_BYTES = 64 * 1024
+
 class SandboxToolsBase(Tool):
     """Base class for all sandbox tools that provides project-based sandbox access."""
     
     # Class variable to track if sandbox URLs have been printed
     _urls_printed = False
     
-    def __init__(self, project_id: str, thread_manager: Optional[ThreadManager] = None):
+    def __init__(
+        self,
+        project_id: str,
+        thread_manager: Optional[ThreadManager] = None,
+        sandbox_resolver: Optional[SandboxResolver] = None
+    ):
         super().__init__()
         self.project_id = project_id
         self.thread_manager = thread_manager
+        self.sandbox_resolver = sandbox_resolver or default_sandbox_resolver
         self.workspace_path = "/workspace"
         self._sandbox = None
         self._sandbox_id = None
         self._sandbox_pass = None
 
     async def _ensure_sandbox(self) -> Sandbox:
-        """Ensure we have a valid sandbox instance, retrieving it from the project if needed."""
-        if self._sandbox is None:
-            try:
-                # Get database client
-                client = await self.thread_manager.db.client
-                
-                # Get project data
-                project = client.table('projects').select('*').eq('project_id', self.project_id).execute()
-                if not project.data or len(project.data) == 0:
-                    raise ValueError(f"Project {self.project_id} not found")
-                
-                project_data = project.data[0]
-                sandbox_info = project_data.get('sandbox', {})
-                
-                if not sandbox_info.get('id'):
-                    raise ValueError(f"No sandbox found for project {self.project_id}")
-                
-                # Store sandbox info
-                self._sandbox_id = sandbox_info['id']
-                self._sandbox_pass = sandbox_info.get('pass')
-                
-                # Get or start the sandbox
-                self._sandbox = await get_or_start_sandbox(self._sandbox_id)
-                
-                # # Log URLs if not already printed
-                # if not SandboxToolsBase._urls_printed:
-                #     vnc_link = self._sandbox.get_preview_link(6080)
-                #     website_link = self._sandbox.get_preview_link(8080)
-                    
-                #     vnc_url = vnc_link.url if hasattr(vnc_link, 'url') else str(vnc_link)
-                #     website_url = website_link.url if hasattr(website_link, 'url') else str(website_link)
-                    
-                #     print("\033[95m***")
-                #     print(f"VNC URL: {vnc_url}")
-                #     print(f"Website URL: {website_url}")
-                #     print("***\033[0m")
-                #     SandboxToolsBase._urls_printed = True
-                
-            except Exception as e:
-                logger.error(f"Error retrieving sandbox for project {self.project_id}: {str(e)}", exc_info=True)
-                raise e
-        
+        """Ensure we have a valid sandbox instance, resolving it through the shared resolver."""
+        try:
+            db = self.thread_manager.db if self.thread_manager else None
+            handle = await self.sandbox_resolver.resolve(self.project_id, db)
+        except Exception as e:
+            logger.error(f"Error retrieving sandbox for project {self.project_id}: {str(e)}", exc_info=True)
+            raise e
+
+        self._sandbox = handle.sandbox
+        self._sandbox_id = handle.sandbox_id
+        self._sandbox_pass = handle.sandbox_pass
         return self._sandbox
 
+    def _invalidate_sandbox(self) -> None:
+        """Drop the shared sandbox handle after a failure so the next call resolves it again."""
+        self.sandbox_resolver.invalidate(self.project_id)
+        self._sandbox = None
+
     @property
     def sandbox(self) -> Sandbox:
         """Get the sandbox instance, ensuring it exists."""
@@ -82,6 +76,96 @@ class SandboxToolsBase(Tool):
             raise RuntimeError("Sandbox ID not initialized. Call _ensure_sandbox() first.")
         return self._sandbox_id
 
+    async def _sandbox_call(self, func: Callable[..., Any], *args, timeout: Optional[float] = None,
+                            invalidate: bool = True, **kwargs) -> Any:
+        """Run a blocking SDK call on the sandbox through the executor.
+
+        A failure drops the shared sandbox handle, since the cached sandbox may have
+        stopped; the next call checks its state again instead of waiting out the TTL.
+
+        Args:
+            func: Blocking SDK callable, e.g. sandbox.fs.upload_file
+            *args: Positional arguments of the call
+            timeout: Seconds to wait for the call; the executor default if None
+            invalidate: Whether a failure drops the handle; False for calls whose errors
+                are expected answers, such as probing for a missing file
+            **kwargs: Keyword arguments of the call
+
+        Returns:
+            The function's return value
+        """
+        try:
+            return await sandbox_executor.run(func, *args, timeout=timeout, **kwargs)
+        except Exception:
+            if invalidate:
+                self._invalidate_sandbox()
+            raise
+
+    async def _exec(self, command: str, timeout: int = 30) -> Any:
+        """Run a command in the sandbox through the SDK executor.
+
+        Args:
+            command: Shell command to run
+            timeout: Command timeout in seconds, passed to the sandbox
+
+        Returns:
+            The SDK's execution response (result and exit_code)
+        """
+        return await self._sandbox_call(
+            functools.partial(self.sandbox.process.exec, command, timeout=timeout),
+            timeout=timeout + EXEC_TIMEOUT_MARGIN
+        )
+
+    async def _run_helper(self, helper_path: str, payload: Dict[str, Any], timeout: int = 30) -> Dict[str, Any]:
+        """Run an in-sandbox helper script with a JSON payload and parse its JSON output.
+
+        Installs the helper from sandbox/docker first if the sandbox image predates it.
+
+        Args:
+            helper_path: Path of the helper in the sandbox (e.g. /app/tmux_batch.py)
+            payload: JSON-serializable argument passed to the helper (on stdin if large)
+            timeout: Exec timeout in seconds
+
+        Returns:
+            The JSON document printed last by the helper
+        """
+        await self._ensure_sandbox()
+        payload_json = json.dumps(payload)
+        payload_path = None
+        if len(payload_json.encode()) <= MAX_HELPER_ARG_BYTES:
+            command = f"python3 {helper_path} {shlex.quote(payload_json)}"
+        else:
+            payload_path = f"/tmp/helper_payload_{uuid4().hex}.json"
+            quoted_path = shlex.quote(payload_path)
+            command = "/bin/sh -c " + shlex.quote(
+                f"python3 {helper_path} < {quoted_path}; status=$?; rm -f {quoted_path}; exit $status"
+            )
+
+        async def run() -> Any:
+            if payload_path:
+                await self._sandbox_call(self.sandbox.fs.upload_file, payload_json.encode(), payload_path)
+            # Not retried on failure, as the batch may already have run partially
+            return await self._exec(command, timeout=timeout)
+
+        response = await run()
+        output = response.result or ""
+
+        if response.exit_code != 0 and ("can't open file" in output or "No such file" in output):
+            with open(os.path.join(SANDBOX_HELPERS_DIR, os.path.basename(helper_path)), "rb") as f:
+                content = f.read()
+            await self._sandbox_call(self.sandbox.fs.upload_file, content, helper_path)
+            response = await run()
+            output = response.result or ""
+
+        lines = [line for line in output.strip().splitlines() if line.strip()]
+        try:
+            data = json.loads(lines[-1])
+        except (IndexError, json.JSONDecodeError):
+            data = None
+        if not isinstance(data, dict):
+            raise RuntimeError(f"Unexpected output from {helper_path} (exit code {response.exit_code}): {output[:500]}")
+        return data
+
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace."""
         cleaned_path = clean_path(path, self.workspace_path)
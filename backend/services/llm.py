@@ -27,6 +27,10 @@ MAX_RETRIES = 2
 RATE_LIMIT_DELAY = 30
 RETRY_DELAY = 0.1
 
+# Prompt cache layout
+CACHE_BREAKPOINT_TOKEN_INTERVAL = 8192  # Approximate tokens between history checkpoints
+MAX_HISTORY_CACHE_BREAKPOINTS = 3  # Anthropic allows 4 breakpoints, one goes to the system prompt
+
 class LLMError(Exception):
     """Base exception for LLM-related errors."""
     pass
@@ -64,6 +68,56 @@ def setup_api_keys() -> None:
     else:
         logger.warning(f"Missing AWS credentials for Bedrock integration - access_key: {bool(aws_access_key)}, secret_key: {bool(aws_secret_key)}, region: {aws_region}")
 
+def _estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """Cheaply estimate the token size of a message (about 4 characters per token)."""
+    content = message.get("content")
+    if isinstance(content, str):
+        return len(content) // 4 + 1
+    return len(json.dumps(content, default=str)) // 4 + 1
+
+def _apply_cache_control_to_last_block(message: Dict[str, Any]) -> None:
+    """Mark the last content block of a message as a cache breakpoint."""
+    content = message.get("content")
+    if isinstance(content, str):
+        message["content"] = [
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+        ]
+    elif isinstance(content, list) and content and isinstance(content[-1], dict):
+        content[-1]["cache_control"] = {"type": "ephemeral"}
+
+def select_stable_cache_breakpoints(messages: List[Dict[str, Any]], volatile_tail_messages: int = 0) -> List[int]:
+    """Pick history cache breakpoints by token position.
+
+    The last stable message (before the volatile tail) always gets a breakpoint so the
+    whole history is written to the cache. The remaining breakpoints go to the latest
+    messages that cross a CACHE_BREAKPOINT_TOKEN_INTERVAL boundary. Because history is
+    append-only, those checkpoints stay on the same messages as the thread grows and
+    keep reading the entries written on earlier turns.
+
+    Args:
+        messages: Prepared messages, system prompt first
+        volatile_tail_messages: Number of trailing messages that change every turn
+
+    Returns:
+        Indices of the messages to mark, in ascending order
+    """
+    start = 1 if messages and messages[0].get("role") == "system" else 0
+    last_stable_idx = len(messages) - 1 - max(volatile_tail_messages, 0)
+    if last_stable_idx < start:
+        return []
+
+    checkpoints = []
+    cumulative_tokens = _estimate_message_tokens(messages[0]) if start else 0
+    for i in range(start, last_stable_idx):
+        before = cumulative_tokens
+        cumulative_tokens += _estimate_message_tokens(messages[i])
+        if cumulative_tokens // CACHE_BREAKPOINT_TOKEN_INTERVAL > before // CACHE_BREAKPOINT_TOKEN_INTERVAL:
+            checkpoints.append(i)
+
+    breakpoints = checkpoints[-(MAX_HISTORY_CACHE_BREAKPOINTS - 1):] if MAX_HISTORY_CACHE_BREAKPOINTS > 1 else []
+    breakpoints.append(last_stable_idx)
+    return breakpoints
+
 async def handle_error(error: Exception, attempt: int, max_attempts: int) -> None:
     """Handle API errors with appropriate delays and logging."""
     delay = RATE_LIMIT_DELAY if isinstance(error, litellm.exceptions.RateLimitError) else RETRY_DELAY
@@ -85,7 +139,9 @@ def prepare_params(
     top_p: Optional[float] = None,
     model_id: Optional[str] = None,
     enable_thinking: Optional[bool] = False,
-    reasoning_effort: Optional[str] = 'low'
+    reasoning_effort: Optional[str] = 'low',
+    cache_layout: str = "default",
+    volatile_tail_messages: int = 0
 ) -> Dict[str, Any]:
     """Prepare parameters for the API call."""
     params = {
@@ -181,6 +237,13 @@ def prepare_params(
                              item["cache_control"] = {"type": "ephemeral"}
                              break # Apply to the first text block only for system prompt
 
+        # 2a. Stable layout: breakpoints by token position, volatile tail left uncached
+        if cache_layout == "stable":
+            for idx in select_stable_cache_breakpoints(messages, volatile_tail_messages):
+                _apply_cache_control_to_last_block(messages[idx])
+            logger.debug(f"Applied stable prompt cache layout (volatile tail: {volatile_tail_messages})")
+            return _apply_reasoning_params(params, effective_model_name, enable_thinking, reasoning_effort)
+
         # 2. Find and process relevant user and assistant messages (limit to 4 max)
         last_user_idx = -1
         second_last_user_idx = -1
@@ -227,7 +290,15 @@ def prepare_params(
         apply_cache_control(second_last_user_idx, "second last user")
         apply_cache_control(last_assistant_idx, "last assistant")
 
-    # Add reasoning_effort for Anthropic models if enabled
+    return _apply_reasoning_params(params, effective_model_name, enable_thinking, reasoning_effort)
+
+def _apply_reasoning_params(
+    params: Dict[str, Any],
+    effective_model_name: str,
+    enable_thinking: Optional[bool],
+    reasoning_effort: Optional[str]
+) -> Dict[str, Any]:
+    """Add reasoning_effort for Anthropic models if enabled."""
     use_thinking = enable_thinking if enable_thinking is not None else False
     is_anthropic = "anthropic" in effective_model_name.lower() or "claude" in effective_model_name.lower()
 
@@ -253,7 +324,9 @@ async def make_llm_api_call(
     top_p: Optional[float] = None,
     model_id: Optional[str] = None,
     enable_thinking: Optional[bool] = False,
-    reasoning_effort: Optional[str] = 'low'
+    reasoning_effort: Optional[str] = 'low',
+    cache_layout: str = "default",
+    volatile_tail_messages: int = 0
 ) -> Union[Dict[str, Any], AsyncGenerator]:
     """
     Make an API call to a language model using LiteLLM.
@@ -273,6 +346,8 @@ async def make_llm_api_call(
         model_id: Optional ARN for Bedrock inference profiles
         enable_thinking: Whether to enable thinking
         reasoning_effort: Level of reasoning effort
+        cache_layout: Anthropic prompt cache layout ("default" or "stable")
+        volatile_tail_messages: Number of trailing messages excluded from caching in the stable layout
 
     Returns:
         Union[Dict[str, Any], AsyncGenerator]: API response or stream
@@ -298,7 +373,9 @@ async def make_llm_api_call(
         top_p=top_p,
         model_id=model_id,
         enable_thinking=enable_thinking,
-        reasoning_effort=reasoning_effort
+        reasoning_effort=reasoning_effort,
+        cache_layout=cache_layout,
+        volatile_tail_messages=volatile_tail_messages
     )
     last_error = None
     for attempt in range(MAX_RETRIES):
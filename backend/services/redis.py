@@ -140,6 +140,76 @@ async def llen(key: str) -> int:
     return await redis_client.llen(key)
 
 
+# Sorted set operations
+async def zadd(key: str, mapping: dict):
+    """Add members with scores to a sorted set."""
+    redis_client = await get_client()
+    return await redis_client.zadd(key, mapping)
+
+
+async def zcard(key: str) -> int:
+    """Get the number of members in a sorted set."""
+    redis_client = await get_client()
+    return await redis_client.zcard(key)
+
+
+async def zpopmin(key: str, count: int = 1) -> List[Any]:
+    """Remove and return the members with the lowest scores."""
+    redis_client = await get_client()
+    return await redis_client.zpopmin(key, count)
+
+
+async def zrangebyscore(key: str, min_score: float, max_score: float) -> List[str]:
+    """Get the members of a sorted set with scores within a range."""
+    redis_client = await get_client()
+    return await redis_client.zrangebyscore(key, min_score, max_score)
+
+
+async def zrem(key: str, *members: str) -> int:
+    """Remove members from a sorted set."""
+    redis_client = await get_client()
+    return await redis_client.zrem(key, *members)
+
+
+# Hash operations
+async def hset(key: str, field: str, value: str):
+    """Set a field of a hash."""
+    redis_client = await get_client()
+    return await redis_client.hset(key, field, value)
+
+
+async def hget(key: str, field: str):
+    """Get a field of a hash."""
+    redis_client = await get_client()
+    return await redis_client.hget(key, field)
+
+
+async def hdel(key: str, *fields: str) -> int:
+    """Delete fields of a hash."""
+    redis_client = await get_client()
+    return await redis_client.hdel(key, *fields)
+
+
+async def hgetdel(key: str, field: str):
+    """Get and delete a field of a hash in one MULTI/EXEC transaction."""
+    redis_client = await get_client()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hget(key, field)
+        pipe.hdel(key, field)
+        value, _ = await pipe.execute()
+    return value
+
+
+async def lrangedel(key: str) -> List[str]:
+    """Get every element of a list and delete it in one MULTI/EXEC transaction."""
+    redis_client = await get_client()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        values, _ = await pipe.execute()
+    return values
+
+
 # Key management
 async def expire(key: str, time: int):
     """Set a key's time to live in seconds."""
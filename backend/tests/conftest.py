@@ -0,0 +1,18 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend packages import as top-level modules, and the sandbox API modules run from their
+# own directory inside the sandbox image
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, "sandbox", "docker")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# utils.config refuses to load without its required settings; tests never reach these services
+for key in (
+    "ANTHROPIC_API_KEY", "SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY",
+    "REDIS_HOST", "REDIS_PASSWORD", "DAYTONA_API_KEY", "DAYTONA_SERVER_URL", "DAYTONA_TARGET",
+    "TAVILY_API_KEY", "RAPID_API_KEY", "FIRECRAWL_API_KEY",
+):
+    os.environ.setdefault(key, "test")
@@ -0,0 +1,118 @@
+import importlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+import file_edit_api
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    root = os.path.realpath(tmp_path / "workspace")
+    os.makedirs(root)
+    monkeypatch.setattr(file_edit_api, "WORKSPACE_PATH", root)
+    return root
+
+
+def hunks(*pairs):
+    return [file_edit_api.PatchHunk(old_str=old, new_str=new) for old, new in pairs]
+
+
+class TestResolvePath:
+    def test_relative_path_resolves_inside_workspace(self, workspace):
+        assert file_edit_api.resolve_path("src/app.py") == os.path.join(workspace, "src", "app.py")
+
+    def test_absolute_path_is_taken_relative_to_workspace(self, workspace):
+        assert file_edit_api.resolve_path("/etc/passwd") == os.path.join(workspace, "etc", "passwd")
+
+    def test_workspace_root_is_allowed(self, workspace):
+        assert file_edit_api.resolve_path(".") == workspace
+
+    @pytest.mark.parametrize("path", ["../outside.txt", "src/../../outside.txt", "/../../etc/passwd"])
+    def test_parent_escape_is_refused(self, workspace, path):
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.resolve_path(path)
+        assert e.value.error == "invalid"
+
+    def test_sibling_with_workspace_prefix_is_refused(self, workspace):
+        os.makedirs(workspace + "-other")
+        with pytest.raises(file_edit_api.FileEditError):
+            file_edit_api.resolve_path("../" + os.path.basename(workspace) + "-other/file.txt")
+
+    def test_symlink_out_of_workspace_is_refused(self, workspace, tmp_path):
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        os.symlink(outside, os.path.join(workspace, "link"))
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.resolve_path("link/secret.txt")
+        assert e.value.error == "invalid"
+
+    def test_symlink_inside_workspace_resolves_to_target(self, workspace):
+        os.makedirs(os.path.join(workspace, "real"))
+        os.symlink(os.path.join(workspace, "real"), os.path.join(workspace, "alias"))
+        assert file_edit_api.resolve_path("alias/file.txt") == os.path.join(workspace, "real", "file.txt")
+
+
+class TestApplyHunks:
+    def test_hunks_apply_in_order(self):
+        content = "alpha\nbeta\ngamma\n"
+        result = file_edit_api.apply_hunks(content, hunks(("alpha", "ALPHA"), ("gamma", "GAMMA")))
+        assert result == "ALPHA\nbeta\nGAMMA\n"
+
+    def test_later_hunk_sees_earlier_edits(self):
+        assert file_edit_api.apply_hunks("one two", hunks(("one", "three"), ("three two", "done"))) == "done"
+
+    def test_context_mismatch_reports_hunk(self):
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.apply_hunks("def run():\n    pass\n", hunks(("run", "start"), ("def run():", "def go():")))
+        assert e.value.error == "no_match"
+        assert e.value.details == {"hunk": 2}
+
+    def test_whitespace_must_match(self):
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.apply_hunks("if x:\n    return 1\n", hunks(("if x:\n  return 1", "if x:\n  return 2")))
+        assert e.value.error == "no_match"
+
+    def test_overlapping_hunks_fail(self):
+        # The second hunk's text was consumed by the first
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.apply_hunks("foo = bar + baz\n", hunks(("foo = bar", "foo = qux"), ("bar + baz", "baz")))
+        assert e.value.error == "no_match"
+        assert e.value.details == {"hunk": 2}
+
+    def test_ambiguous_hunk_reports_lines(self):
+        with pytest.raises(file_edit_api.FileEditError) as e:
+            file_edit_api.apply_hunks("x = 1\ny = 2\nx = 1\n", hunks(("x = 1", "x = 3")))
+        assert e.value.error == "multiple_matches"
+        assert e.value.details == {"hunk": 1, "lines": [1, 3]}
+
+
+class TestRequireToken:
+    @pytest.fixture
+    def load_module(self, monkeypatch):
+        def load(password):
+            if password is None:
+                monkeypatch.delenv("VNC_PASSWORD", raising=False)
+            else:
+                monkeypatch.setenv("VNC_PASSWORD", password)
+            return importlib.reload(file_edit_api)
+
+        yield load
+        monkeypatch.delenv("VNC_PASSWORD", raising=False)
+        importlib.reload(file_edit_api)
+
+    @pytest.mark.parametrize("password", [None, "", "vncpassword"])
+    def test_refused_without_a_real_password(self, load_module, password):
+        module = load_module(password)
+        for token in (None, "", "vncpassword"):
+            with pytest.raises(HTTPException) as e:
+                module.require_token(token)
+            assert e.value.status_code == 403
+
+    def test_accepts_only_the_sandbox_password(self, load_module):
+        module = load_module("s3cret")
+        module.require_token("s3cret")
+        for token in (None, "", "s3cre", "s3cret2"):
+            with pytest.raises(HTTPException):
+                module.require_token(token)
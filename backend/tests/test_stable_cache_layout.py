@@ -0,0 +1,142 @@
+import pytest
+
+from agentpress import thread_manager
+from agentpress.thread_manager import ThreadManager
+from services import llm
+from services.llm import select_stable_cache_breakpoints
+
+
+def message(role, tokens, message_id=None):
+    # _estimate_message_tokens counts about 4 characters per token, plus one
+    msg = {"role": role, "content": "x" * (4 * (tokens - 1))}
+    if message_id:
+        msg["message_id"] = message_id
+    return msg
+
+
+class TestSelectStableCacheBreakpoints:
+    @pytest.fixture(autouse=True)
+    def small_interval(self, monkeypatch):
+        monkeypatch.setattr(llm, "CACHE_BREAKPOINT_TOKEN_INTERVAL", 100)
+        monkeypatch.setattr(llm, "MAX_HISTORY_CACHE_BREAKPOINTS", 3)
+
+    def test_no_history(self):
+        assert select_stable_cache_breakpoints([]) == []
+        assert select_stable_cache_breakpoints([message("system", 10)]) == []
+        assert select_stable_cache_breakpoints([message("system", 10), message("user", 10)], volatile_tail_messages=1) == []
+
+    def test_last_stable_message_always_marked(self):
+        messages = [message("system", 10), message("user", 10), message("assistant", 10)]
+        assert select_stable_cache_breakpoints(messages) == [2]
+        assert select_stable_cache_breakpoints(messages, volatile_tail_messages=1) == [1]
+
+    def test_checkpoints_at_interval_boundaries(self):
+        # Cumulative tokens: 10, 70, 130, 190, 250, 310
+        messages = [message("system", 10)] + [message("user", 60) for _ in range(5)]
+        assert select_stable_cache_breakpoints(messages) == [2, 4, 5]
+
+    def test_breakpoints_are_capped_keeping_the_latest_checkpoints(self):
+        # Every message crosses a boundary
+        messages = [message("system", 10)] + [message("user", 100) for _ in range(8)]
+        breakpoints = select_stable_cache_breakpoints(messages)
+        assert len(breakpoints) == 3
+        assert breakpoints == [6, 7, 8]
+
+    def test_checkpoints_stay_put_as_history_grows(self):
+        # Cumulative tokens: 10, 55, 100, 145, 190, 235, 280, then 325 once a message is appended
+        messages = [message("system", 10)] + [message("user", 45) for _ in range(6)]
+        assert select_stable_cache_breakpoints(messages) == [2, 5, 6]
+        messages.append(message("assistant", 45))
+        assert select_stable_cache_breakpoints(messages) == [2, 5, 7]
+
+
+class FakeThreadState:
+    def __init__(self, fail=False):
+        self.values = {}
+        self.fail = fail
+
+    async def get(self, thread_id, field):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.values.get((thread_id, field))
+
+    async def set(self, thread_id, field, value):
+        if self.fail:
+            return False
+        self.values[(thread_id, field)] = value
+        return True
+
+
+def count_tokens(model=None, messages=None):
+    return sum(len(str(msg.get("content"))) // 4 for msg in messages)
+
+
+def new_manager(monkeypatch):
+    # Skips the constructor, which connects to the database and tracing
+    manager = ThreadManager.__new__(ThreadManager)
+    manager._compression_thresholds = {}
+    monkeypatch.setattr(manager, "_get_context_budget", lambda llm_model: 3000)
+    return manager
+
+
+def history(turns):
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": "u" * 8000, "message_id": f"user-{turn}"})
+        messages.append({"role": "assistant", "content": "a" * 400, "message_id": f"assistant-{turn}"})
+    return messages
+
+
+class TestStickyCompressionThreshold:
+    @pytest.fixture(autouse=True)
+    def fake_counter(self, monkeypatch):
+        monkeypatch.setattr(thread_manager, "token_counter", count_tokens)
+
+    @pytest.mark.asyncio
+    async def test_threshold_persists_across_runs(self, monkeypatch):
+        state = FakeThreadState()
+        monkeypatch.setattr(thread_manager, "thread_state", state)
+
+        first = await new_manager(monkeypatch)._compress_messages_stable(history(4), "model", "thread")
+        threshold = state.values[("thread", "compression_threshold")]
+        assert threshold < 4096
+        assert count_tokens(messages=first) <= 3000
+
+        # A new agent run builds a new ThreadManager; its history needs no halving on its own
+        manager = new_manager(monkeypatch)
+        second = await manager._compress_messages_stable(history(2), "model", "thread")
+        assert state.values[("thread", "compression_threshold")] == threshold
+        assert manager._compression_thresholds["thread"] == threshold
+        # Messages compressed on the first run are compressed identically on the second
+        assert second[0]["content"] == first[0]["content"]
+
+    @pytest.mark.asyncio
+    async def test_threshold_only_decreases(self, monkeypatch):
+        state = FakeThreadState()
+        state.values[("thread", "compression_threshold")] = 64
+        monkeypatch.setattr(thread_manager, "thread_state", state)
+
+        await new_manager(monkeypatch)._compress_messages_stable(history(1), "model", "thread")
+        assert state.values[("thread", "compression_threshold")] == 64
+
+    @pytest.mark.asyncio
+    async def test_threads_keep_separate_thresholds(self, monkeypatch):
+        state = FakeThreadState()
+        monkeypatch.setattr(thread_manager, "thread_state", state)
+
+        await new_manager(monkeypatch)._compress_messages_stable(history(4), "model", "busy")
+        await new_manager(monkeypatch)._compress_messages_stable(history(1), "model", "quiet")
+        assert state.values[("quiet", "compression_threshold")] == 4096
+        assert state.values[("busy", "compression_threshold")] < 4096
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_instance_threshold_without_redis(self, monkeypatch):
+        monkeypatch.setattr(thread_manager, "thread_state", FakeThreadState(fail=True))
+        manager = new_manager(monkeypatch)
+
+        first = await manager._compress_messages_stable(history(4), "model", "thread")
+        threshold = manager._compression_thresholds["thread"]
+        assert threshold < 4096
+        second = await manager._compress_messages_stable(history(2), "model", "thread")
+        assert manager._compression_thresholds["thread"] == threshold
+        assert second[0]["content"] == first[0]["content"]
@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+from agentpress.tool import ToolResult, tool_resources
+from agentpress.tool_scheduler import ResolvedResources, ToolScheduler, conflicts, resolve_resource
+
+
+def resources(reads=(), writes=(), exclusive=False):
+    return ResolvedResources(reads=set(reads), writes=set(writes), exclusive=exclusive)
+
+
+class TestConflicts:
+    def test_reads_never_conflict(self):
+        assert not conflicts(resources(reads=[("file", "a.py")]), resources(reads=[("file", "a.py")]))
+
+    def test_write_conflicts_with_read_either_way(self):
+        write = resources(writes=[("file", "a.py")])
+        read = resources(reads=[("file", "a.py")])
+        assert conflicts(write, read)
+        assert conflicts(read, write)
+
+    def test_writes_to_same_resource_conflict(self):
+        assert conflicts(resources(writes=[("file", "a.py")]), resources(writes=[("file", "a.py")]))
+
+    def test_different_paths_and_kinds_do_not_conflict(self):
+        assert not conflicts(resources(writes=[("file", "a.py")]), resources(writes=[("file", "b.py")]))
+        assert not conflicts(resources(writes=[("file", "a.py")]), resources(reads=[("browser", "a.py")]))
+
+    def test_directory_overlaps_its_contents(self):
+        assert conflicts(resources(writes=[("file", "src")]), resources(reads=[("file", "src/app.py")]))
+        assert not conflicts(resources(writes=[("file", "src")]), resources(reads=[("file", "src2/app.py")]))
+
+    def test_empty_path_covers_the_whole_kind(self):
+        assert conflicts(resources(writes=[("file", "")]), resources(reads=[("file", "a.py")]))
+
+    def test_exclusive_conflicts_with_everything(self):
+        assert conflicts(resources(exclusive=True), resources())
+        assert conflicts(resources(), resources(exclusive=True))
+
+
+class TestResolveResource:
+    def test_fills_placeholders_from_arguments(self):
+        assert resolve_resource("file:{file_path}", {"file_path": "src/app.py"}) == ("file", "src/app.py")
+
+    def test_file_paths_are_normalized(self):
+        assert resolve_resource("file:{file_path}", {"file_path": "/workspace/src/"}) == ("file", "src")
+        assert resolve_resource("file:{file_path}", {"file_path": "./"}) == ("file", "")
+
+    def test_missing_argument_covers_the_whole_kind(self):
+        assert resolve_resource("file:{file_path}", {}) == ("file", "")
+        assert resolve_resource("file:{file_path}", {"file_path": ""}) == ("file", "")
+
+    def test_template_without_placeholder(self):
+        assert resolve_resource("browser", {}) == ("browser", "")
+        assert resolve_resource("session:{session_name}", {"session_name": 7}) == ("session", "7")
+
+
+class FakeRegistry:
+    def __init__(self, *functions):
+        self.functions = {fn.__name__: fn for fn in functions}
+
+    def get_available_functions(self):
+        return self.functions
+
+
+@tool_resources(writes=["file:{file_path}"])
+def create_file(file_path: str):
+    pass
+
+
+@tool_resources(reads=["file:{file_path}"])
+def read_file(file_path: str):
+    pass
+
+
+@tool_resources(reads=["web"])
+def web_search(query: str):
+    pass
+
+
+def execute_command(command: str):
+    pass
+
+
+def call(name, **arguments):
+    return {"function_name": name, "arguments": arguments}
+
+
+class Recorder:
+    """Executes calls, each waiting for its own release, and records start and finish order."""
+
+    def __init__(self):
+        self.events = []
+        self.releases = {}
+
+    def release(self, index):
+        self.releases.setdefault(index, asyncio.Event()).set()
+
+    async def execute(self, tool_call):
+        index = tool_call["arguments"]["index"]
+        self.events.append(("start", index))
+        await self.releases.setdefault(index, asyncio.Event()).wait()
+        self.events.append(("end", index))
+        return ToolResult(success=True, output=str(index))
+
+    def started(self):
+        return {index for kind, index in self.events if kind == "start"}
+
+
+def make_scheduler(recorder):
+    registry = FakeRegistry(create_file, read_file, web_search, execute_command)
+    return ToolScheduler(registry, recorder.execute)
+
+
+class TestToolScheduler:
+    def test_undecorated_tool_is_exclusive(self):
+        scheduler = make_scheduler(Recorder())
+        assert scheduler.resolve(call("execute_command", command="ls")).exclusive
+        assert scheduler.resolve(call("unknown_tool")).exclusive
+
+    def test_resolve_parses_json_arguments(self):
+        scheduler = make_scheduler(Recorder())
+        resolved = scheduler.resolve({"function_name": "create_file", "arguments": '{"file_path": "a.py"}'})
+        assert resolved.writes == {("file", "a.py")}
+        assert scheduler.resolve({"function_name": "create_file", "arguments": "not json"}).writes == {("file", "")}
+
+    @pytest.mark.asyncio
+    async def test_independent_calls_run_concurrently(self):
+        recorder = Recorder()
+        scheduler = make_scheduler(recorder)
+        tasks = [scheduler.submit(call("web_search", query="q", index=i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert recorder.started() == {0, 1, 2}
+        assert scheduler.dependency_count == 0
+        for i in range(3):
+            recorder.release(i)
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_dependent_call_waits_for_earlier_write(self):
+        recorder = Recorder()
+        scheduler = make_scheduler(recorder)
+        write = scheduler.submit(call("create_file", file_path="a.py", index=0))
+        other = scheduler.submit(call("read_file", file_path="b.py", index=1))
+        read = scheduler.submit(call("read_file", file_path="a.py", index=2))
+        await asyncio.sleep(0)
+        assert recorder.started() == {0, 1}
+        recorder.release(1)
+        recorder.release(2)
+        await other
+        assert 2 not in recorder.started()
+        recorder.release(0)
+        await asyncio.gather(write, read)
+        assert recorder.events.index(("end", 0)) < recorder.events.index(("start", 2))
+        assert scheduler.dependency_count == 1
+
+    @pytest.mark.asyncio
+    async def test_exclusive_call_waits_for_all_earlier_calls_and_blocks_later_ones(self):
+        recorder = Recorder()
+        scheduler = make_scheduler(recorder)
+        for i in range(4):
+            recorder.release(i)
+        results = await scheduler.run([
+            call("web_search", query="q", index=0),
+            call("create_file", file_path="a.py", index=1),
+            call("execute_command", command="ls", index=2),
+            call("read_file", file_path="b.py", index=3),
+        ])
+        order = recorder.events
+        assert order.index(("end", 0)) < order.index(("start", 2))
+        assert order.index(("end", 1)) < order.index(("start", 2))
+        assert order.index(("end", 2)) < order.index(("start", 3))
+        assert [result.output for _, result in results] == ["0", "1", "2", "3"]
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_releases_dependents(self):
+        async def execute(tool_call):
+            if tool_call["function_name"] == "create_file":
+                raise RuntimeError("disk full")
+            return ToolResult(success=True, output="read")
+
+        scheduler = ToolScheduler(FakeRegistry(create_file, read_file), execute)
+        results = await scheduler.run([call("create_file", file_path="a.py"), call("read_file", file_path="a.py")])
+        assert not results[0][1].success
+        assert "disk full" in results[0][1].output
+        assert results[1][1].success
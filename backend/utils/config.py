@@ -141,6 +141,11 @@ class Configuration:
     DAYTONA_API_KEY: str
     DAYTONA_SERVER_URL: str
     DAYTONA_TARGET: str
+    # Warm sandbox pool: started sandboxes kept ready for new projects (0 disables it)
+    SANDBOX_POOL_SIZE: int = 0
+    SANDBOX_POOL_MAX_IDLE_MINUTES: int = 10
+    # Percentage of browser states also archived as messages (the latest one is always kept in Redis)
+    BROWSER_STATE_ARCHIVE_PERCENT: int = 0
     
     # Search and other API keys
     TAVILY_API_KEY: str
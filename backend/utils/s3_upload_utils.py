@@ -8,12 +8,26 @@ from datetime import datetime
 from utils.logger import logger
 from services.supabase import DBConnection
 
-async def upload_base64_image(base64_data: str, bucket_name: str = "browser-screenshots") -> str:
+# File extensions of the image types recognised by their leading bytes
+IMAGE_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/gif": "gif"}
+
+def detect_image_type(image_data: bytes) -> str:
+    """Return the MIME type of image bytes from their signature, defaulting to PNG."""
+    if image_data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+        return "image/webp"
+    if image_data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    return "image/png"
+
+async def upload_base64_image(base64_data: str, bucket_name: str = "browser-screenshots", content_type: str = None) -> str:
     """Upload a base64 encoded image to Supabase storage and return the URL.
     
     Args:
         base64_data (str): Base64 encoded image data (with or without data URL prefix)
         bucket_name (str): Name of the storage bucket to upload to
+        content_type (str, optional): MIME type of the image; detected from the data if not given
         
     Returns:
         str: Public URL of the uploaded image
@@ -21,15 +35,18 @@ async def upload_base64_image(base64_data: str, bucket_name: str = "browser-scre
     try:
         # Remove data URL prefix if present
         if base64_data.startswith('data:'):
-            base64_data = base64_data.split(',')[1]
+            prefix, base64_data = base64_data.split(',', 1)
+            content_type = content_type or prefix[5:].split(';')[0] or None
         
         # Decode base64 data
         image_data = base64.b64decode(base64_data)
+        if content_type not in IMAGE_EXTENSIONS:
+            content_type = detect_image_type(image_data)
         
         # Generate unique filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         unique_id = str(uuid.uuid4())[:8]
-        filename = f"image_{timestamp}_{unique_id}.png"
+        filename = f"image_{timestamp}_{unique_id}.{IMAGE_EXTENSIONS[content_type]}"
         
         # Upload to Supabase storage
         db = DBConnection()
@@ -37,7 +54,7 @@ async def upload_base64_image(base64_data: str, bucket_name: str = "browser-scre
         storage_response = await client.storage.from_(bucket_name).upload(
             filename,
             image_data,
-            {"content-type": "image/png"}
+            {"content-type": content_type}
         )
         
         # Get public URL
@@ -1,6 +1,7 @@
 export const DEFAULT_AGENTPRESS_TOOLS: Record<string, { enabled: boolean; description: string; icon: string; color: string }> = {
     'sb_shell_tool': { enabled: false, description: 'Execute shell commands in tmux sessions for terminal operations, CLI tools, and system management', icon: '💻', color: 'bg-slate-100 dark:bg-slate-800' },
     'sb_files_tool': { enabled: false, description: 'Create, read, update, and delete files in the workspace with comprehensive file management', icon: '📁', color: 'bg-blue-100 dark:bg-blue-800/50' },
+    'sb_search_tool': { enabled: false, description: 'Search file contents across the workspace with ripgrep, returning only the matching lines', icon: '🔎', color: 'bg-teal-100 dark:bg-teal-800/50' },
     'sb_browser_tool': { enabled: false, description: 'Browser automation for web navigation, clicking, form filling, and page interaction', icon: '🌐', color: 'bg-indigo-100 dark:bg-indigo-800/50' },
     'sb_deploy_tool': { enabled: false, description: 'Deploy applications and services with automated deployment capabilities', icon: '🚀', color: 'bg-green-100 dark:bg-green-800/50' },
     'sb_expose_tool': { enabled: false, description: 'Expose services and manage ports for application accessibility', icon: '🔌', color: 'bg-orange-100 dark:bg-orange-800/20' },
@@ -13,6 +14,7 @@ export const getToolDisplayName = (toolName: string): string => {
     const displayNames: Record<string, string> = {
       'sb_shell_tool': 'Terminal',
       'sb_files_tool': 'File Manager',
+      'sb_search_tool': 'Code Search',
       'sb_browser_tool': 'Browser Automation',
       'sb_deploy_tool': 'Deploy Tool',
       'sb_expose_tool': 'Port Exposure',
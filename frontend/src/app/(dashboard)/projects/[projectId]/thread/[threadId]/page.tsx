@@ -97,6 +97,7 @@ export default function ThreadPage({
     setExternalNavIndex,
     handleToolClick,
     handleStreamingToolCall,
+    handleStreamingToolOutput,
     toggleSidePanel,
     handleSidePanelNavigate,
     userClosedPanelRef,
@@ -225,6 +226,7 @@ export default function ThreadPage({
     status: streamHookStatus,
     textContent: streamingTextContent,
     toolCall: streamingToolCall,
+    toolOutput: streamingToolOutput,
     error: streamError,
     agentRunId: currentHookRunId,
     startStreaming,
@@ -517,6 +519,10 @@ export default function ThreadPage({
     }
   }, [streamingToolCall, handleStreamingToolCall]);
 
+  useEffect(() => {
+    handleStreamingToolOutput(streamingToolOutput);
+  }, [streamingToolOutput, handleStreamingToolOutput]);
+
   if (!initialLoadCompleted || isLoading) {
     return <ThreadSkeleton isSidePanelOpen={isSidePanelOpen} />;
   }
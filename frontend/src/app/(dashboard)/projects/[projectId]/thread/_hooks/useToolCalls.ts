@@ -3,6 +3,7 @@ import { toast } from 'sonner';
 import { ToolCallInput } from '@/components/thread/tool-call-side-panel';
 import { UnifiedMessage, ParsedMetadata, StreamingToolCall, AgentStatus } from '../_types';
 import { safeJsonParse } from '@/components/thread/utils';
+import { ToolOutputStreamState } from '@/hooks/useAgentStream';
 import { ParsedContent } from '@/components/thread/types';
 import { extractToolName } from '@/components/thread/tool-views/xml-parser';
 
@@ -19,6 +20,7 @@ interface UseToolCallsReturn {
   setExternalNavIndex: React.Dispatch<React.SetStateAction<number | undefined>>;
   handleToolClick: (clickedAssistantMessageId: string | null, clickedToolName: string) => void;
   handleStreamingToolCall: (toolCall: StreamingToolCall | null) => void;
+  handleStreamingToolOutput: (toolOutput: ToolOutputStreamState | null) => void;
   toggleSidePanel: () => void;
   handleSidePanelNavigate: (newIndex: number) => void;
   userClosedPanelRef: React.MutableRefObject<boolean>;
@@ -383,6 +385,31 @@ export function useToolCalls(
     [toolCalls.length],
   );
 
+  const handleStreamingToolOutput = useCallback(
+    (toolOutput: ToolOutputStreamState | null) => {
+      if (!toolOutput) return;
+      const toolName = toolOutput.functionName.replace(/_/g, '-').toLowerCase();
+
+      // Attach the live output to the running tool call it belongs to
+      setToolCalls((prev) => {
+        const streamingIndex = prev.findIndex(
+          tc => tc.toolResult?.content === 'STREAMING' && tc.assistantCall.name === toolName
+        );
+        if (streamingIndex === -1) return prev;
+        const updated = [...prev];
+        updated[streamingIndex] = {
+          ...updated[streamingIndex],
+          toolResult: {
+            ...updated[streamingIndex].toolResult,
+            liveOutput: toolOutput.output,
+          },
+        };
+        return updated;
+      });
+    },
+    [],
+  );
+
   return {
     toolCalls,
     setToolCalls,
@@ -396,6 +423,7 @@ export function useToolCalls(
     setExternalNavIndex,
     handleToolClick,
     handleStreamingToolCall,
+    handleStreamingToolOutput,
     toggleSidePanel,
     handleSidePanelNavigate,
     userClosedPanelRef,
@@ -22,6 +22,7 @@ export interface ToolCallInput {
     content?: string;
     isSuccess?: boolean;
     timestamp?: string;
+    liveOutput?: string; // Output streamed while the tool runs
   };
   messages?: ApiMessageType[];
 }
@@ -595,6 +596,7 @@ export function ToolCallSidePanel({
         toolTimestamp={displayToolCall.toolResult?.timestamp}
         isSuccess={isSuccess}
         isStreaming={isStreaming}
+        liveOutput={displayToolCall.toolResult?.liveOutput}
         project={project}
         messages={messages}
         agentStatus={agentStatus}
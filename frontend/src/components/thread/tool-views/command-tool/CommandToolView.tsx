@@ -27,6 +27,7 @@ export function CommandToolView({
   toolTimestamp,
   isSuccess = true,
   isStreaming = false,
+  liveOutput,
 }: ToolViewProps) {
   const { resolvedTheme } = useTheme();
   const isDarkTheme = resolvedTheme === 'dark';
@@ -127,7 +128,26 @@ export function CommandToolView({
       </CardHeader>
 
       <CardContent className="p-0 h-full flex-1 overflow-hidden relative">
-        {isStreaming ? (
+        {isStreaming && liveOutput ? (
+          <ScrollArea className="h-full w-full">
+            <div className="p-4">
+              <div className="bg-zinc-100 dark:bg-neutral-900 rounded-lg overflow-hidden border border-zinc-200/20">
+                <div className="bg-zinc-200 w-full dark:bg-zinc-800 px-4 py-2 flex items-center gap-2">
+                  <TerminalIcon className="h-4 w-4 text-zinc-600 dark:text-zinc-400" />
+                  <span className="text-sm font-medium text-zinc-700 dark:text-zinc-300">
+                    {displayPrefix} {displayText || 'Live output'}
+                  </span>
+                  <CircleDashed className="h-3.5 w-3.5 ml-auto text-zinc-500 animate-spin" />
+                </div>
+                <div className="p-4 max-h-96 overflow-auto scrollbar-hide">
+                  <pre className="text-xs text-zinc-600 dark:text-zinc-300 font-mono whitespace-pre-wrap break-all overflow-visible">
+                    {liveOutput}
+                  </pre>
+                </div>
+              </div>
+            </div>
+          </ScrollArea>
+        ) : isStreaming ? (
           <LoadingState
             icon={Terminal}
             iconColor="text-purple-500 dark:text-purple-400"
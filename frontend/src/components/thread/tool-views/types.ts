@@ -7,6 +7,7 @@ export interface ToolViewProps {
   toolTimestamp?: string;
   isSuccess?: boolean;
   isStreaming?: boolean;
+  liveOutput?: string; // Output streamed while the tool runs
   project?: Project;
   name?: string;
   messages?: any[];
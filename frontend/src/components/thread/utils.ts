@@ -95,6 +95,9 @@ export const getToolIcon = (toolName: string): ElementType => {
     case 'browser-select-dropdown-option':
     case 'browser-scroll-to-text':
     case 'browser-wait':
+    case 'browser-get-screen-text':
+    case 'browser-read-page':
+    case 'browser-open-many':
       return Globe;
 
     // File operations
@@ -312,6 +315,9 @@ const TOOL_DISPLAY_NAMES = new Map([
   ['browser-send-keys', 'Pressing Keys'],
   ['browser-switch-tab', 'Switching Tab'],
   ['browser-wait', 'Waiting'],
+  ['browser-get-screen-text', 'Reading Screen Text'],
+  ['browser-read-page', 'Reading Page'],
+  ['browser-open-many', 'Opening Pages'],
 
   ['execute-data-provider-call', 'Calling data provider'],
   ['execute_data_provider_call', 'Calling data provider'],
@@ -364,6 +370,9 @@ const TOOL_DISPLAY_NAMES = new Map([
   ['browser_send_keys', 'Pressing Keys'],
   ['browser_switch_tab', 'Switching Tab'],
   ['browser_wait', 'Waiting'],
+  ['browser_get_screen_text', 'Reading Screen Text'],
+  ['browser_read_page', 'Reading Page'],
+  ['browser_open_many', 'Opening Pages'],
 
   ['execute_data_provider_call', 'Calling data provider'],
   ['get_data_provider_endpoints', 'Getting endpoints'],
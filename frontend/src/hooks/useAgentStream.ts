@@ -25,11 +25,23 @@ interface ApiMessageType {
   updated_at?: string;
 }
 
+// Live output of the running tool, assembled from tool_output_chunk status messages
+export interface ToolOutputStreamState {
+  functionName: string;
+  source: string;
+  output: string;
+  final: boolean;
+}
+
+// Characters of live tool output kept; older output is dropped
+const MAX_TOOL_OUTPUT_CHARS = 50000;
+
 // Define the structure returned by the hook
 export interface UseAgentStreamResult {
   status: string;
   textContent: string;
   toolCall: ParsedContent | null;
+  toolOutput: ToolOutputStreamState | null;
   error: string | null;
   agentRunId: string | null; // Expose the currently managed agentRunId
   startStreaming: (runId: string) => void;
@@ -76,6 +88,9 @@ export function useAgentStream(
     { content: string; sequence?: number }[]
   >([]);
   const [toolCall, setToolCall] = useState<ParsedContent | null>(null);
+  const [toolOutput, setToolOutput] = useState<ToolOutputStreamState | null>(
+    null,
+  );
   const [error, setError] = useState<string | null>(null);
 
   const streamCleanupRef = useRef<(() => void) | null>(null);
@@ -158,6 +173,7 @@ export function useAgentStream(
       // Reset streaming-specific state
       setTextContent([]);
       setToolCall(null);
+      setToolOutput(null);
 
       // Update status and clear run ID
       updateStatus(finalStatus);
@@ -326,6 +342,7 @@ export function useAgentStream(
         case 'status':
           switch (parsedContent.status_type) {
             case 'tool_started':
+              setToolOutput(null);
               setToolCall({
                 role: 'assistant',
                 status_type: 'tool_started',
@@ -342,6 +359,23 @@ export function useAgentStream(
                 setToolCall(null);
               }
               break;
+            case 'tool_output_chunk':
+              setToolOutput((prev) => {
+                const sameSource =
+                  prev &&
+                  !prev.final &&
+                  prev.source === parsedContent.source;
+                const output = (sameSource ? prev.output : '').concat(
+                  parsedContent.output || '',
+                );
+                return {
+                  functionName: parsedContent.function_name,
+                  source: parsedContent.source,
+                  output: output.slice(-MAX_TOOL_OUTPUT_CHARS),
+                  final: Boolean(parsedContent.final),
+                };
+              });
+              break;
             case 'thread_run_end':
               console.log(
                 '[useAgentStream] Received thread run end status, finalizing.',
@@ -518,6 +552,7 @@ export function useAgentStream(
       setStatus('idle');
       setTextContent([]);
       setToolCall(null);
+      setToolOutput(null);
       setError(null);
       setAgentRunId(null);
       currentRunIdRef.current = null;
@@ -545,6 +580,7 @@ export function useAgentStream(
       // Reset state before starting
       setTextContent([]);
       setToolCall(null);
+      setToolOutput(null);
       setError(null);
       updateStatus('connecting');
       setAgentRunId(runId);
@@ -633,6 +669,7 @@ export function useAgentStream(
     status,
     textContent: orderedTextContent,
     toolCall,
+    toolOutput,
     error,
     agentRunId,
     startStreaming,